@@ -1,14 +1,26 @@
+import functools
 import json
 from operator import attrgetter
 
-from django.http import JsonResponse, HttpResponseBadRequest
+from django.http import (
+    HttpResponse,
+    HttpResponseBadRequest,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from sqlalchemy.sql.expression import Alias, and_
 
 from .exception import FlexToolException
+from .models import resolve_results_alternative_ids
+from .results_cache import cached_query
 from .utils import Database, database_map, EntityType, get_and_validate
-from .view_utils import resolve_scenario_execution
+from .view_utils import resolve_scenario_executions
+from . import value_aggregation, value_columns, value_index_catalogue
 
+_FETCH_BATCH_SIZE = 1000
 
+
+@cached_query
 def get_entity_classes(project):
     """Gathers entity classes from the results database.
 
@@ -26,6 +38,7 @@ def get_entity_classes(project):
     return JsonResponse({"entity_classes": entity_classes})
 
 
+@cached_query
 def get_entities(project, body):
     """Gathers entities from the results database.
 
@@ -58,6 +71,7 @@ def get_entities(project, body):
     return JsonResponse({"entities": entities})
 
 
+@cached_query
 def get_parameters(project, body):
     """Gathers parameters from the results database.
 
@@ -87,9 +101,12 @@ def get_parameters(project, body):
     return JsonResponse({"parameters": parameters})
 
 
+@cached_query
 def get_value_indexes(project, body):
     """Gathers parameter value indexes from the results database.
 
+    Indexes are looked up from the value index catalogue.
+
     Args:
         project (Project): a project
         body (dict): request body
@@ -97,56 +114,46 @@ def get_value_indexes(project, body):
     Returns:
         HTTPResponse: a response object
     """
-    alternative_to_execution = _execution_alternatives(project, body)
-    alternative_ids = (
-        list(alternative_to_execution) if alternative_to_execution is not None else []
-    )
+    alternative_to_executions = _execution_alternatives(project, body)
+    scenario_execution_ids = get_and_validate(body, "scenarioExecutionIds", list)
     classes = get_and_validate(body, "classes", list)
     parameters = get_and_validate(body, "parameters", list)
-    indexes = []
+    database_path = project.results_database_path()
+    catalogues = []
     with database_map(project, Database.RESULT) as db_map:
-        entity_class_types = _fetch_entity_class_types(db_map)
-        object_classes = [
-            class_
-            for class_ in classes
-            if entity_class_types.get(class_) == EntityType.OBJECT
-        ]
-        if object_classes:
-            filter_conditions = _make_object_filter(
-                object_classes,
-                [],
-                parameters,
-                alternative_ids,
-                db_map.object_parameter_value_sq,
-            )
-            indexes.extend(
-                _query_parameter_dimensions(
-                    EntityType.OBJECT, filter_conditions, db_map
-                )
-            )
-        relationship_classes = [
-            class_
-            for class_ in classes
-            if entity_class_types.get(class_) == EntityType.RELATIONSHIP
-        ]
-        if relationship_classes:
-            filter_conditions = _make_relationship_filter(
-                relationship_classes,
-                parameters,
-                alternative_ids,
-                db_map.relationship_parameter_value_sq,
-            )
-            indexes.extend(
-                _query_parameter_dimensions(
-                    EntityType.RELATIONSHIP, filter_conditions, db_map
-                )
+        subquery = db_map.alternative_sq
+        query = db_map.query(subquery.c.id, subquery.c.name)
+        if scenario_execution_ids:
+            query = query.filter(subquery.c.id.in_(list(alternative_to_executions)))
+        for alternative_id, alternative_name in query:
+            entries = value_index_catalogue.read_catalogue(
+                database_path, alternative_name
             )
+            if entries is None:
+                entries = value_index_catalogue.build_catalogue(db_map, alternative_id)
+                try:
+                    value_index_catalogue.write_catalogue(
+                        database_path, alternative_name, entries
+                    )
+                except OSError:
+                    pass
+            catalogues.append(entries)
+    indexes = value_index_catalogue.merge_dimensions(catalogues, classes, parameters)
     return JsonResponse({"indexes": indexes})
 
 
+@cached_query
 def get_parameter_values(project, body):
     """Gathers parameters from the results database.
 
+    If body's 'stream' is true, values are streamed as newline delimited JSON
+    records while they are read from the database
+    instead of being collected into a single JSON document.
+    If body's 'format' is 'columns', values are sent in the binary
+    columnar format described in value_columns.
+    Body's optional 'aggregation' object makes the values plot-sized,
+    see value_aggregation.aggregation_options() for the options.
+
     Args:
         project (Project): a project
         body (dict): request body
@@ -154,155 +161,188 @@ def get_parameter_values(project, body):
     Returns:
         HTTPResponse: a response object
     """
-    alternative_to_execution = _execution_alternatives(project, body)
-    alternative_ids = list(alternative_to_execution)
+    alternative_to_executions = _execution_alternatives(project, body)
     classes = get_and_validate(body, "classes", list)
     parameters = get_and_validate(body, "parameters", list)
     objects = get_and_validate(body, "objects", list, required=False)
-    values = []
+    stream = get_and_validate(body, "stream", bool, required=False)
+    value_format = get_and_validate(body, "format", str, required=False)
+    if value_format not in (None, "json", "columns"):
+        raise FlexToolException(f"Unknown value format '{value_format}'.")
+    aggregation = get_and_validate(body, "aggregation", dict, required=False)
+    records = _parameter_value_records(
+        project,
+        classes,
+        parameters if parameters is not None else [],
+        objects if objects is not None else [],
+        alternative_to_executions,
+    )
+    if aggregation:
+        records = value_aggregation.aggregate_values(
+            records, **value_aggregation.aggregation_options(aggregation)
+        )
+    if value_format == "columns":
+        return HttpResponse(
+            value_columns.encode_values(records),
+            content_type=value_columns.CONTENT_TYPE,
+        )
+    if stream:
+        response = StreamingHttpResponse(
+            _json_lines(records), content_type="application/x-ndjson"
+        )
+        response["X-Accel-Buffering"] = "no"
+        return response
+    return JsonResponse({"values": list(records)})
+
+
+def _parameter_value_records(
+    project, classes, parameters, objects, alternative_to_executions
+):
+    """Yields parameter value records from the results database.
+
+    Values are read in batches and the database is opened for each batch
+    so a slowly consumed stream never holds a read transaction open.
+
+    Args:
+        project (Project): a project
+        classes (list of str): entity class names
+        parameters (list of str): parameter names
+        objects (list of list): object names per dimension
+        alternative_to_executions (dict): mapping from alternative id
+            to list of scenario executions
+
+    Yields:
+        dict: parameter value record
+    """
+    if not alternative_to_executions:
+        return
+    alternative_ids = list(alternative_to_executions)
     with database_map(project, Database.RESULT) as db_map:
         entity_class_types = _fetch_entity_class_types(db_map)
-        object_classes = [
-            class_
-            for class_ in classes
-            if entity_class_types.get(class_) == EntityType.OBJECT
-        ]
-        if object_classes:
-            filter_conditions = _make_object_filter(
+    object_classes = [
+        class_
+        for class_ in classes
+        if entity_class_types.get(class_) == EntityType.OBJECT
+    ]
+    if object_classes:
+        yield from _query_parameter_values(
+            project,
+            EntityType.OBJECT,
+            functools.partial(
+                _make_object_filter,
                 object_classes,
-                objects if objects is not None else [],
-                parameters if parameters is not None else [],
+                objects,
+                parameters,
                 alternative_ids,
-                db_map.object_parameter_value_sq,
-            )
-            values += _query_parameter_values(
-                EntityType.OBJECT,
-                filter_conditions,
-                None,
-                alternative_to_execution,
-                db_map,
-            )
-        relationship_classes = [
-            class_
-            for class_ in classes
-            if entity_class_types.get(class_) == EntityType.RELATIONSHIP
-        ]
-        if relationship_classes:
-            filter_conditions = _make_relationship_filter(
+            ),
+            None,
+            alternative_to_executions,
+        )
+    relationship_classes = [
+        class_
+        for class_ in classes
+        if entity_class_types.get(class_) == EntityType.RELATIONSHIP
+    ]
+    if relationship_classes:
+        yield from _query_parameter_values(
+            project,
+            EntityType.RELATIONSHIP,
+            functools.partial(
+                _make_relationship_filter,
                 relationship_classes,
-                parameters if parameters is not None else [],
+                parameters,
                 alternative_ids,
-                db_map.relationship_parameter_value_sq,
-            )
-            values += _query_parameter_values(
-                EntityType.RELATIONSHIP,
-                filter_conditions,
-                objects if objects is not None else [],
-                alternative_to_execution,
-                db_map,
-            )
-    return JsonResponse({"values": values})
+            ),
+            objects,
+            alternative_to_executions,
+        )
 
 
-def _query_parameter_values(
-    entity_type, filter_conditions, accept_objects, alternative_to_execution, db_map
-):
-    """Reads parameter values from database.
+def _json_lines(records):
+    """Serializes records to newline delimited JSON.
+
+    Errors raised after streaming has started cannot change response's status,
+    so they are sent as a final record with an 'error' field.
 
     Args:
-        entity_type (EntityType): entity type
-        filter_conditions (tuple): query filters
-        accept_objects (list of list, optional): object names per dimension
-        alternative_to_execution (dict): mapping from alternative id to scenario execution
-        db_map (DatabaseMappingBase):
+        records (Iterable of dict): records to serialize
 
-    Returns:
-        dict: parameter value records
+    Yields:
+        str: JSON line
     """
-    records = []
-    get_class_name, get_object_names, get_object_labels = _entity_handling_functions(
-        entity_type
-    )
-    subquery = {
-        EntityType.OBJECT: db_map.object_parameter_value_sq,
-        EntityType.RELATIONSHIP: db_map.relationship_parameter_value_sq,
-    }[entity_type]
-    for row in db_map.query(subquery).filter(and_(*filter_conditions)):
-        objects = get_object_names(row)
-        if (
-            entity_type == EntityType.RELATIONSHIP
-            and accept_objects
-            and _reject_objects(objects, accept_objects)
-        ):
-            continue
-        try:
-            execution = alternative_to_execution[row.alternative_id]
-        except KeyError:
-            raise FlexToolException(f"No execution for alternative id.")
-        record = {
-            "class": get_class_name(row),
-            "object_classes": get_object_labels(row),
-            "objects": objects,
-            "parameter": row.parameter_name,
-            "scenario": execution.scenario.name,
-            "time_stamp": execution.execution_time.isoformat(),
-            "type": row.type,
-            "value": str(row.value, encoding="utf-8"),
-        }
-        records.append(record)
-    return records
-
-
-def _query_parameter_dimensions(entity_type, filter_conditions, db_map):
-    """Reads parameter value dimensions from the first suitable parameter value found in database.
+    try:
+        for record in records:
+            yield json.dumps(record) + "\n"
+    except FlexToolException as error:
+        yield json.dumps({"error": str(error)}) + "\n"
+
+
+def _query_parameter_values(
+    project, entity_type, make_filter, accept_objects, alternative_to_executions
+):
+    """Reads parameter values from database.
+
+    Rows are fetched in batches ordered by value id.
+    Each batch is read in its own database session
+    that is closed before the batch is yielded.
 
     Args:
+        project (Project): a project
         entity_type (EntityType): entity type
-        filter_conditions (tuple): query filters
-        db_map (DatabaseMappingBase):
+        make_filter (Callable): function that makes query filters from value subquery
+        accept_objects (list of list, optional): object names per dimension
+        alternative_to_executions (dict): mapping from alternative id
+            to list of scenario executions
 
-    Returns:
-        list: dimension records
+    Yields:
+        dict: parameter value record
     """
-    dimensions = {}
     get_class_name, get_object_names, get_object_labels = _entity_handling_functions(
         entity_type
     )
-    subquery = {
-        EntityType.OBJECT: db_map.object_parameter_value_sq,
-        EntityType.RELATIONSHIP: db_map.relationship_parameter_value_sq,
-    }[entity_type]
-    queried_fingerprints = set()
-    for row in db_map.query(subquery).filter(and_(*filter_conditions)):
-        fingerprint = (row.entity_class_id, row.parameter_id, row.alternative_id)
-        if fingerprint in queried_fingerprints:
-            continue
-        else:
-            queried_fingerprints.add(fingerprint)
-        value = json.loads(row.value)
-        indexes = {}
-        _collect_indexes(value, indexes)
-        for i, (name, index) in enumerate(indexes.items()):
-            existing = dimensions.get(name)
-            if existing is not None:
-                existing["indexes"] = sorted(set(existing["indexes"]) | index)
-                existing_class_and_parameter = set(
-                    zip(existing["class_names"], existing["parameter_names"])
-                )
-                class_name = get_class_name(row)
-                parameter = row.parameter_name
-                if (class_name, parameter) not in existing_class_and_parameter:
-                    existing["class_names"].append(class_name)
-                    existing["parameter_names"].append(parameter)
-            else:
-                dimensions[name] = {
-                    "index_name": name,
-                    "indexes": sorted(index),
-                    "depth": i,
-                    "class_names": [get_class_name(row)],
-                    "parameter_names": [row.parameter_name],
+    last_id = None
+    while True:
+        with database_map(project, Database.RESULT) as db_map:
+            subquery = {
+                EntityType.OBJECT: db_map.object_parameter_value_sq,
+                EntityType.RELATIONSHIP: db_map.relationship_parameter_value_sq,
+            }[entity_type]
+            filter_conditions = make_filter(subquery)
+            if last_id is not None:
+                filter_conditions = filter_conditions + (subquery.c.id > last_id,)
+            rows = (
+                db_map.query(subquery)
+                .filter(and_(*filter_conditions))
+                .order_by(subquery.c.id)
+                .limit(_FETCH_BATCH_SIZE)
+                .all()
+            )
+        for row in rows:
+            objects = get_object_names(row)
+            if (
+                entity_type == EntityType.RELATIONSHIP
+                and accept_objects
+                and _reject_objects(objects, accept_objects)
+            ):
+                continue
+            try:
+                executions = alternative_to_executions[row.alternative_id]
+            except KeyError:
+                raise FlexToolException(f"No execution for alternative id.")
+            for execution in executions:
+                yield {
+                    "class": get_class_name(row),
+                    "object_classes": get_object_labels(row),
+                    "objects": objects,
+                    "parameter": row.parameter_name,
+                    "scenario": execution.scenario.name,
+                    "time_stamp": execution.execution_time.isoformat(),
+                    "type": row.type,
+                    "value": str(row.value, encoding="utf-8"),
                 }
-    return list(dimensions.values())
+        if len(rows) < _FETCH_BATCH_SIZE:
+            return
+        last_id = rows[-1].id
 
 
 def _entity_handling_functions(entity_type):
@@ -416,44 +456,27 @@ def _fetch_entity_class_types(db_map):
     }
 
 
-def _collect_indexes(value, indexes, depth=0):
-    """Recursively collects indexes and index names from parameter value.
-
-    Args:
-        value (dict): (unparsed) parameter value in database format
-        indexes (dict): value indexes
-    """
-    index = indexes.setdefault(value.get("index_name", f"x_{depth}"), set())
-    if isinstance(value["data"], list):
-        for row in value["data"]:
-            index.add(row[0])
-            if isinstance(row[1], dict):
-                _collect_indexes(row[1], indexes, depth + 1)
-    else:
-        for i, y in value["data"].items():
-            index.add(i)
-            if isinstance(y, dict):
-                _collect_indexes(y, indexes, depth + 1)
-
-
 def _execution_alternatives(project, body):
     """Collects alternatives corresponding to request's scenario executions.
 
+    Executions that reuse earlier results share their origin's alternative.
+    Executions whose results alternative is not found are left out.
+
     Args:
         project (project): a project
         body (dict): request body
 
     Returns:
-        dict: mapping from alternative id to execution
+        dict: mapping from alternative id to list of executions
     """
     scenario_execution_ids = get_and_validate(body, "scenarioExecutionIds", list)
-    scenario_executions = [
-        resolve_scenario_execution(project, id_) for id_ in scenario_execution_ids
-    ]
-    return {
-        execution.results_alternative_id(): execution
-        for execution in scenario_executions
-    }
+    scenario_executions = resolve_scenario_executions(project, scenario_execution_ids)
+    alternative_ids = resolve_results_alternative_ids(project, scenario_executions)
+    alternative_to_executions = {}
+    for alternative_id, execution in zip(alternative_ids, scenario_executions):
+        if alternative_id is not None:
+            alternative_to_executions.setdefault(alternative_id, []).append(execution)
+    return alternative_to_executions
 
 
 def get_default_plot_specification(project, body):
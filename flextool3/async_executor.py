@@ -0,0 +1,150 @@
+"""Asynchronous counterparts of executor functions for async views.
+
+Requests go to the same task loop as those sent by executor
+but responses are awaited without blocking a thread.
+Functions that do not wait for a response run executor's functions
+in a worker thread since starting the task loop may block.
+"""
+from asgiref.sync import sync_to_async
+
+from . import executor
+from .task_loop import Field, Status, Task
+
+_FOLLOW_TIMEOUT = 15.0
+"""Maximum time in seconds to wait for changes between execution status checks."""
+
+
+async def start(execution_id, command, arguments, **kwargs):
+    """Queues a new process for starting.
+
+    Args:
+        execution_id (int): unique execution id
+        command (str): command to execute
+        arguments (list of str): command's arguments
+        **kwargs: keyword arguments forwarded to executor.start()
+    """
+    await sync_to_async(executor.start, thread_sensitive=False)(
+        execution_id, command, arguments, **kwargs
+    )
+
+
+async def abort(execution_id):
+    """Aborts a process.
+
+    Args:
+        execution_id (int): execution id
+    """
+    await sync_to_async(executor.abort, thread_sensitive=False)(execution_id)
+
+
+async def remove(execution_id):
+    """Terminates a process and deletes all references to it and its logs.
+
+    Args:
+        execution_id (int): execution id
+    """
+    await sync_to_async(executor.remove, thread_sensitive=False)(execution_id)
+
+
+async def briefing(execution_id, first=None):
+    """Queries process' status, output lines, return code and queue position.
+
+    Args:
+        execution_id (int): execution id
+        first (int, optional): index of first log line to include;
+            if None, includes lines that have not been read before
+
+    Returns:
+        Briefing: execution briefing
+    """
+    return await executor.async_request(
+        {
+            Field.TASK: Task.SEND_BRIEFING,
+            Field.EXECUTION_ID: execution_id,
+            Field.FIRST_LINE: first,
+        }
+    )
+
+
+async def read_log(execution_id, first=0, last=None):
+    """Reads a range of lines from process' log.
+
+    Args:
+        execution_id (int): execution id
+        first (int): index of first line to read
+        last (int, optional): index of one past last line; if None, reads to the end
+
+    Returns:
+        list of str: log lines
+    """
+    return await executor.async_request(
+        {
+            Field.TASK: Task.SEND_LOG_LINES,
+            Field.EXECUTION_ID: execution_id,
+            Field.FIRST_LINE: first,
+            Field.LAST_LINE: last,
+        }
+    )
+
+
+async def execution_status(execution_id):
+    """Queries process' execution status.
+
+    Args:
+        execution_id (int): execution id
+
+    Returns:
+        Status: process status
+    """
+    return await executor.async_request(
+        {
+            Field.TASK: Task.SEND_STATUS,
+            Field.EXECUTION_ID: execution_id,
+        }
+    )
+
+
+async def wait_for_change(execution_ids, timeout, line_counts=None):
+    """Waits until any of given processes has new output or its status changes.
+
+    Args:
+        execution_ids (list): execution ids
+        timeout (float): maximum time to wait in seconds
+        line_counts (dict, optional): mapping from execution id
+            to number of log lines the caller has seen
+
+    Returns:
+        bool: True if a change happened, False if wait timed out
+    """
+    return await executor.async_request(
+        {
+            Field.TASK: Task.WAIT_FOR_CHANGE,
+            Field.EXECUTION_IDS: list(execution_ids),
+            Field.TIMEOUT: timeout,
+            Field.LINE_COUNTS: line_counts if line_counts is not None else {},
+        }
+    )
+
+
+async def follow_log(execution_id, first=0):
+    """Yields process' log lines as they arrive until the process stops.
+
+    Args:
+        execution_id (int): execution id
+        first (int): index of first line to yield
+
+    Yields:
+        str: log line
+    """
+    position = first
+    while True:
+        status = await execution_status(execution_id)
+        lines = await read_log(execution_id, position)
+        for line in lines:
+            yield line
+        position += len(lines)
+        if status not in (Status.QUEUED, Status.RUNNING):
+            return
+        await wait_for_change(
+            [execution_id], _FOLLOW_TIMEOUT, line_counts={execution_id: position}
+        )
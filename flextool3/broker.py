@@ -0,0 +1,522 @@
+"""Execution broker that dispatches executions to task loops on worker nodes.
+
+Web servers and worker nodes connect to the broker over a Unix socket
+or TCP using multiprocessing connections authenticated with a shared key.
+Each worker node runs a task loop. The broker sends each new execution
+to the least loaded node and forwards later requests concerning the execution
+to that node; responses are routed back to the web server that asked.
+Executions wait in the broker if no worker node is connected.
+
+Worker nodes send log lines instead of log spans since their log files
+are not reachable from the web server. Paths in execution commands
+must be valid on the worker nodes, e.g. projects on a shared file system.
+
+Usage: python -m flextool3.broker serve <address>
+       python -m flextool3.broker worker <address> [max processes]
+
+Address is either a Unix socket path or host:port.
+Authentication key is read from FLEXTOOL_BROKER_AUTHKEY environment variable.
+"""
+from collections import deque
+from dataclasses import dataclass, field
+from enum import auto, Enum, unique
+import itertools
+from multiprocessing import AuthenticationError, Pipe
+from multiprocessing.connection import Client, Listener, wait
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Any
+
+from .task_loop import Briefing, Error, Field, loop, Status, Task, unpack_response
+
+AUTHKEY_VARIABLE = "FLEXTOOL_BROKER_AUTHKEY"
+"""Environment variable that holds the authentication key."""
+
+
+@unique
+class Role(Enum):
+    """Peer roles announced right after connecting to broker."""
+
+    CLIENT = auto()
+    """Web server that sends task messages."""
+    WORKER = auto()
+    """Worker node that runs a task loop."""
+
+
+def parse_address(address):
+    """Converts address string to multiprocessing connection address.
+
+    Args:
+        address (str): Unix socket path or host:port
+
+    Returns:
+        str or tuple: socket path or (host, port) pair
+    """
+    host, separator, port = address.rpartition(":")
+    if separator and host and port.isdigit():
+        return host, int(port)
+    return address
+
+
+@dataclass
+class _Node:
+    """Worker node connected to broker."""
+
+    capacity: int
+    executions: set = field(default_factory=set)
+
+    @property
+    def load(self):
+        """Number of executions per process slot."""
+        return len(self.executions) / self.capacity
+
+
+@dataclass(eq=False)
+class _WaitGroup:
+    """Change wait that has been split between worker nodes."""
+
+    client: Any
+    request_id: Any
+    deadline: float
+    backlog_ids: set
+    """Ids of executions that wait for a worker node."""
+    parts: set = field(default_factory=set)
+    """Broker's request ids of parts that have not been answered."""
+    answered: bool = False
+
+
+@dataclass
+class _PendingRequest:
+    """Request that has been forwarded to a worker node."""
+
+    client: Any
+    request_id: Any
+    node: Any
+    group: _WaitGroup = None
+    """Change wait the request is part of."""
+
+
+class Broker:
+    """Routes task messages between web servers and worker nodes."""
+
+    def __init__(self, address, authkey):
+        """
+        Args:
+            address (str or tuple): Unix socket path or (host, port) pair to listen
+            authkey (bytes): authentication key
+        """
+        self._listener = Listener(address, authkey=authkey)
+        self._wake_receiver, self._wake_sender = Pipe(duplex=False)
+        self._new_peers = queue.SimpleQueue()
+        self._clients = set()
+        self._nodes = {}
+        self._owners = {}
+        self._backlog = deque()
+        self._waits = []
+        self._pending = {}
+        self._request_ids = itertools.count()
+        self._running = True
+
+    @property
+    def address(self):
+        """Address the broker listens."""
+        return self._listener.address
+
+    def serve(self):
+        """Routes messages until close() is called."""
+        threading.Thread(
+            target=self._accept, name="Broker listener", daemon=True
+        ).start()
+        while self._running:
+            timeout = None
+            if self._waits:
+                timeout = max(self._waits[0].deadline - time.monotonic(), 0.0)
+            peers = [self._wake_receiver, *self._clients, *self._nodes]
+            for connection in wait(peers, timeout):
+                if connection is self._wake_receiver:
+                    self._wake_receiver.recv_bytes()
+                    self._add_new_peers()
+                    continue
+                try:
+                    message = connection.recv()
+                except (EOFError, OSError):
+                    self._drop(connection)
+                    continue
+                if connection in self._nodes:
+                    self._route_response(*message)
+                else:
+                    self._route_task(connection, message)
+            self._expire_waits()
+        for connection in (*self._clients, *self._nodes):
+            connection.close()
+        self._listener.close()
+
+    def close(self):
+        """Stops serving."""
+        self._running = False
+        self._wake_sender.send_bytes(b"")
+
+    def _accept(self):
+        """Accepts new peers and hands them to the routing thread."""
+        while self._running:
+            try:
+                connection = self._listener.accept()
+                role = connection.recv()
+            except (AuthenticationError, EOFError, OSError):
+                if not self._running:
+                    break
+                continue
+            self._new_peers.put((connection, role))
+            self._wake_sender.send_bytes(b"")
+
+    def _add_new_peers(self):
+        """Registers newly connected clients and worker nodes."""
+        while True:
+            try:
+                connection, role = self._new_peers.get_nowait()
+            except queue.Empty:
+                break
+            if role == Role.CLIENT:
+                self._clients.add(connection)
+            elif isinstance(role, tuple) and role[0] == Role.WORKER:
+                self._nodes[connection] = _Node(max(role[1], 1))
+            else:
+                connection.close()
+        self._dispatch_backlog()
+
+    def _drop(self, connection):
+        """Forgets a disconnected peer.
+
+        Executions of a lost worker node are lost with it;
+        pending requests concerning them are answered accordingly.
+
+        Args:
+            connection (Connection): peer's connection
+        """
+        connection.close()
+        self._clients.discard(connection)
+        node = self._nodes.pop(connection, None)
+        if node is None:
+            return
+        for execution_id in node.executions:
+            del self._owners[execution_id]
+        for request_id, request in list(self._pending.items()):
+            if request.node is connection:
+                self._route_response(request_id, Error.UNKNOWN_EXECUTION_ID)
+
+    def _route_task(self, client, message):
+        """Forwards client's task message to a worker node or answers it.
+
+        Args:
+            client (Connection): client's connection
+            message (dict): task message
+        """
+        task = message[Field.TASK]
+        if task == Task.QUIT:
+            return
+        if task == Task.SEND_PROCESS_COUNT:
+            _answer(client, message, len(self._owners) + len(self._backlog))
+            return
+        if task == Task.WAIT_FOR_CHANGE:
+            self._route_wait(client, message)
+            return
+        if task == Task.START_PROCESS:
+            self._backlog.append(message)
+            self._dispatch_backlog()
+            return
+        execution_id = message[Field.EXECUTION_ID]
+        node = self._owners.get(execution_id)
+        if node is None:
+            self._answer_from_backlog(client, message)
+            return
+        if task == Task.REMOVE_PROCESS:
+            del self._owners[execution_id]
+            self._nodes[node].executions.discard(execution_id)
+        self._forward(client, node, message)
+
+    def _forward(self, client, node, message, group=None):
+        """Sends a task message to worker node.
+
+        Requests get broker-wide unique request ids
+        so responses can be routed to the right client.
+
+        Args:
+            client (Connection): client's connection
+            node (Connection): worker node's connection
+            message (dict): task message
+            group (_WaitGroup, optional): change wait the message is part of
+
+        Returns:
+            int: broker's request id or None if message is not a request
+        """
+        if Field.REQUEST_ID not in message:
+            _send_task(node, message)
+            return None
+        request_id = next(self._request_ids)
+        self._pending[request_id] = _PendingRequest(
+            client, message[Field.REQUEST_ID], node, group
+        )
+        _send_task(node, {**message, Field.REQUEST_ID: request_id})
+        return request_id
+
+    def _route_wait(self, client, message):
+        """Splits change wait by worker node and forwards the parts.
+
+        Args:
+            client (Connection): client's connection
+            message (dict): WAIT_FOR_CHANGE message
+        """
+        execution_ids_by_node = {}
+        for execution_id in message[Field.EXECUTION_IDS]:
+            node = self._owners.get(execution_id)
+            if node is None and self._backlog_position(execution_id) is None:
+                _answer(client, message, True)
+                return
+            execution_ids_by_node.setdefault(node, []).append(execution_id)
+        group = _WaitGroup(
+            client,
+            message[Field.REQUEST_ID],
+            time.monotonic() + message[Field.TIMEOUT],
+            set(execution_ids_by_node.pop(None, [])),
+        )
+        line_counts = message.get(Field.LINE_COUNTS, {})
+        for node, execution_ids in execution_ids_by_node.items():
+            part = {
+                **message,
+                Field.EXECUTION_IDS: execution_ids,
+                Field.LINE_COUNTS: {
+                    execution_id: line_counts[execution_id]
+                    for execution_id in execution_ids
+                    if execution_id in line_counts
+                },
+            }
+            group.parts.add(self._forward(client, node, part, group))
+        self._waits.append(group)
+        self._waits.sort(key=lambda wait_group: wait_group.deadline)
+
+    def _route_response(self, request_id, response):
+        """Forwards worker node's response to the client that asked.
+
+        Args:
+            request_id (int): broker's request id
+            response (Any): response
+        """
+        request = self._pending.pop(request_id, None)
+        if request is None:
+            return
+        group = request.group
+        if group is None:
+            if request.client in self._clients:
+                request.client.send((request.request_id, response))
+            return
+        group.parts.discard(request_id)
+        if response is not False:
+            self._answer_wait(group, True)
+        elif not group.parts and not group.backlog_ids:
+            self._answer_wait(group, False)
+
+    def _answer_wait(self, group, changed):
+        """Responds to a change wait and cancels its remaining parts.
+
+        Args:
+            group (_WaitGroup): change wait
+            changed (bool): True if a change happened, False if wait timed out
+        """
+        if group.answered:
+            return
+        group.answered = True
+        for request_id in group.parts:
+            self._pending.pop(request_id, None)
+        self._waits.remove(group)
+        if group.client in self._clients:
+            group.client.send((group.request_id, changed))
+
+    def _expire_waits(self):
+        """Answers change waits that have timed out."""
+        now = time.monotonic()
+        while self._waits and self._waits[0].deadline <= now:
+            self._answer_wait(self._waits[0], False)
+
+    def _dispatch_backlog(self):
+        """Sends waiting executions to the least loaded worker nodes."""
+        dispatched = set()
+        while self._backlog and self._nodes:
+            message = self._backlog.popleft()
+            node = min(self._nodes, key=lambda connection: self._nodes[connection].load)
+            execution_id = message[Field.EXECUTION_ID]
+            self._owners[execution_id] = node
+            self._nodes[node].executions.add(execution_id)
+            _send_task(node, message)
+            dispatched.add(execution_id)
+        for group in list(self._waits):
+            if not dispatched.isdisjoint(group.backlog_ids):
+                self._answer_wait(group, True)
+
+    def _backlog_position(self, execution_id):
+        """Finds execution's position among executions waiting for a worker node.
+
+        Args:
+            execution_id (Any): execution id
+
+        Returns:
+            int: 1-based position or None if execution is not in backlog
+        """
+        for index, message in enumerate(self._backlog):
+            if message[Field.EXECUTION_ID] == execution_id:
+                return index + 1
+        return None
+
+    def _answer_from_backlog(self, client, message):
+        """Handles a task concerning an execution that has no worker node.
+
+        Args:
+            client (Connection): client's connection
+            message (dict): task message
+        """
+        task = message[Field.TASK]
+        position = self._backlog_position(message[Field.EXECUTION_ID])
+        if position is None:
+            _answer(client, message, Error.UNKNOWN_EXECUTION_ID)
+        elif task in (Task.ABORT_PROCESS, Task.REMOVE_PROCESS):
+            del self._backlog[position - 1]
+        elif task == Task.SEND_STATUS:
+            _answer(client, message, Status.QUEUED)
+        elif task == Task.SEND_QUEUE_POSITION:
+            _answer(client, message, position)
+        elif task == Task.SEND_BRIEFING:
+            _answer(client, message, Briefing(Status.QUEUED, [], None, position))
+        elif task in (Task.SEND_OUTPUT, Task.SEND_LOG_LINES):
+            _answer(client, message, [])
+        else:
+            _answer(client, message, None)
+
+
+class _WorkerConnection:
+    """Worker node's connection to broker as seen by task loop.
+
+    Log spans in responses are replaced by the lines
+    since log files are not reachable from web servers.
+    """
+
+    def __init__(self, connection):
+        """
+        Args:
+            connection (Connection): connection to broker
+        """
+        self._connection = connection
+
+    def send(self, message):
+        """Sends task loop's response to broker.
+
+        Args:
+            message (tuple): request id and response
+        """
+        request_id, response = message
+        try:
+            self._connection.send((request_id, unpack_response(response)))
+        except OSError:
+            pass
+
+
+def run_worker(address, authkey, max_processes=None, **loop_options):
+    """Connects to broker and runs executions it dispatches until broker disconnects.
+
+    Args:
+        address (str or tuple): broker's Unix socket path or (host, port) pair
+        authkey (bytes): authentication key
+        max_processes (int, optional): maximum number of simultaneously running
+            execution processes; if None, the number of CPUs is used
+        **loop_options: additional keyword arguments for task_loop.loop()
+    """
+    if max_processes is None:
+        max_processes = os.cpu_count()
+    connection = Client(address, authkey=authkey)
+    connection.send((Role.WORKER, max_processes))
+    task_queue = queue.SimpleQueue()
+    threading.Thread(
+        target=_receive_tasks,
+        args=(connection, task_queue),
+        name="Broker task receiver",
+        daemon=True,
+    ).start()
+    try:
+        loop(task_queue, _WorkerConnection(connection), max_processes, **loop_options)
+    finally:
+        connection.close()
+
+
+def _receive_tasks(connection, task_queue):
+    """Puts task messages from broker to task loop's queue.
+
+    Args:
+        connection (Connection): connection to broker
+        task_queue (queue.SimpleQueue): task loop's task queue
+    """
+    while True:
+        try:
+            message = connection.recv()
+        except (EOFError, OSError):
+            break
+        task_queue.put(message)
+    task_queue.put({Field.TASK: Task.QUIT})
+
+
+def _answer(client, message, response):
+    """Answers client's request if it expects an answer.
+
+    Args:
+        client (Connection): client's connection
+        message (dict): task message
+        response (Any): response
+    """
+    if Field.REQUEST_ID in message:
+        client.send((message[Field.REQUEST_ID], response))
+
+
+def _send_task(node, message):
+    """Sends task message to worker node ignoring lost connections.
+
+    Args:
+        node (Connection): worker node's connection
+        message (dict): task message
+    """
+    try:
+        node.send(message)
+    except OSError:
+        pass
+
+
+def main(arguments):
+    """Runs broker or worker node from command line.
+
+    Args:
+        arguments (list of str): command line arguments
+
+    Returns:
+        int: exit code
+    """
+    if len(arguments) < 2 or arguments[0] not in ("serve", "worker"):
+        print(__doc__, file=sys.stderr)
+        return 2
+    authkey = os.environ.get(AUTHKEY_VARIABLE)
+    if not authkey:
+        print(f"{AUTHKEY_VARIABLE} is not set", file=sys.stderr)
+        return 2
+    address = parse_address(arguments[1])
+    if arguments[0] == "serve":
+        broker = Broker(address, authkey.encode("utf-8"))
+        try:
+            broker.serve()
+        except KeyboardInterrupt:
+            pass
+        return 0
+    max_processes = int(arguments[2]) if len(arguments) > 2 else None
+    run_worker(address, authkey.encode("utf-8"), max_processes)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -7,3 +7,7 @@ class FlexToolException(Exception):
 
 class ExecutionNotFound(FlexToolException):
     """Raised when executor cannot find given execution."""
+
+
+class UnknownOutputLayout(FlexToolException):
+    """Raised when FlexTool's output files are not in the layout the ingest knows."""
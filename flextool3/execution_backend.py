@@ -0,0 +1,150 @@
+"""Backends that carry executor's task messages to task loops and responses back.
+
+LocalBackend runs a task loop in a child process of the web server.
+BrokerBackend connects to an execution broker (see broker.py)
+that dispatches executions to task loops on worker nodes.
+Both accept the same task messages and return the same responses,
+so the rest of the application does not know where executions run.
+"""
+from multiprocessing import AuthenticationError, Pipe, Process, Queue
+from multiprocessing.connection import Client
+import threading
+
+from .broker import Role
+from .exception import FlexToolException
+from .task_loop import Field, loop, Task
+
+
+class LocalBackend:
+    """Runs task loop in a child process."""
+
+    def __init__(self, loop_options):
+        """
+        Args:
+            loop_options (dict): keyword arguments for task_loop.loop()
+        """
+        self._loop_options = loop_options
+        self._task_queue = Queue()
+        self._receiving_connection, self._sending_connection = Pipe(duplex=False)
+        self._process = self._create_process()
+
+    def _create_process(self):
+        """Instantiates a task loop process.
+
+        Returns:
+            Process: task loop process
+        """
+        return Process(
+            target=loop,
+            args=(self._task_queue, self._sending_connection),
+            kwargs=self._loop_options,
+            name="Execution task loop",
+        )
+
+    def is_alive(self):
+        """Checks if task loop is running.
+
+        Returns:
+            bool: True if task loop is running, False otherwise
+        """
+        return self._process.is_alive()
+
+    def ensure_running(self):
+        """Starts task loop if it is not running."""
+        if self._process.is_alive():
+            return
+        if self._process.exitcode is not None:
+            self._process = self._create_process()
+        self._process.start()
+
+    def send(self, message):
+        """Sends a task message to task loop.
+
+        Args:
+            message (dict): task message
+        """
+        self._task_queue.put(message, block=False)
+
+    def receive(self):
+        """Waits for a response from task loop.
+
+        Returns:
+            tuple: request id and response
+        """
+        return self._receiving_connection.recv()
+
+    def close(self):
+        """Quits task loop."""
+        if self._process.is_alive():
+            self._task_queue.put({Field.TASK: Task.QUIT})
+            self._process.join()
+
+
+class BrokerBackend:
+    """Sends task messages to an execution broker."""
+
+    def __init__(self, address, authkey):
+        """
+        Args:
+            address (str or tuple): broker's Unix socket path or (host, port) pair
+            authkey (bytes): authentication key shared with the broker
+        """
+        self._address = address
+        self._authkey = authkey
+        self._connection = None
+        self._send_lock = threading.Lock()
+
+    def is_alive(self):
+        """Checks if connection to broker is open.
+
+        Returns:
+            bool: True if connected, False otherwise
+        """
+        connection = self._connection
+        return connection is not None and not connection.closed
+
+    def ensure_running(self):
+        """Connects to broker if not connected."""
+        if self.is_alive():
+            return
+        try:
+            connection = Client(self._address, authkey=self._authkey)
+            connection.send(Role.CLIENT)
+        except (OSError, AuthenticationError) as error:
+            raise FlexToolException(
+                f"cannot connect to execution broker: {error}"
+            ) from error
+        self._connection = connection
+
+    def send(self, message):
+        """Sends a task message to broker.
+
+        Args:
+            message (dict): task message
+        """
+        with self._send_lock:
+            try:
+                self._connection.send(message)
+            except OSError as error:
+                self._connection.close()
+                raise FlexToolException(
+                    "lost connection to execution broker"
+                ) from error
+
+    def receive(self):
+        """Waits for a response from broker.
+
+        Returns:
+            tuple: request id and response
+        """
+        connection = self._connection
+        try:
+            return connection.recv()
+        except (EOFError, OSError):
+            connection.close()
+            raise
+
+    def close(self):
+        """Disconnects from broker."""
+        if self._connection is not None:
+            self._connection.close()
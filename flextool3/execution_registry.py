@@ -0,0 +1,248 @@
+"""Persists the state of task loop's executions in server database.
+
+Registry writes are handed to a writer thread in the order they were made
+so task loop never waits for the database.
+"""
+
+from dataclasses import asdict
+import functools
+import json
+import logging
+import queue
+import threading
+import time
+
+import django
+from django.apps import apps
+from django.db import connections, DatabaseError, OperationalError
+from django.utils import timezone
+
+from .task_loop import Limits, Status
+
+_logger = logging.getLogger(__name__)
+_RETRY_DELAYS = (0.1, 0.5, 2.0)
+"""Seconds to wait before each retry of an operation on a locked database."""
+
+
+def encode_execution_id(execution_id):
+    """Converts execution id to string.
+
+    Args:
+        execution_id (int or tuple): execution id
+
+    Returns:
+        str: encoded id
+    """
+    return json.dumps(execution_id)
+
+
+def decode_execution_id(encoded_id):
+    """Converts encoded execution id back to execution id.
+
+    Args:
+        encoded_id (str): encoded id
+
+    Returns:
+        int or tuple: execution id
+    """
+    return json_to_execution_id(json.loads(encoded_id))
+
+
+def json_to_execution_id(value):
+    """Converts execution id that has gone through JSON back to execution id.
+
+    Args:
+        value (int or list): execution id as deserialized from JSON
+
+    Returns:
+        int or tuple: execution id
+    """
+    return tuple(value) if isinstance(value, list) else value
+
+
+def _fail_safe(default=None):
+    """Logs database errors instead of letting them stop the task loop.
+
+    Operations that fail because the database is busy or locked are retried
+    after waiting a while on top of the connection's busy timeout.
+    Every operation that fails for good is logged.
+
+    Args:
+        default (Any): value to return on error
+
+    Returns:
+        Callable: decorator
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        def guarded(registry, *args, **kwargs):
+            for delay in _RETRY_DELAYS + (None,):
+                try:
+                    return method(registry, *args, **kwargs)
+                except DatabaseError as error:
+                    if delay is not None and isinstance(error, OperationalError):
+                        time.sleep(delay)
+                        continue
+                    _logger.exception(
+                        "Execution registry operation %s failed%s.",
+                        method.__name__,
+                        f" for execution {args[0]!r}" if args else "",
+                    )
+                    return default
+
+        return guarded
+
+    return decorator
+
+
+def _written_in_background(method):
+    """Makes a registry method queue its call for registry's writer thread.
+
+    Args:
+        method (Callable): registry method
+
+    Returns:
+        Callable: method that returns immediately
+    """
+
+    @functools.wraps(method)
+    def enqueue(registry, *args):
+        registry._operations.put((method, args))  # pylint: disable=protected-access
+
+    return enqueue
+
+
+class ExecutionRegistry:
+    """Stores task loop's executions in the ExecutionProcess table.
+
+    The registry is instantiated in task loop's process.
+    """
+
+    persistent = True
+
+    def __init__(self):
+        if not apps.ready:
+            django.setup()
+        connections.close_all()
+        self._model = apps.get_model("flextool3", "ExecutionProcess")
+        self._operations = queue.SimpleQueue()
+        self._writer = threading.Thread(
+            target=self._write, name="Execution registry writer", daemon=True
+        )
+        self._writer.start()
+
+    def close(self):
+        """Waits until pending writes are done and stops the writer thread."""
+        self._operations.put(None)
+        self._writer.join()
+
+    def _write(self):
+        """Performs queued writes until registry is closed."""
+        try:
+            while True:
+                operation = self._operations.get()
+                if operation is None:
+                    return
+                method, args = operation
+                method(self, *args)
+        finally:
+            connections.close_all()
+
+    @_fail_safe(default=[])
+    def records(self):
+        """Returns registered executions.
+
+        Returns:
+            list of dict: execution records
+        """
+        return [
+            {
+                "execution_id": decode_execution_id(process.executor_id),
+                "command": process.command,
+                "arguments": process.arguments,
+                "environment": process.environment,
+                "priority": process.priority,
+                "limits": Limits(**process.limits),
+                "status": Status[process.status],
+                "pid": process.pid,
+                "log_path": process.log_path,
+                "return_code": process.return_code,
+            }
+            for process in self._model.objects.all()
+        ]
+
+    # pylint: disable=too-many-arguments
+    @_written_in_background
+    @_fail_safe()
+    def queued(self, execution_id, command, arguments, environment, priority, limits):
+        """Registers a queued execution.
+
+        Args:
+            execution_id (Any): execution id
+            command (str): command to execute
+            arguments (list of str): command's arguments
+            environment (dict): additional environment variables
+            priority (int): execution priority
+            limits (Limits): resource limits
+        """
+        self._model.objects.update_or_create(
+            executor_id=encode_execution_id(execution_id),
+            defaults={
+                "command": command,
+                "arguments": arguments,
+                "environment": environment,
+                "priority": priority,
+                "limits": asdict(limits),
+                "status": Status.QUEUED.name,
+                "pid": None,
+                "start_time": None,
+                "log_path": None,
+                "return_code": None,
+            },
+        )
+
+    @_written_in_background
+    @_fail_safe()
+    def started(self, execution_id, pid, log_path):
+        """Registers that execution's process has started.
+
+        Args:
+            execution_id (Any): execution id
+            pid (int): process id
+            log_path (Path): path to log file
+        """
+        self._model.objects.filter(
+            executor_id=encode_execution_id(execution_id)
+        ).update(
+            status=Status.RUNNING.name,
+            pid=pid,
+            start_time=timezone.now(),
+            log_path=str(log_path),
+        )
+
+    @_written_in_background
+    @_fail_safe()
+    def stopped(self, execution_id, status, return_code):
+        """Registers that execution's process has stopped.
+
+        Args:
+            execution_id (Any): execution id
+            status (Status): final status
+            return_code (int, optional): process' return code
+        """
+        self._model.objects.filter(
+            executor_id=encode_execution_id(execution_id)
+        ).update(status=status.name, return_code=return_code)
+
+    @_written_in_background
+    @_fail_safe()
+    def removed(self, execution_id):
+        """Removes execution from registry.
+
+        Args:
+            execution_id (Any): execution id
+        """
+        self._model.objects.filter(
+            executor_id=encode_execution_id(execution_id)
+        ).delete()
@@ -1,28 +1,60 @@
 """Utilities and helpers for executions interface."""
+import asyncio
+from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum, unique
+import functools
+import itertools
+import json
 from pathlib import Path
 import sys
-from tempfile import TemporaryDirectory
+import threading
 import time
+from typing import Any
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.http import (
     HttpResponseBadRequest,
     JsonResponse,
+    StreamingHttpResponse,
 )
 from django.utils import timezone
+from spinedb_api import SpineDBAPIError
 from spinedb_api.purge import purge
 from .exception import FlexToolException, ExecutionNotFound
-from .view_utils import resolve_project
-from .models import Project, Scenario, ScenarioExecution
+from .view_utils import aresolve_project, resolve_project
+from .execution_registry import json_to_execution_id
+from .models import (
+    find_results_alternative_ids,
+    Project,
+    ProjectExecution,
+    RESOURCE_USAGE_FIELDS,
+    resolve_results_alternative_ids,
+    Scenario,
+    ScenarioExecution,
+)
+from .fingerprint import scenario_input_fingerprint, solver_version
+from .results_ingest import IMPORTER_OPTION
 from .utils import Database, database_map, get_and_validate
-from . import executor, task_loop
-
-_MOD_SCRIPT_NAME = "mod_script.py"
+from . import async_executor, executor, task_loop
 
-_temporary_mod_script_dirs = {}
+SOLVE_MODEL_MOD_SCRIPT = Path(__file__).parent / "solve_model_mod_script.py"
+"""Project modification script for solving the model."""
+EXCEL_IMPORT_MOD_SCRIPT = Path(__file__).parent / "excel_import_mod_script.py"
+"""Project modification script for importing Excel file."""
+SCENARIOS_VARIABLE = "FLEXTOOL_SCENARIOS"
+"""Environment variable that lists active scenarios as JSON for solve model script."""
+EXCEL_FILE_NAME_VARIABLE = "FLEXTOOL_EXCEL_FILE_NAME"
+"""Environment variable that contains importee's name for Excel import script."""
 
 _executions = {}
+_execution_update_lock = threading.Lock()
+
+_STREAM_KEEP_ALIVE_INTERVAL = 15.0
+"""Maximum time in seconds between two messages in execution event stream."""
+DEFAULT_STORED_LOG_LINES = 10000
+"""Default number of latest log lines stored with scenario executions."""
 
 
 @unique
@@ -31,9 +63,18 @@ class Status(Enum):
 
     YET_TO_START = "YS"
     FINISHED = "OK"
+    QUEUED = "QU"
     RUNNING = "RU"
     ERROR = "ER"
     ABORTED = "AB"
+    LIMIT_EXCEEDED = "LE"
+
+
+_ACTIVE_STATUSES = (Status.QUEUED, Status.RUNNING)
+_ACTIVE_EXECUTOR_STATUSES = {
+    task_loop.Status.QUEUED: Status.QUEUED,
+    task_loop.Status.RUNNING: Status.RUNNING,
+}
 
 
 @unique
@@ -44,20 +85,77 @@ class ExecutionType(Enum):
     IMPORT_EXCEL = "import excel"
 
 
+def _new_log_tail():
+    """Creates a container for the latest execution log lines.
+
+    Returns:
+        deque: log line container
+    """
+    return deque(
+        maxlen=getattr(
+            settings,
+            "FLEXTOOL_EXECUTION_LOG_MEMORY_LINES",
+            task_loop.DEFAULT_LOG_MEMORY_LINES,
+        )
+    )
+
+
+@dataclass
+class Job:
+    """Information on a single executor process that is part of an execution."""
+
+    executor_id: Any
+    label: str = None
+    status: Status = Status.QUEUED
+    line_count: int = 0
+    resource_usage: dict = None
+    exceeded_limit: str = None
+
+
 @dataclass
 class Execution:
-    """Execution information."""
+    """Execution information.
+
+    Only the latest log lines are stored in log;
+    full logs are kept by the executor until the execution is discarded.
+    """
 
     status: Status = Status.RUNNING
-    log: str = ""
+    log: deque = field(default_factory=_new_log_tail)
+    log_line_count: int = 0
+    note_line_count: int = 0
     execution_time: datetime = None
     execution_time_offset: int = None
+    jobs: list = field(default_factory=list)
+
+    execution_type = None
+
+    def options(self):
+        """Returns execution type specific options for storing in database.
+
+        Returns:
+            dict: JSON serializable options
+        """
+        return {}
 
-    def has_results(self, project):
-        """Checks if execution produced expected results.
+    @classmethod
+    def from_options(cls, options):
+        """Creates an execution from stored options.
+
+        Args:
+            options (dict): options returned by options()
+
+        Returns:
+            Execution: new execution
+        """
+        return cls(**options)
+
+    def has_results(self, project, job):
+        """Checks if execution job produced expected results.
 
         Args:
             project (Project): project instance
+            job (Job): finished job
 
         Returns:
             bool: True if results were produced, False otherwise
@@ -71,12 +169,45 @@ class Execution:
             project (Project): project instance
         """
 
-    def complete_finishing(self, project):
-        """Performs tasks related to successfully finished execution.
+    def store_replaced_jobs(self, project):
+        """Stores the outcome of tasks that replace jobs when execution starts.
+
+        Args:
+            project (Project): project instance
+        """
+
+    def notes(self, project):
+        """Describes tasks that replace jobs when execution starts.
+
+        Args:
+            project (Project): project instance
+
+        Returns:
+            list of str: lines to write to the beginning of execution log
+        """
+        return []
+
+    def complete_finishing(self, project, job):
+        """Performs tasks related to successfully finished execution job.
+
+        Args:
+            project (Project): project instance
+            job (Job): finished job
+        """
+
+    def job_arguments(self, project):
+        """Splits execution into jobs and makes their Python interpreter arguments.
 
         Args:
             project (Project): project instance
+
+        Returns:
+            list of tuple: jobs, their interpreter arguments
+                and environment variables
         """
+        return [
+            (Job(project.id), self.interpreter_arguments(project), self.environment())
+        ]
 
     def interpreter_arguments(self, project):
         """Makes list of Python interpreter arguments for the execution.
@@ -89,32 +220,154 @@ class Execution:
         """
         raise NotImplementedError()
 
+    def environment(self):
+        """Makes environment variables that parameterise project modification script.
+
+        Returns:
+            dict: environment variables
+        """
+        return {}
+
 
 @dataclass
 class SolveModel(Execution):
     """Execution information when solving the model."""
 
     scenarios: list = field(default_factory=list)
+    parallel: bool = False
+    fingerprints: dict = field(default_factory=dict)
+    """Mapping from scenario name to its input fingerprint."""
+    cached: dict = field(default_factory=dict)
+    """Mapping from scenario name to id of earlier execution with reused results."""
+
+    execution_type = ExecutionType.SOLVE
+
+    def options(self):
+        """See base class."""
+        return {
+            "scenarios": self.scenarios,
+            "parallel": self.parallel,
+            "fingerprints": self.fingerprints,
+            "cached": self.cached,
+        }
+
+    def solved_scenarios(self):
+        """Returns the scenarios that are actually solved.
+
+        Returns:
+            list of str: scenario names
+        """
+        return [scenario for scenario in self.scenarios if scenario not in self.cached]
+
+    def has_results(self, project, job):
+        """See base class.
+
+        Parallel jobs share the results database,
+        so each job is checked for the results alternatives of its own scenarios.
+        """
+        alternative_ids = find_results_alternative_ids(
+            project,
+            [job.label] if job.label is not None else self.solved_scenarios(),
+            self.execution_time,
+            self.execution_time_offset,
+        )
+        return all(
+            alternative_id is not None for alternative_id in alternative_ids.values()
+        )
+
+    def prepare_run(self, project):
+        """See base class."""
+        self.fingerprints = {}
+        self.cached = {}
+        if not getattr(settings, "FLEXTOOL_REUSE_SOLVE_RESULTS", True):
+            return
+        solver_digest = solver_version(project.path)
+        for scenario in self.scenarios:
+            try:
+                fingerprint = scenario_input_fingerprint(
+                    project, scenario, solver_digest
+                )
+            except (FlexToolException, SpineDBAPIError):
+                continue
+            self.fingerprints[scenario] = fingerprint
+            cached_execution = _find_cached_scenario_execution(
+                project, scenario, fingerprint
+            )
+            if cached_execution is not None:
+                self.cached[scenario] = cached_execution.id
 
-    def has_results(self, project):
+    def store_replaced_jobs(self, project):
         """See base class."""
-        return _has_file_changed(project.results_database_path(), self.execution_time)
+        for scenario, execution_id in self.cached.items():
+            # pylint: disable=no-member
+            origin = ScenarioExecution.objects.get(id=execution_id)
+            _save_scenarios(
+                project,
+                [scenario],
+                origin.log,
+                self.execution_time,
+                self.execution_time_offset,
+                None,
+                self.fingerprints,
+                origin,
+            )
+
+    def notes(self, project):
+        """See base class."""
+        lines = []
+        for scenario, execution_id in self.cached.items():
+            # pylint: disable=no-member
+            origin = ScenarioExecution.objects.get(id=execution_id)
+            lines.append(
+                f"Input data of scenario '{scenario}' is unchanged since"
+                f" {origin.execution_time.isoformat(timespec='seconds')};"
+                " reusing its results."
+            )
+        return lines
 
-    def complete_finishing(self, project):
+    def complete_finishing(self, project, job):
         """See base class."""
         _save_scenarios(
             project,
-            self.scenarios,
-            self.log,
+            [job.label] if job.label is not None else self.solved_scenarios(),
+            _stored_log(job),
             self.execution_time,
             self.execution_time_offset,
+            job.resource_usage,
+            self.fingerprints,
+        )
+
+    def job_arguments(self, project):
+        """See base class."""
+        scenarios = self.solved_scenarios()
+        if not scenarios:
+            return []
+        if not self.parallel or len(scenarios) < 2:
+            return super().job_arguments(project)
+        arguments = solve_model_interpreter_arguments(
+            project.path,
+            ingest_results=getattr(settings, "FLEXTOOL_DIRECT_RESULTS_INGEST", True),
+            parallel=True,
         )
+        return [
+            (
+                Job((project.id, scenario), label=scenario),
+                arguments,
+                solve_model_environment([scenario]),
+            )
+            for scenario in scenarios
+        ]
 
     def interpreter_arguments(self, project):
         """See base class."""
-        temp_dir, script_path = _make_solve_model_mod_script(self.scenarios)
-        _temporary_mod_script_dirs[project.id] = temp_dir
-        return solve_model_interpreter_arguments(project.path, script_path)
+        return solve_model_interpreter_arguments(
+            project.path,
+            ingest_results=getattr(settings, "FLEXTOOL_DIRECT_RESULTS_INGEST", True),
+        )
+
+    def environment(self):
+        """See base class."""
+        return solve_model_environment(self.solved_scenarios())
 
 
 @dataclass
@@ -123,6 +376,17 @@ class ImportExcel(Execution):
 
     file_path: Path = None
 
+    execution_type = ExecutionType.IMPORT_EXCEL
+
+    def options(self):
+        """See base class."""
+        return {"file_path": str(self.file_path)}
+
+    @classmethod
+    def from_options(cls, options):
+        """See base class."""
+        return cls(file_path=Path(options["file_path"]))
+
     def prepare_run(self, project):
         """See base class."""
         with database_map(project, Database.MODEL) as db_map:
@@ -138,15 +402,17 @@ class ImportExcel(Execution):
             if not success:
                 raise FlexToolException("purge failed.")
 
-    def has_results(self, project):
+    def has_results(self, project, job):
         """See base class."""
         return _has_file_changed(project.model_database_path(), self.execution_time)
 
     def interpreter_arguments(self, project):
         """See base class."""
-        temp_dir, script_path = _make_excel_import_mod_script(self.file_path)
-        _temporary_mod_script_dirs[project.id] = temp_dir
-        return import_excel_interpreter_arguments(project.path, script_path)
+        return import_excel_interpreter_arguments(project.path)
+
+    def environment(self):
+        """See base class."""
+        return {EXCEL_FILE_NAME_VARIABLE: self.file_path.name}
 
 
 def is_busy_executing(project_id):
@@ -158,8 +424,8 @@ def is_busy_executing(project_id):
     Returns:
         bool: True if an execution is running, False otherwise
     """
-    execution = _executions.get(project_id)
-    return execution is not None and execution.status == Status.RUNNING
+    execution = _find_execution(project_id)
+    return execution is not None and execution.status in _ACTIVE_STATUSES
 
 
 def current_execution(request, request_body):
@@ -176,7 +442,7 @@ def current_execution(request, request_body):
         project = resolve_project(request, request_body)
     except FlexToolException as error:
         return HttpResponseBadRequest(str(error))
-    execution = _executions.get(project.id)
+    execution = _find_execution(project.id)
     if execution is None:
         return JsonResponse({"status": Status.YET_TO_START.value, "scenarios": []})
     if isinstance(execution, ImportExcel):
@@ -189,6 +455,7 @@ def current_execution(request, request_body):
                 "type": ExecutionType.SOLVE.value,
                 "status": execution.status.value,
                 "scenarios": execution.scenarios,
+                "parallel": execution.parallel,
             }
         )
     raise RuntimeError("unreachable code")
@@ -208,9 +475,11 @@ def abort_execution(request, request_body):
         project = resolve_project(request, request_body)
     except FlexToolException as error:
         return HttpResponseBadRequest(str(error))
-    if project.id not in _executions:
+    execution = _find_execution(project.id)
+    if execution is None:
         return HttpResponseBadRequest("Execution does not exist.")
-    executor.abort(project.id)
+    for job in execution.jobs:
+        executor.abort(job.executor_id)
     return JsonResponse({"status": "abort started"})
 
 
@@ -227,9 +496,14 @@ def solve_model(request, request_body):
     try:
         project = resolve_project(request, request_body)
         scenarios = get_and_validate(request_body, "scenarios", list)
+        parallel = get_and_validate(request_body, "parallel", bool, required=False)
     except FlexToolException as error:
         return HttpResponseBadRequest(str(error))
-    return _try_starting_execution(project, SolveModel, scenarios=scenarios)
+    if parallel is None:
+        parallel = getattr(settings, "FLEXTOOL_PARALLEL_SCENARIO_SOLVES", False)
+    return _try_starting_execution(
+        project, SolveModel, scenarios=scenarios, parallel=parallel
+    )
 
 
 def _try_starting_execution(project, execution_class, **kwargs):
@@ -246,11 +520,13 @@ def _try_starting_execution(project, execution_class, **kwargs):
     Returns:
         HTTPResponse: response to client
     """
-    execution = _executions.get(project.id)
-    if execution is not None and execution.status == Status.RUNNING:
-        if isinstance(execution, execution_class):
-            return JsonResponse({"status": "in progress"})
-        return JsonResponse({"status": "busy"})
+    execution = _find_execution(project.id)
+    if execution is not None:
+        if execution.status in _ACTIVE_STATUSES:
+            if isinstance(execution, execution_class):
+                return JsonResponse({"status": "in progress"})
+            return JsonResponse({"status": "busy"})
+        _discard_jobs(execution)
     execution = execution_class(**kwargs)
     _executions[project.id] = execution
     try:
@@ -275,13 +551,34 @@ def execution_briefing(request, request_body):
         project = resolve_project(request, request_body)
     except FlexToolException as error:
         return HttpResponseBadRequest(str(error))
-    try:
-        execution = _executions[project.id]
-    except KeyError:
+    execution = _find_execution(project.id)
+    if execution is None:
         return HttpResponseBadRequest("Project has no execution.")
     return JsonResponse({"briefing": briefing(project, execution)})
 
 
+async def aexecution_briefing(request, request_body):
+    """Asynchronous variant of execution_briefing().
+
+    Args:
+        request (HTTPRequest): client's request
+        request_body (dict): request body
+
+    Returns:
+        HTTPResponse: execution briefing
+    """
+    try:
+        project = await aresolve_project(request, request_body)
+    except FlexToolException as error:
+        return HttpResponseBadRequest(str(error))
+    execution = _executions.get(project.id)
+    if execution is None:
+        execution = await sync_to_async(_find_execution)(project.id)
+    if execution is None:
+        return HttpResponseBadRequest("Project has no execution.")
+    return JsonResponse({"briefing": await abriefing(project, execution)})
+
+
 def briefing(project, execution):
     """Checks execution and returns its status and log.
 
@@ -292,34 +589,505 @@ def briefing(project, execution):
     Returns:
         dict: execution briefing
     """
-    if execution.status == Status.RUNNING:
+    with _execution_update_lock:
+        queue_position = _update_execution(project, execution)
+        return _briefing_data(execution, queue_position)
+
+
+async def abriefing(project, execution):
+    """Asynchronous variant of briefing().
+
+    Log lines and queue positions of active jobs are fetched
+    without blocking a thread. Status changes are left to briefing()
+    which runs in a worker thread because it may access the database.
+
+    Args:
+        project (Project): execution's project
+        execution (Execution): execution instance
+
+    Returns:
+        dict: execution briefing
+    """
+    updated, briefing_data = await _atry_update_execution(
+        execution, functools.partial(_briefing_data, execution)
+    )
+    if updated:
+        return briefing_data
+    return await sync_to_async(briefing)(project, execution)
+
+
+def _briefing_data(execution, queue_position):
+    """Collects execution's status and log into a briefing.
+
+    Args:
+        execution (Execution): execution instance
+        queue_position (int, optional): execution's position in executor queue
+
+    Returns:
+        dict: execution briefing
+    """
+    briefing_data = {
+        "status": execution.status.value,
+        "log": _log_lines(execution),
+    }
+    if queue_position is not None:
+        briefing_data["queue_position"] = queue_position
+    resource_usage = _resource_usage(execution)
+    if resource_usage:
+        briefing_data["resource_usage"] = resource_usage
+    exceeded_limits = _exceeded_limits(execution)
+    if exceeded_limits:
+        briefing_data["exceeded_limits"] = exceeded_limits
+    return briefing_data
+
+
+def _resource_usage(execution):
+    """Collects resource usage of execution's finished jobs.
+
+    Args:
+        execution (Execution): execution
+
+    Returns:
+        list of dict: resource usage of each job that has it
+    """
+    return [
+        dict(job.resource_usage, job=job.label)
+        for job in execution.jobs
+        if job.resource_usage is not None
+    ]
+
+
+def _exceeded_limits(execution):
+    """Collects the resource limits that stopped execution's jobs.
+
+    Args:
+        execution (Execution): execution
+
+    Returns:
+        list of dict: exceeded limit of each job that was stopped by one
+    """
+    return [
+        {"job": job.label, "limit": job.exceeded_limit}
+        for job in execution.jobs
+        if job.exceeded_limit is not None
+    ]
+
+
+def _update_execution(project, execution):
+    """Updates execution's status and log from executor.
+
+    Args:
+        project (Project): execution's project
+        execution (Execution): execution instance
+
+    Returns:
+        int: execution's position in executor queue or None if it is not queued
+    """
+    if execution.status not in _ACTIVE_STATUSES:
+        return None
+    queue_positions = []
+    job_statuses = [job.status for job in execution.jobs]
+    for job in execution.jobs:
+        if job.status not in _ACTIVE_STATUSES:
+            continue
+        queue_position = _update_job(project, execution, job)
+        if queue_position is not None:
+            queue_positions.append(queue_position)
+    execution.status = _combined_status(execution.jobs)
+    if [job.status for job in execution.jobs] != job_statuses:
+        _store_execution(project.id, execution)
+    if execution.status == Status.QUEUED and queue_positions:
+        return min(queue_positions)
+    return None
+
+
+async def _atry_update_execution(execution, collect):
+    """Updates execution's log from executor without blocking a thread.
+
+    The update succeeds only if no job has changed its status
+    and no other thread is updating the execution.
+
+    Args:
+        execution (Execution): execution instance
+        collect (Callable): function that collects data from updated execution;
+            called with execution's queue position while execution is locked
+
+    Returns:
+        tuple: True and collected data if execution was updated,
+            False and None otherwise
+    """
+    job_briefings = await _active_job_briefings(execution)
+    if job_briefings is None or not _execution_update_lock.acquire(blocking=False):
+        return False, None
+    try:
+        for job, job_briefing in job_briefings:
+            if _ACTIVE_EXECUTOR_STATUSES.get(job_briefing.status) != job.status:
+                return False, None
+        queue_positions = []
+        for job, job_briefing in job_briefings:
+            _append_job_lines(execution, job, job_briefing)
+            if job_briefing.queue_position is not None:
+                queue_positions.append(job_briefing.queue_position)
+        if execution.status == Status.QUEUED and queue_positions:
+            return True, collect(min(queue_positions))
+        return True, collect(None)
+    finally:
+        _execution_update_lock.release()
+
+
+async def _active_job_briefings(execution):
+    """Fetches briefings of execution's active jobs.
+
+    Briefings include log lines from the first line job has not seen
+    so new lines are not marked read in the executor.
+
+    Args:
+        execution (Execution): execution instance
+
+    Returns:
+        list of tuple: active jobs and their briefings
+            or None if a job is not known to executor
+    """
+    if execution.status not in _ACTIVE_STATUSES:
+        return []
+    jobs = [job for job in execution.jobs if job.status in _ACTIVE_STATUSES]
+    try:
+        job_briefings = await asyncio.gather(
+            *(
+                async_executor.briefing(job.executor_id, first=job.line_count)
+                for job in jobs
+            )
+        )
+    except ExecutionNotFound:
+        return None
+    return list(zip(jobs, job_briefings))
+
+
+def execution_stream(project, since, asynchronous=False):
+    """Generates a Server-Sent Events response that follows execution's progress.
+
+    Args:
+        project (Project): execution's project
+        since (int): index of first log line to send
+        asynchronous (bool): if True, response streams from an asynchronous iterator
+
+    Returns:
+        StreamingHttpResponse: event stream
+    """
+    events = _aexecution_events if asynchronous else _execution_events
+    response = StreamingHttpResponse(
+        events(project, since), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def _execution_events(project, since):
+    """Yields new log lines and status changes of project's current execution.
+
+    Log events carry the index of the next unsent line as their id
+    so reconnecting clients can continue from where they left.
+    The stream ends after execution has stopped.
+
+    Args:
+        project (Project): execution's project
+        since (int): index of first log line to send
+
+    Yields:
+        str: event stream chunk
+    """
+    execution = _find_execution(project.id)
+    if execution is None:
+        yield _server_sent_event("status", {"status": Status.YET_TO_START.value})
+        return
+    position = None
+    sent_status = None
+    while _executions.get(project.id) is execution:
+        lines, position, status = _locked_stream_update(
+            project, execution, position, since
+        )
+        if lines:
+            yield _server_sent_event("log", {"log": lines}, position)
+        if status != sent_status:
+            yield _server_sent_event("status", status)
+            sent_status = status
+        if execution.status not in _ACTIVE_STATUSES:
+            return
+        active_jobs = [
+            job.executor_id for job in execution.jobs if job.status in _ACTIVE_STATUSES
+        ]
+        if not executor.wait_for_change(active_jobs, _STREAM_KEEP_ALIVE_INTERVAL):
+            yield ": keep-alive\n\n"
+
+
+async def _aexecution_events(project, since):
+    """Asynchronous variant of _execution_events().
+
+    Args:
+        project (Project): execution's project
+        since (int): index of first log line to send
+
+    Yields:
+        str: event stream chunk
+    """
+    execution = _executions.get(project.id)
+    if execution is None:
+        execution = await sync_to_async(_find_execution)(project.id)
+    if execution is None:
+        yield _server_sent_event("status", {"status": Status.YET_TO_START.value})
+        return
+    position = None
+    sent_status = None
+    while _executions.get(project.id) is execution:
+        update = None
+        if position is not None:
+            _, update = await _atry_update_execution(
+                execution, functools.partial(_stream_update, execution, position, True)
+            )
+        if update is None:
+            update = await sync_to_async(_locked_stream_update)(
+                project, execution, position, since
+            )
+        lines, position, status = update
+        if lines:
+            yield _server_sent_event("log", {"log": lines}, position)
+        if status != sent_status:
+            yield _server_sent_event("status", status)
+            sent_status = status
+        if execution.status not in _ACTIVE_STATUSES:
+            return
+        line_counts = {
+            job.executor_id: job.line_count
+            for job in execution.jobs
+            if job.status in _ACTIVE_STATUSES
+        }
+        if not await async_executor.wait_for_change(
+            list(line_counts), _STREAM_KEEP_ALIVE_INTERVAL, line_counts
+        ):
+            yield ": keep-alive\n\n"
+
+
+def _locked_stream_update(project, execution, position, since):
+    """Updates execution and collects its new log lines and status for event stream.
+
+    Args:
+        project (Project): execution's project
+        execution (Execution): execution instance
+        position (int, optional): index of next log line to send;
+            None if nothing has been sent yet
+        since (int): index of first log line client wants
+
+    Returns:
+        tuple: new log lines, index of next line and status data
+    """
+    with _execution_update_lock:
+        queue_position = _update_execution(project, execution)
+        if position is None:
+            position = since if since <= execution.log_line_count else 0
+        return _stream_update(execution, position, False, queue_position)
+
+
+def _stream_update(execution, position, memory_only, queue_position):
+    """Collects execution's new log lines and status for event stream.
+
+    Args:
+        execution (Execution): execution instance
+        position (int): index of next log line to send
+        memory_only (bool): if True, lines that are no longer in memory
+            are not read from executor
+        queue_position (int, optional): execution's position in executor queue
+
+    Returns:
+        tuple: new log lines, index of next line and status data
+            or None if lines are not in memory
+    """
+    if memory_only and position < execution.log_line_count - len(execution.log):
+        return None
+    lines = _log_lines_since(execution, position)
+    status = {"status": execution.status.value}
+    if queue_position is not None:
+        status["queue_position"] = queue_position
+    return lines, execution.log_line_count, status
+
+
+def _log_lines_since(execution, first):
+    """Returns execution's log lines starting from given index.
+
+    Lines that are no longer in memory are read from executor
+    if the execution consists of a single job.
+
+    Args:
+        execution (Execution): execution
+        first (int): index of first line
+
+    Returns:
+        list of str: log lines
+    """
+    tail_first = execution.log_line_count - len(execution.log)
+    if first >= tail_first:
+        return list(itertools.islice(execution.log, first - tail_first, None))
+    if len(execution.jobs) == 1 and first >= execution.note_line_count:
+        job = execution.jobs[0]
         try:
-            execution_status = executor.execution_status(project.id)
-            logs = executor.read_lines(project.id)
-            if logs:
-                execution.log += "".join(logs)
-            if execution_status == task_loop.Status.FINISHED:
-                return_code = executor.execution_return_code(project.id)
-                executor.remove(project.id)
-                _cleanup_script_temp_dir(project.id)
-                has_results = (
-                    False if return_code != 0 else execution.has_results(project)
-                )
-                execution.status = (
-                    Status.FINISHED
-                    if return_code == 0 and has_results
-                    else Status.ERROR
-                )
-                if execution.status == Status.FINISHED:
-                    execution.complete_finishing(project)
-            elif execution_status == task_loop.Status.ABORTED:
-                executor.remove(project.id)
-                _cleanup_script_temp_dir(project.id)
-                execution.status = Status.ABORTED
+            earlier = executor.read_log(
+                job.executor_id,
+                first - execution.note_line_count,
+                tail_first - execution.note_line_count,
+            )
         except ExecutionNotFound:
-            _cleanup_script_temp_dir(project.id)
-            execution.status = Status.ABORTED
-    return {"status": execution.status.value, "log": execution.log.split("\n")}
+            earlier = []
+        if len(earlier) == tail_first - first:
+            return [line.rstrip("\n") for line in earlier] + list(execution.log)
+    return [f"... {tail_first - first} earlier lines omitted ..."] + list(execution.log)
+
+
+def _server_sent_event(event, data, event_id=None):
+    """Formats a Server-Sent Events message.
+
+    Args:
+        event (str): event type
+        data (dict): event data
+        event_id (int, optional): event id
+
+    Returns:
+        str: event stream chunk
+    """
+    chunk = "" if event_id is None else f"id: {event_id}\n"
+    return chunk + f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _update_job(project, execution, job):
+    """Updates job's status and log from executor.
+
+    Args:
+        project (Project): execution's project
+        execution (Execution): execution the job belongs to
+        job (Job): job to update
+
+    Returns:
+        int: job's position in executor queue or None if job is not queued
+    """
+    try:
+        job_briefing = executor.briefing(job.executor_id)
+        _append_job_lines(execution, job, job_briefing)
+        execution_status = job_briefing.status
+        if execution_status == task_loop.Status.QUEUED:
+            job.status = Status.QUEUED
+            return job_briefing.queue_position
+        if execution_status == task_loop.Status.RUNNING:
+            job.status = Status.RUNNING
+        elif execution_status == task_loop.Status.FINISHED:
+            return_code = job_briefing.return_code
+            job.resource_usage = job_briefing.resource_usage
+            has_results = (
+                False if return_code != 0 else execution.has_results(project, job)
+            )
+            job.status = (
+                Status.FINISHED if return_code == 0 and has_results else Status.ERROR
+            )
+            if job.status == Status.FINISHED:
+                execution.complete_finishing(project, job)
+        elif execution_status == task_loop.Status.ABORTED:
+            job.status = Status.ABORTED
+        elif execution_status == task_loop.Status.LIMIT_EXCEEDED:
+            job.resource_usage = job_briefing.resource_usage
+            job.exceeded_limit = job_briefing.exceeded_limit
+            job.status = Status.LIMIT_EXCEEDED
+    except ExecutionNotFound:
+        job.status = Status.ABORTED
+    return None
+
+
+def _append_job_lines(execution, job, job_briefing):
+    """Appends job's log lines that have not been seen before to execution's log.
+
+    Args:
+        execution (Execution): execution the job belongs to
+        job (Job): job
+        job_briefing (Briefing): job's briefing from executor
+    """
+    logs = job_briefing.lines
+    already_seen = job.line_count - (job_briefing.line_count - len(logs))
+    if already_seen > 0:
+        logs = logs[already_seen:]
+    job.line_count = max(job.line_count, job_briefing.line_count)
+    if len(execution.jobs) > 1:
+        logs = [f"[{job.label}] {line}" for line in logs]
+    execution.log.extend(line.rstrip("\n") for line in logs)
+    execution.log_line_count += len(logs)
+
+
+def _log_lines(execution):
+    """Returns execution's latest log lines.
+
+    Args:
+        execution (Execution): execution
+
+    Returns:
+        list of str: log lines
+    """
+    omitted_count = execution.log_line_count - len(execution.log)
+    if omitted_count == 0:
+        return list(execution.log)
+    return [f"... {omitted_count} earlier lines omitted ..."] + list(execution.log)
+
+
+def execution_log(request, request_body):
+    """Reads a range of lines from execution's full log.
+
+    Args:
+        request (HTTPRequest): client's request
+        request_body (dict): request body
+
+    Returns:
+        HTTPResponse: log lines
+    """
+    try:
+        project = resolve_project(request, request_body)
+        first = get_and_validate(request_body, "first", int, required=False)
+        last = get_and_validate(request_body, "last", int, required=False)
+        label = get_and_validate(request_body, "scenario", str, required=False)
+    except FlexToolException as error:
+        return HttpResponseBadRequest(str(error))
+    execution = _find_execution(project.id)
+    if execution is None:
+        return HttpResponseBadRequest("Project has no execution.")
+    if label is None and len(execution.jobs) == 1:
+        job = execution.jobs[0]
+    else:
+        job = next((job for job in execution.jobs if job.label == label), None)
+        if job is None:
+            return HttpResponseBadRequest("Execution has no such scenario.")
+    first = first if first is not None else 0
+    try:
+        lines = executor.read_log(job.executor_id, first, last)
+    except ExecutionNotFound:
+        return HttpResponseBadRequest("Execution log is not available.")
+    return JsonResponse({"first": first, "log": [line.rstrip("\n") for line in lines]})
+
+
+def _combined_status(jobs):
+    """Combines job statuses into a single execution status.
+
+    Args:
+        jobs (list of Job): execution's jobs
+
+    Returns:
+        Status: execution status
+    """
+    statuses = {job.status for job in jobs}
+    if Status.RUNNING in statuses:
+        return Status.RUNNING
+    if Status.QUEUED in statuses:
+        return Status.QUEUED
+    if Status.ERROR in statuses:
+        return Status.ERROR
+    if Status.LIMIT_EXCEEDED in statuses:
+        return Status.LIMIT_EXCEEDED
+    if Status.ABORTED in statuses:
+        return Status.ABORTED
+    return Status.FINISHED
 
 
 def start(execution, project, interpreter):
@@ -332,21 +1100,50 @@ def start(execution, project, interpreter):
     """
     execution.execution_time = timezone.now()
     execution.execution_time_offset = time.localtime().tm_gmtoff
-    execution.log = ""
-    execution.status = Status.RUNNING
-    executor.start(project.id, interpreter, execution.interpreter_arguments(project))
-
-
-def solve_model_interpreter_arguments(project_path, mod_script_path):
+    execution.log.clear()
+    execution.store_replaced_jobs(project)
+    notes = execution.notes(project)
+    execution.log.extend(notes)
+    execution.log_line_count = len(notes)
+    execution.note_line_count = len(notes)
+    execution.status = Status.QUEUED
+    execution.jobs = []
+    for job, arguments, environment in execution.job_arguments(project):
+        execution.jobs.append(job)
+        executor.start(job.executor_id, interpreter, arguments, environment=environment)
+    if not execution.jobs:
+        execution.status = Status.FINISHED
+    _store_execution(project.id, execution)
+
+
+def solve_model_interpreter_arguments(
+    project_path,
+    mod_script_path=SOLVE_MODEL_MOD_SCRIPT,
+    ingest_results=False,
+    parallel=False,
+):
     """Returns Python interpreter arguments for solving the model.
 
     Args:
         project_path (Path): path to project directory
         mod_script_path (Path): path to project modification script
+        ingest_results (bool): if True, results are written to results database
+            by results_ingest instead of the importer
+        parallel (bool): if True, other solves of the project may run at the same time
+            and results_ingest serialises their imports even if the importer is used
 
     Returns:
         list of str: command line arguments
     """
+    if ingest_results:
+        return ["-mflextool3.results_ingest", str(project_path), str(mod_script_path)]
+    if parallel:
+        return [
+            "-mflextool3.results_ingest",
+            str(project_path),
+            str(mod_script_path),
+            IMPORTER_OPTION,
+        ]
     return [
         "-mspinetoolbox",
         "--mod-script",
@@ -362,7 +1159,21 @@ def solve_model_interpreter_arguments(project_path, mod_script_path):
     ]
 
 
-def import_excel_interpreter_arguments(project_path, mod_script_path):
+def solve_model_environment(scenarios):
+    """Returns environment variables for solve model script.
+
+    Args:
+        scenarios (list of str): active scenario names
+
+    Returns:
+        dict: environment variables
+    """
+    return {SCENARIOS_VARIABLE: json.dumps(scenarios)}
+
+
+def import_excel_interpreter_arguments(
+    project_path, mod_script_path=EXCEL_IMPORT_MOD_SCRIPT
+):
     """Returns Python interpreter arguments for importing Excel file.
 
     Args:
@@ -389,86 +1200,113 @@ def clear_execution(project_id):
     Args:
         project_id (int): project id
     """
-    execution = _executions.pop(project_id, None)
+    execution = _find_execution(project_id)
+    _executions.pop(project_id, None)
+    ProjectExecution.objects.filter(  # pylint: disable=no-member
+        project_id=project_id
+    ).delete()
     if execution is None:
         return
-    if execution.status == Status.RUNNING:
-        executor.abort(project_id)
+    _discard_jobs(execution)
 
 
-def import_excel_input(request, request_body):
-    """Starts executing a model solve.
+def _find_execution(project_id):
+    """Returns project's current execution.
+
+    Executions that are not in memory are restored from database.
 
     Args:
-        request (HTTPRequest): client's request
-        request_body (dict): request body
+        project_id (int): project id
 
     Returns:
-        HTTPResponse: response to client
+        Execution: execution or None if project has no execution
     """
+    execution = _executions.get(project_id)
+    if execution is not None:
+        return execution
     try:
-        project = resolve_project(request, request_body)
-    except FlexToolException as error:
-        return HttpResponseBadRequest(str(error))
-    file_path = project.excel_input_file_path()
-    if not file_path:
-        return HttpResponseBadRequest("Excel file has not been uploaded.")
-    return _try_starting_execution(project, ImportExcel, file_path=file_path)
+        # pylint: disable=no-member
+        record = ProjectExecution.objects.get(project_id=project_id)
+    except ProjectExecution.DoesNotExist:  # pylint: disable=no-member
+        return None
+    execution_class = {
+        SolveModel.execution_type: SolveModel,
+        ImportExcel.execution_type: ImportExcel,
+    }[ExecutionType(record.execution_type)]
+    execution = execution_class.from_options(record.options)
+    execution.status = Status(record.status)
+    execution.execution_time = record.execution_time
+    execution.execution_time_offset = record.execution_time_offset
+    execution.jobs = [
+        Job(
+            json_to_execution_id(job["executor_id"]),
+            job["label"],
+            Status(job["status"]),
+            resource_usage=job.get("resource_usage"),
+            exceeded_limit=job.get("exceeded_limit"),
+        )
+        for job in record.jobs
+    ]
+    return _executions.setdefault(project_id, execution)
 
 
-def _cleanup_script_temp_dir(project_id):
-    """Frees project modification script's temporary directory.
+def _store_execution(project_id, execution):
+    """Stores project's current execution to database.
 
     Args:
         project_id (int): project id
+        execution (Execution): execution to store
     """
-    temp_dir = _temporary_mod_script_dirs.pop(project_id, None)
-    if temp_dir is None:
-        return
-    temp_dir.cleanup()
+    ProjectExecution.objects.update_or_create(  # pylint: disable=no-member
+        project_id=project_id,
+        defaults={
+            "execution_type": execution.execution_type.value,
+            "status": execution.status.value,
+            "execution_time": execution.execution_time,
+            "execution_time_offset": execution.execution_time_offset,
+            "options": execution.options(),
+            "jobs": [
+                {
+                    "executor_id": job.executor_id,
+                    "label": job.label,
+                    "status": job.status.value,
+                    "resource_usage": job.resource_usage,
+                    "exceeded_limit": job.exceeded_limit,
+                }
+                for job in execution.jobs
+            ],
+        },
+    )
 
 
-def _make_solve_model_mod_script(scenarios):
-    """Writes project modification script for solve model to a temporary file.
+def _discard_jobs(execution):
+    """Terminates execution's processes and deletes their logs from executor.
 
     Args:
-        scenarios (list of str): active scenario names
-
-    Returns:
-        tuple: temporary directory containing the script file and path to the file
+        execution (Execution): execution
     """
-    quoted_scenarios = (f"'{s}'" for s in scenarios)
-    template_path = Path(__file__).parent / "project_modification_script_template.py"
-    with open(template_path) as template_file:
-        template = template_file.read()
-    script_contents = template.format(scenarios=", ".join(quoted_scenarios))
-    temp_dir = TemporaryDirectory()  # pylint: disable=consider-using-with
-    script_path = Path(temp_dir.name) / _MOD_SCRIPT_NAME
-    with open(script_path, "w", encoding="utf-8") as script_file:
-        script_file.write(script_contents)
-    return temp_dir, script_path
+    for job in execution.jobs:
+        executor.remove(job.executor_id)
 
 
-def _make_excel_import_mod_script(file_path):
-    """Writes project modification script for Excel import to a temporary file.
+def import_excel_input(request, request_body):
+    """Starts executing a model solve.
 
     Args:
-        file_path (Path): path to importee
+        request (HTTPRequest): client's request
+        request_body (dict): request body
 
     Returns:
-        tuple: temporary directory containing the script file and path to the file
+        HTTPResponse: response to client
     """
-    template_path = (
-        Path(__file__).parent / "excel_import_project_modification_script_template.py"
-    )
-    with open(template_path) as template_file:
-        template = template_file.read()
-    script_contents = template.format(file_name=file_path.name)
-    temp_dir = TemporaryDirectory()  # pylint: disable=consider-using-with
-    script_path = Path(temp_dir.name) / _MOD_SCRIPT_NAME
-    with open(script_path, "w", encoding="utf-8") as script_file:
-        script_file.write(script_contents)
-    return temp_dir, script_path
+    try:
+        project = resolve_project(request, request_body)
+    except FlexToolException as error:
+        return HttpResponseBadRequest(str(error))
+    file_path = project.excel_input_file_path()
+    if not file_path:
+        return HttpResponseBadRequest("Excel file has not been uploaded.")
+    return _try_starting_execution(project, ImportExcel, file_path=file_path)
 
 
 def _has_file_changed(database_path, time_point):
@@ -486,16 +1324,60 @@ def _has_file_changed(database_path, time_point):
     return time_point < modification_time
 
 
-def _save_scenarios(project, scenarios, log, execution_time, execution_time_offset):
+def _stored_log(job):
+    """Reads the latest lines of job's log for storing in server database.
+
+    Args:
+        job (Job): finished job
+
+    Returns:
+        str: log
+    """
+    line_limit = getattr(
+        settings, "FLEXTOOL_STORED_LOG_LINES", DEFAULT_STORED_LOG_LINES
+    )
+    first = max(job.line_count - line_limit, 0)
+    lines = executor.read_log(job.executor_id, first)
+    if first == 0:
+        return "".join(lines)
+    return f"... {first} earlier lines omitted ...\n" + "".join(lines)
+
+
+# pylint: disable=too-many-arguments
+def _save_scenarios(
+    project,
+    scenarios,
+    log,
+    execution_time,
+    execution_time_offset,
+    resource_usage,
+    fingerprints=None,
+    reused_from=None,
+):
     """Stores executed scenarios to server database.
 
+    Summary paths and results alternatives of the executions are indexed, too.
+
     Args:
         project (Project): project
         scenarios (list of str): scenario names
         log (str): execution log
         execution_time (datetime) execution time in UTC
         execution_time_offset (int): local timezone offset in seconds
+        resource_usage (dict, optional): resources used by execution process
+        fingerprints (dict, optional): mapping from scenario name
+            to its input fingerprint
+        reused_from (ScenarioExecution, optional): execution whose results
+            the scenarios reuse
     """
+    if fingerprints is None:
+        fingerprints = {}
+    usage_fields = {}
+    if resource_usage is not None:
+        usage_fields = {
+            name: resource_usage.get(name) for name in RESOURCE_USAGE_FIELDS
+        }
+    scenario_executions = []
     for scenario_name in scenarios:
         try:
             # pylint: disable=no-member
@@ -508,5 +1390,43 @@ def _save_scenarios(project, scenarios, log, execution_time, execution_time_offs
             execution_time=execution_time,
             execution_time_offset=execution_time_offset,
             log=log,
+            input_fingerprint=fingerprints.get(scenario_name),
+            reused_from=reused_from,
+            **usage_fields,
         )
         scenario_execution.save()
+        scenario_execution.summary_path()
+        scenario_executions.append(scenario_execution)
+    try:
+        resolve_results_alternative_ids(project, scenario_executions)
+    except FlexToolException:
+        pass
+
+
+def _find_cached_scenario_execution(project, scenario, fingerprint):
+    """Finds an earlier execution of scenario with identical input.
+
+    Only executions whose results still exist qualify.
+
+    Args:
+        project (Project): project
+        scenario (str): scenario name
+        fingerprint (str): scenario's input fingerprint
+
+    Returns:
+        ScenarioExecution: execution that produced the results or None if not found
+    """
+    # pylint: disable=no-member
+    candidates = ScenarioExecution.objects.filter(
+        scenario__project=project,
+        scenario__name=scenario,
+        input_fingerprint=fingerprint,
+    ).order_by("-execution_time")
+    for candidate in candidates:
+        origin = candidate.results_origin()
+        if (
+            origin.summary_path() is not None
+            and origin.results_alternative_id() is not None
+        ):
+            return origin
+    return None
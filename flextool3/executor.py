@@ -1,26 +1,95 @@
-"""Contains functions to control task loop."""
-import atexit
-import functools
-from multiprocessing import Pipe, Process, Queue
+"""Contains functions to control task loop.
+
+Requests to the task loop are tagged with unique request ids.
+A listener thread receives the loop's responses and hands each of them
+to the thread that waits for the corresponding request,
+so the functions in this module can be called from many threads at once.
 
-from .exception import ExecutionNotFound
-from .task_loop import Error, Field, loop, Task
+If persistence is enabled, the task loop stores its executions in the database.
+A task loop that has died is replaced by a new one on next request,
+and the new loop picks up the executions of its predecessor.
 
+Async views send their requests through async_request()
+which awaits the response without blocking a thread.
 
-def _create_process():
-    """Instantiates a message loop process.
+The task loop runs either in a child process of the web server
+or, if an execution broker is configured, on worker nodes behind the broker.
+"""
+import asyncio
+import atexit
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+import functools
+import itertools
+import os
+import threading
+
+from django.conf import settings
+
+from .broker import parse_address
+from .exception import ExecutionNotFound, FlexToolException
+from .execution_backend import BrokerBackend, LocalBackend
+from .execution_registry import ExecutionRegistry
+from .task_loop import (
+    DEFAULT_LOG_MEMORY_LINES,
+    Error,
+    Field,
+    Limits,
+    Task,
+    unpack_response,
+)
+
+_LIVENESS_CHECK_INTERVAL = 5.0
+"""Time in seconds between task loop liveness checks while waiting for a response."""
+_DEFAULT_PRELOAD_MODULES = (
+    "spinetoolbox.main",
+    "spinetoolbox.headless",
+    "spine_engine",
+    "spine_items",
+    "spinedb_api",
+)
+"""Modules that warm workers import before they receive a job."""
+
+
+def _create_backend():
+    """Instantiates the execution backend configured in settings.
 
     Returns:
-        Process: message loop process
+        LocalBackend or BrokerBackend: execution backend
     """
-    return Process(
-        target=loop, args=(_task_queue, _sending_connection), name="Execution task loop"
+    broker_address = getattr(settings, "FLEXTOOL_EXECUTION_BROKER", None)
+    if broker_address is not None:
+        authkey = getattr(settings, "FLEXTOOL_EXECUTION_BROKER_AUTHKEY", "")
+        return BrokerBackend(parse_address(broker_address), authkey.encode("utf-8"))
+    max_processes = getattr(settings, "FLEXTOOL_MAX_CONCURRENT_EXECUTIONS", None)
+    if max_processes is None:
+        max_processes = os.cpu_count()
+    log_directory = getattr(settings, "FLEXTOOL_EXECUTION_LOG_DIRECTORY", None)
+    log_memory_lines = getattr(
+        settings, "FLEXTOOL_EXECUTION_LOG_MEMORY_LINES", DEFAULT_LOG_MEMORY_LINES
+    )
+    persist = getattr(settings, "FLEXTOOL_PERSIST_EXECUTIONS", True)
+    warm_workers = getattr(settings, "FLEXTOOL_WARM_WORKERS", 0)
+    preload_modules = getattr(
+        settings, "FLEXTOOL_WORKER_PRELOAD_MODULES", _DEFAULT_PRELOAD_MODULES
+    )
+    return LocalBackend(
+        {
+            "max_processes": max_processes,
+            "log_directory": log_directory,
+            "log_memory_lines": log_memory_lines,
+            "registry_factory": ExecutionRegistry if persist else None,
+            "warm_workers": warm_workers,
+            "preload_modules": preload_modules,
+        }
     )
 
 
-_task_queue = Queue()
-_receiving_connection, _sending_connection = Pipe(duplex=False)
-_message_loop_process = _create_process()
+_backend = _create_backend()
+_start_lock = threading.Lock()
+_listener = None
+_request_ids = itertools.count()
+_pending_requests = {}
+_pending_requests_lock = threading.Lock()
 
 
 def _message_sender(func):
@@ -35,42 +104,168 @@ def _message_sender(func):
 
     @functools.wraps(func)
     def ensure_loop_is_alive(*args, **kwargs):
-        if not _message_loop_process.is_alive():
-            _message_loop_process.start()
+        _ensure_loop_is_alive()
         return func(*args, **kwargs)
 
     return ensure_loop_is_alive
 
 
-def _receive_response():
-    """Waits for response from task loop.
+def _ensure_loop_is_alive():
+    """Starts task loop and response listener if they are not running."""
+    global _listener
+    with _start_lock:
+        _backend.ensure_running()
+        if _listener is None or not _listener.is_alive():
+            _listener = threading.Thread(
+                target=_listen_responses, name="Task loop listener", daemon=True
+            )
+            _listener.start()
+
+
+def _listen_responses():
+    """Receives responses from task loop and resolves the pending requests."""
+    while True:
+        try:
+            request_id, response = _backend.receive()
+        except (EOFError, OSError):
+            break
+        with _pending_requests_lock:
+            future = _pending_requests.pop(request_id, None)
+        if future is not None:
+            future.set_result(response)
+    with _pending_requests_lock:
+        futures = list(_pending_requests.values())
+        _pending_requests.clear()
+    for future in futures:
+        future.set_exception(FlexToolException("task loop is not running"))
+
+
+def _submit_request(message):
+    """Sends a request to task loop.
+
+    Args:
+        message (dict): task message
+
+    Returns:
+        Future: future that resolves to task loop's response
+    """
+    request_id = next(_request_ids)
+    future = Future()
+    with _pending_requests_lock:
+        _pending_requests[request_id] = future
+    message[Field.REQUEST_ID] = request_id
+    try:
+        _backend.send(message)
+    except FlexToolException:
+        _forget_request(message)
+        raise
+    return future
+
+
+def _unwrap_response(response):
+    """Converts task loop's error responses to exceptions
+    and reads the log lines the response refers to.
+
+    Args:
+        response (Any): task loop's response
 
     Returns:
         Any: task loop's response
     """
-    response = _receiving_connection.recv()
     if response == Error.UNKNOWN_EXECUTION_ID:
         raise ExecutionNotFound()
-    return response
+    return unpack_response(response)
+
+
+def _request(message):
+    """Sends a request to task loop and waits for the response.
+
+    Args:
+        message (dict): task message
+
+    Returns:
+        Any: task loop's response
+    """
+    future = _submit_request(message)
+    while True:
+        try:
+            return _unwrap_response(future.result(_LIVENESS_CHECK_INTERVAL))
+        except FutureTimeoutError:
+            if _backend.is_alive():
+                continue
+            _forget_request(message)
+            raise FlexToolException("task loop is not running") from None
 
 
+async def async_request(message):
+    """Sends a request to task loop and awaits the response.
+
+    Args:
+        message (dict): task message
+
+    Returns:
+        Any: task loop's response
+    """
+    _ensure_loop_is_alive()
+    future = asyncio.wrap_future(_submit_request(message))
+    while True:
+        try:
+            response = await asyncio.wait_for(
+                asyncio.shield(future), _LIVENESS_CHECK_INTERVAL
+            )
+        except asyncio.TimeoutError:
+            if _backend.is_alive():
+                continue
+            _forget_request(message)
+            raise FlexToolException("task loop is not running") from None
+        return _unwrap_response(response)
+
+
+def _forget_request(message):
+    """Stops waiting for response to a request.
+
+    Args:
+        message (dict): request's task message
+    """
+    with _pending_requests_lock:
+        _pending_requests.pop(message[Field.REQUEST_ID], None)
+
+
+def default_limits():
+    """Returns the resource limits configured in settings.
+
+    Returns:
+        Limits: resource limits
+    """
+    return Limits(**getattr(settings, "FLEXTOOL_EXECUTION_LIMITS", {}))
+
+
+# pylint: disable=too-many-arguments
 @_message_sender
-def start(execution_id, command, arguments):
-    """Starts a new process.
+def start(execution_id, command, arguments, priority=0, limits=None, environment=None):
+    """Queues a new process for starting.
+
+    The process starts as soon as the number of running processes allows.
 
     Args:
         execution_id (int): unique execution id
         command (str): command to execute
         arguments (list of str): command's arguments
+        priority (int): queued executions with lower priority value start first
+        limits (Limits, optional): resource limits; if None, limits from settings
+            are used
+        environment (dict, optional): additional environment variables
     """
-    _task_queue.put(
+    _backend.send(
         {
             Field.TASK: Task.START_PROCESS,
             Field.EXECUTION_ID: execution_id,
             Field.PROCESS_COMMAND: command,
             Field.PROCESS_ARGUMENTS: arguments,
-        },
-        block=False,
+            Field.PROCESS_ENVIRONMENT: environment if environment is not None else {},
+            Field.PRIORITY: priority,
+            Field.LIMITS: limits if limits is not None else default_limits(),
+        }
     )
 
 
@@ -81,12 +276,11 @@ def abort(execution_id):
     Args:
         execution_id (int): execution id
     """
-    _task_queue.put(
+    _backend.send(
         {
             Field.TASK: Task.ABORT_PROCESS,
             Field.EXECUTION_ID: execution_id,
-        },
-        block=False,
+        }
     )
 
 
@@ -97,8 +291,27 @@ def remove(execution_id):
     Args:
         execution_id (int): execution id
     """
-    _task_queue.put(
-        {Field.TASK: Task.REMOVE_PROCESS, Field.EXECUTION_ID: execution_id}, block=False
+    _backend.send({Field.TASK: Task.REMOVE_PROCESS, Field.EXECUTION_ID: execution_id})
+
+
+@_message_sender
+def briefing(execution_id, first=None):
+    """Queries process' status, new output lines, return code and queue position.
+
+    Args:
+        execution_id (int): execution id
+        first (int, optional): index of first log line to include;
+            if None, includes lines that have not been read before
+
+    Returns:
+        Briefing: execution briefing
+    """
+    return _request(
+        {
+            Field.TASK: Task.SEND_BRIEFING,
+            Field.EXECUTION_ID: execution_id,
+            Field.FIRST_LINE: first,
+        }
     )
 
 
@@ -112,13 +325,60 @@ def read_lines(execution_id):
     Returns:
         list of str: list of lines
     """
-    _task_queue.put(
+    return _request(
         {
             Field.TASK: Task.SEND_OUTPUT,
             Field.EXECUTION_ID: execution_id,
         }
     )
-    return _receive_response()
+
+
+@_message_sender
+def read_log(execution_id, first=0, last=None):
+    """Reads a range of lines from process' log.
+
+    Args:
+        execution_id (int): execution id
+        first (int): index of first line to read
+        last (int, optional): index of one past last line; if None, reads to the end
+
+    Returns:
+        list of str: log lines
+    """
+    return _request(
+        {
+            Field.TASK: Task.SEND_LOG_LINES,
+            Field.EXECUTION_ID: execution_id,
+            Field.FIRST_LINE: first,
+            Field.LAST_LINE: last,
+        }
+    )
+
+
+@_message_sender
+def wait_for_change(execution_ids, timeout, line_counts=None):
+    """Waits until any of given processes has new output or its status changes.
+
+    Output counts as new until it has been read by briefing() or read_lines()
+    unless the number of lines already seen is given in line_counts.
+
+    Args:
+        execution_ids (list): execution ids
+        timeout (float): maximum time to wait in seconds
+        line_counts (dict, optional): mapping from execution id
+            to number of log lines the caller has seen
+
+    Returns:
+        bool: True if a change happened, False if wait timed out
+    """
+    return _request(
+        {
+            Field.TASK: Task.WAIT_FOR_CHANGE,
+            Field.EXECUTION_IDS: list(execution_ids),
+            Field.TIMEOUT: timeout,
+            Field.LINE_COUNTS: line_counts if line_counts is not None else {},
+        }
+    )
 
 
 @_message_sender
@@ -131,13 +391,12 @@ def execution_status(execution_id):
     Returns:
         Status: process status
     """
-    _task_queue.put(
+    return _request(
         {
             Field.TASK: Task.SEND_STATUS,
             Field.EXECUTION_ID: execution_id,
         }
     )
-    return _receive_response()
 
 
 @_message_sender
@@ -150,13 +409,30 @@ def execution_return_code(execution_id):
     Returns:
         int: return code or None if process is still running
     """
-    _task_queue.put(
+    return _request(
         {
             Field.TASK: Task.SEND_RETURN_CODE,
             Field.EXECUTION_ID: execution_id,
         }
     )
-    return _receive_response()
+
+
+@_message_sender
+def queue_position(execution_id):
+    """Queries process' position in the queue of executions waiting to start.
+
+    Args:
+        execution_id (int): execution id
+
+    Returns:
+        int: 1-based queue position or None if process is not queued
+    """
+    return _request(
+        {
+            Field.TASK: Task.SEND_QUEUE_POSITION,
+            Field.EXECUTION_ID: execution_id,
+        }
+    )
 
 
 @_message_sender
@@ -166,15 +442,7 @@ def execution_count():
     Returns:
         int: number of executions
     """
-    _task_queue.put({Field.TASK: Task.SEND_PROCESS_COUNT})
-    return _receive_response()
-
-
-def _quit_execution_process():
-    """Quits the execution process."""
-    if _message_loop_process.is_alive():
-        _task_queue.put({Field.TASK: Task.QUIT})
-        _message_loop_process.join()
+    return _request({Field.TASK: Task.SEND_PROCESS_COUNT})
 
 
-atexit.register(_quit_execution_process)
+atexit.register(_backend.close)
@@ -0,0 +1,101 @@
+"""Fingerprints of solve inputs for reusing results of identical solves."""
+import hashlib
+import json
+from pathlib import Path
+from spinedb_api import export_data
+from spinedb_api.filters.scenario_filter import scenario_filter_config
+from .utils import Database, database_map
+
+SOLVER_FILE_PATTERNS = ("flextool/**/*.mod", "flextool/**/*.py", "version/*.json")
+"""Glob patterns of project files that determine the solver version."""
+
+
+def solver_version(project_path):
+    """Hashes the model and solver files of a project.
+
+    Args:
+        project_path (Path or str): path to project directory
+
+    Returns:
+        str: hex digest of solver files
+    """
+    project_path = Path(project_path)
+    digest = hashlib.sha256()
+    paths = set()
+    for pattern in SOLVER_FILE_PATTERNS:
+        paths.update(path for path in project_path.glob(pattern) if path.is_file())
+    for path in sorted(paths):
+        digest.update(path.relative_to(project_path).as_posix().encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(path.read_bytes())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def scenario_input_fingerprint(project, scenario, solver_digest):
+    """Hashes the input data a scenario solve would see.
+
+    The data is exported from the model database through a scenario filter
+    so any change in the scenario's alternatives or their data
+    changes the fingerprint while changes in other scenarios do not.
+
+    Args:
+        project (Project): project
+        scenario (str): scenario name
+        solver_digest (str): solver version from solver_version()
+
+    Returns:
+        str: hex digest of scenario's input
+    """
+    with database_map(
+        project, Database.MODEL, [scenario_filter_config(scenario)]
+    ) as db_map:
+        data = export_data(db_map, parse_value=_raw_value)
+    digest = hashlib.sha256(solver_digest.encode("utf-8"))
+    for item_type in sorted(data):
+        digest.update(item_type.encode("utf-8"))
+        for item in sorted(_canonical(item) for item in data[item_type]):
+            digest.update(b"\0")
+            digest.update(item.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _raw_value(value, value_type):
+    """Keeps parameter values in their database form.
+
+    Args:
+        value (bytes): value blob
+        value_type (str, optional): value type
+
+    Returns:
+        list: hex coded blob and type
+    """
+    return [value.hex() if isinstance(value, bytes) else value, value_type]
+
+
+def _canonical(item):
+    """Serializes an exported item.
+
+    Args:
+        item (tuple): exported item
+
+    Returns:
+        str: item as JSON
+    """
+    return json.dumps(item, default=_json_default)
+
+
+def _json_default(value):
+    """Converts values json cannot serialize.
+
+    Args:
+        value (Any): value
+
+    Returns:
+        Any: serializable value
+    """
+    if isinstance(value, bytes):
+        return value.hex()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    return str(value)
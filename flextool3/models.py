@@ -9,7 +9,7 @@ import re
 from shutil import copytree, rmtree, ignore_patterns
 import stat
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, transaction
 from django.urls import reverse
 from .exception import FlexToolException
 from .utils import naive_local_time, database_map, Database
@@ -22,6 +22,14 @@ PLOT_MULTIPLE_SPECIFICATION_DIRECTORY_NAME = "multiple_datasets"
 PLOT_SINGLE_SPECIFICATION_DIRECTORY_NAME = "single_dataset"
 DEFAULT_PLOT_SPECIFICATION_FILE_NAME = "default_result_plots.json"
 CUSTOM_PLOT_SPECIFICATION_DIRECTORY_NAME = "custom"
+RESOURCE_USAGE_FIELDS = (
+    "wall_time",
+    "user_cpu_time",
+    "system_cpu_time",
+    "peak_memory",
+    "read_bytes",
+    "write_bytes",
+)
 
 
 class PlotCategories:
@@ -234,6 +242,9 @@ class Scenario(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
     name = models.CharField(max_length=255, null=False)
 
+    class Meta:
+        indexes = [models.Index(fields=["project", "name"])]
+
 
 def _scenario_from_filter_id(filter_id):
     """Parses scenario name from filter id.
@@ -256,10 +267,124 @@ class ScenarioExecution(models.Model):
     execution_time = models.DateTimeField(null=False)
     execution_time_offset = models.IntegerField(null=False)
     log = models.TextField(null=False)
+    wall_time = models.FloatField(null=True)
+    user_cpu_time = models.FloatField(null=True)
+    system_cpu_time = models.FloatField(null=True)
+    peak_memory = models.BigIntegerField(null=True)
+    read_bytes = models.BigIntegerField(null=True)
+    write_bytes = models.BigIntegerField(null=True)
+    input_fingerprint = models.CharField(max_length=64, null=True, db_index=True)
+    reused_from = models.ForeignKey(
+        "self", on_delete=models.PROTECT, null=True, related_name="reuses"
+    )
+    summary_file = models.CharField(max_length=500, null=True)
+    alternative_id = models.IntegerField(null=True)
+
+    _results_transferred = False
+
+    class Meta:
+        indexes = [models.Index(fields=["scenario", "execution_time", "id"])]
+
+    def resource_usage(self):
+        """Returns resources used by the execution process.
+
+        If several scenarios were solved by the same process,
+        they all share the figures of that process.
+
+        Returns:
+            dict: wall and CPU times in seconds, peak memory and I/O in bytes
+                or None if resource usage was not recorded
+        """
+        if self.wall_time is None:
+            return None
+        return {name: getattr(self, name) for name in RESOURCE_USAGE_FIELDS}
+
+    def delete(self, *args, **kwargs):
+        """Deletes the execution handing its results over to a reusing execution.
+
+        Args:
+            *args: positional arguments forwarded to Model.delete()
+            **kwargs: keyword arguments forwarded to Model.delete()
+
+        Returns:
+            tuple: number of deleted objects and a dict of counts per model
+        """
+        with transaction.atomic():
+            self._transfer_results()
+            return super().delete(*args, **kwargs)
+
+    def _transfer_results(self):
+        """Hands this execution's results over to the earliest reusing execution.
+
+        Other reusing executions are pointed to the new owner.
+        """
+        # pylint: disable=no-member
+        heir = self.reuses.order_by("execution_time", "id").first()
+        if heir is None:
+            return
+        try:
+            self.results_alternative_id()
+        except FlexToolException:
+            pass
+        self.summary_path()
+        self.reuses.exclude(id=heir.id).update(reused_from=heir)
+        heir.reused_from = None
+        heir.summary_file = self.summary_file
+        heir.alternative_id = self.alternative_id
+        heir.save(update_fields=["reused_from", "summary_file", "alternative_id"])
+        self._results_transferred = True
+
+    def owns_results(self):
+        """Checks if the execution's result files and records belong to it.
+
+        Returns:
+            bool: True if execution owns its results, False otherwise
+        """
+        return self.reused_from is None and not self._results_transferred
+
+    def results_origin(self):
+        """Returns the execution that produced this execution's results.
+
+        Returns:
+            ScenarioExecution: execution whose results were reused or self
+        """
+        return self.reused_from if self.reused_from is not None else self
 
     def summary_path(self):
         """Returns path to the execution's summary file.
 
+        The path is taken from summary_file if the file still exists.
+        Otherwise, Tool's output directories are searched
+        and the result is stored in summary_file for later calls.
+
+        Returns:
+            Path: path to summary file or None if no summary exists
+        """
+        if self.reused_from is not None:
+            return self.reused_from.summary_path()
+        project_path = Path(self.scenario.project.path)  # pylint: disable=no-member
+        if self.summary_file is not None:
+            summary_path = project_path / self.summary_file
+            if summary_path.is_file():
+                return summary_path
+        summary_path = self._find_summary_path()
+        summary_file = (
+            summary_path.relative_to(project_path).as_posix()
+            if summary_path is not None
+            else None
+        )
+        if summary_file != self.summary_file:
+            self.summary_file = summary_file
+            if self.pk is not None:
+                # pylint: disable=no-member
+                ScenarioExecution.objects.filter(pk=self.pk).update(
+                    summary_file=summary_file
+                )
+        return summary_path
+
+    def _find_summary_path(self):
+        """Searches Tool's output directories for the execution's summary file.
+
         Returns:
             Path: path to summary file or None if no summary exists
         """
@@ -312,28 +437,130 @@ class ScenarioExecution(models.Model):
         Returns:
             int: alternative id or None if not found
         """
-        target_scenario_name = self.scenario.name
-        candidate_alternatives = []
-        result_alternative_name_test = re.compile(
-            r"^.+__.+@[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}:[0-9]{2}$"
-        )
-        with database_map(self.scenario.project, Database.RESULT) as db_map:
-            for alternative in db_map.query(db_map.alternative_sq):
-                if result_alternative_name_test.match(alternative.name) is None:
-                    continue
-                scenario_name = alternative.name.partition("__")[0]
-                if scenario_name == target_scenario_name:
-                    time_string = alternative.name.partition("@")[-1]
-                    candidate_alternatives.append(
-                        (alternative.id, datetime.datetime.fromisoformat(time_string))
-                    )
-        if not candidate_alternatives:
-            return None
-        candidate_alternatives.sort(key=lambda s: s[1])
-        local_time_point = naive_local_time(
-            self.execution_time, self.execution_time_offset
+        return resolve_results_alternative_ids(self.scenario.project, [self])[0]
+
+
+def resolve_results_alternative_ids(project, scenario_executions):
+    """Finds ids of results alternatives corresponding to scenario executions.
+
+    Ids are stored in the executions once found,
+    so results database is opened only for executions that have no id yet.
+
+    Args:
+        project (Project): project the executions belong to
+        scenario_executions (Iterable of ScenarioExecution): scenario executions
+
+    Returns:
+        list of int: alternative ids or None where not found in execution order
+    """
+    origins = [execution.results_origin() for execution in scenario_executions]
+    unresolved = [origin for origin in origins if origin.alternative_id is None]
+    if unresolved:
+        with database_map(project, Database.RESULT) as db_map:
+            alternatives = _results_alternatives(db_map)
+        resolved = {}
+        for origin in unresolved:
+            origin.alternative_id = _find_next_alternative(
+                alternatives.get(origin.scenario.name, []),
+                origin.execution_time,
+                origin.execution_time_offset,
+            )
+            if origin.alternative_id is not None and origin.pk is not None:
+                resolved[origin.pk] = origin
+        # pylint: disable=no-member
+        ScenarioExecution.objects.bulk_update(resolved.values(), ["alternative_id"])
+    return [origin.alternative_id for origin in origins]
+
+
+def find_results_alternative_ids(project, scenarios, time_point, timezone_offset):
+    """Finds results alternatives written for scenarios after given point in time.
+
+    Args:
+        project (Project): a project
+        scenarios (Iterable of str): scenario names
+        time_point (datetime.datetime): execution time in UTC
+        timezone_offset (int): time offset from UTC to local time in seconds
+
+    Returns:
+        dict: mapping from scenario name to alternative id or None if not found
+    """
+    if not project.results_database_path().exists():
+        return {scenario: None for scenario in scenarios}
+    with database_map(project, Database.RESULT) as db_map:
+        alternatives = _results_alternatives(db_map)
+    return {
+        scenario: _find_next_alternative(
+            alternatives.get(scenario, []), time_point, timezone_offset
         )
-        i = bisect_left([s[1] for s in candidate_alternatives], local_time_point)
-        return (
-            candidate_alternatives[i][0] if i != len(candidate_alternatives) else None
+        for scenario in scenarios
+    }
+
+
+def _results_alternatives(db_map):
+    """Collects results alternatives from results database.
+
+    Args:
+        db_map (DatabaseMapping): results database
+
+    Returns:
+        dict: mapping from scenario name to sorted time stamp - alternative id pairs
+    """
+    result_alternative_name_test = re.compile(
+        r"^.+__.+@[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}:[0-9]{2}$"
+    )
+    alternatives = {}
+    for alternative in db_map.query(db_map.alternative_sq):
+        if result_alternative_name_test.match(alternative.name) is None:
+            continue
+        scenario_name = alternative.name.partition("__")[0]
+        time_string = alternative.name.partition("@")[-1]
+        alternatives.setdefault(scenario_name, []).append(
+            (datetime.datetime.fromisoformat(time_string), alternative.id)
         )
+    for scenario_alternatives in alternatives.values():
+        scenario_alternatives.sort(key=lambda pair: pair[0])
+    return alternatives
+
+
+def _find_next_alternative(alternatives, time_point, timezone_offset):
+    """Returns id of the results alternative created right after given point in time.
+
+    Args:
+        alternatives (list of tuple): sorted list of time stamp - alternative id pairs
+        time_point (datetime.datetime): execution time in UTC
+        timezone_offset (int): time offset from UTC to local time in seconds
+
+    Returns:
+        int: alternative id or None if not found
+    """
+    local_time_point = naive_local_time(time_point, timezone_offset)
+    i = bisect_left([pair[0] for pair in alternatives], local_time_point)
+    return alternatives[i][1] if i != len(alternatives) else None
+
+
+class ExecutionProcess(models.Model):
+    """Model for execution processes managed by the task loop."""
+
+    executor_id = models.CharField(max_length=255, unique=True)
+    command = models.CharField(max_length=500)
+    arguments = models.JSONField(default=list)
+    environment = models.JSONField(default=dict)
+    priority = models.IntegerField(default=0)
+    limits = models.JSONField(default=dict)
+    status = models.CharField(max_length=16)
+    pid = models.IntegerField(null=True)
+    start_time = models.DateTimeField(null=True)
+    log_path = models.CharField(max_length=500, null=True)
+    return_code = models.IntegerField(null=True)
+
+
+class ProjectExecution(models.Model):
+    """Model for project's current execution."""
+
+    project = models.OneToOneField(Project, on_delete=models.CASCADE)
+    execution_type = models.CharField(max_length=32)
+    status = models.CharField(max_length=2)
+    execution_time = models.DateTimeField(null=True)
+    execution_time_offset = models.IntegerField(null=True)
+    options = models.JSONField(default=dict)
+    jobs = models.JSONField(default=list)
@@ -0,0 +1,592 @@
+"""Runs an execution process and stores its output and outcome in files.
+
+Execution processes are started through this script
+so they can outlive the task loop that started them.
+The runner echoes the log to its standard output
+so the loop that started it can follow the pipe.
+It holds an exclusive lock on the log file until the outcome has been written,
+so a loop that adopts the runner after a restart can wait for the lock
+and read the return code from a file although the process is not its child.
+The runner also enforces resource limits on the process
+and records the resources the process and its children used.
+
+In worker mode, the runner imports given modules and waits for a job
+in standard input. The job's Python module is run in a child process
+forked from the worker so it does not pay interpreter startup and import cost.
+
+Usage: python process_runner.py <log file> <limits as JSON> <command> [arguments]
+       python process_runner.py --worker [modules to import]
+"""
+
+import importlib
+import json
+import os
+from pathlib import Path
+import runpy
+import signal
+from subprocess import PIPE, Popen, STDOUT
+import sys
+import threading
+import time
+import traceback
+
+try:
+    import fcntl
+except ImportError:  # fcntl is not available on Windows
+    fcntl = None
+try:
+    import resource
+except ImportError:  # resource is not available on Windows
+    resource = None
+
+KILL_GRACE_PERIOD = 10.0
+"""Seconds a process has to exit after termination request before it is killed."""
+LIMIT_DESCRIPTIONS = {
+    "timeout": "wall-clock time",
+    "cpu_time": "CPU time",
+    "memory": "memory",
+}
+"""Descriptions of limits that the runner can detect."""
+WORKER_OPTION = "--worker"
+"""Command line option that starts the runner in worker mode."""
+
+
+def return_code_path(log_path):
+    """Returns path to return code file.
+
+    Args:
+        log_path (Path): path to log file
+
+    Returns:
+        Path: path to return code file
+    """
+    return log_path.with_suffix(".returncode")
+
+
+def usage_path(log_path):
+    """Returns path to resource usage file.
+
+    Args:
+        log_path (Path): path to log file
+
+    Returns:
+        Path: path to resource usage file
+    """
+    return log_path.with_suffix(".usage")
+
+
+def limit_path(log_path):
+    """Returns path to file that names the limit that stopped the process.
+
+    Args:
+        log_path (Path): path to log file
+
+    Returns:
+        Path: path to exceeded limit file
+    """
+    return log_path.with_suffix(".limit")
+
+
+def run(log_path, limits, command, spawn=None, echo=None):
+    """Runs command and writes its output to log file and its outcome to files.
+
+    Lines that start with an escape character are not logged.
+    Log file is kept open and locked until the outcome has been written.
+
+    Args:
+        log_path (Path): path to log file
+        limits (dict): resource limits; missing or None values mean no limit
+        command (list of str): command and its arguments
+        spawn (Callable, optional): function that starts the process
+            given the command and a function that applies limits in the child;
+            if None, command is started by Popen
+        echo (int, optional): file descriptor where everything written
+            to log file is copied to until writing to it fails
+
+    Returns:
+        int: command's return code
+    """
+    if spawn is None:
+        spawn = _popen
+    start_time = time.monotonic()
+    stop_reasons = []
+    timers = []
+    process = None
+    io_counters = None
+
+    def stop(reason):
+        stop_reasons.append(reason)
+        if process is not None:
+            timers.append(_terminate_process(process))
+
+    signal.signal(signal.SIGTERM, lambda *_: stop(None))
+    exceeded_limit = None
+    with open(log_path, "ab", buffering=0) as log_stream:
+        if fcntl is not None:
+            fcntl.flock(log_stream.fileno(), fcntl.LOCK_EX)
+        log_file = _EchoedLog(log_stream, echo)
+        cgroup = _create_cgroup(limits, log_file)
+        try:
+            process = spawn(
+                command, _limit_setter(limits, cgroup) if os.name == "posix" else None
+            )
+        except OSError as error:
+            log_file.write(f"Failed to start process: {error}\n".encode("utf-8"))
+            return_code = 1
+        else:
+            if stop_reasons:
+                timers.append(_terminate_process(process))
+            timers += _start_timers(limits, stop)
+            for line in process.stdout:
+                if not line.startswith(b"\x1b"):
+                    log_file.write(line)
+            io_counters = _child_io_counters(process.pid)
+            return_code = process.wait()
+            for timer in timers:
+                timer.cancel()
+        usage = resource_usage(time.monotonic() - start_time, io_counters)
+        if return_code != 0:
+            exceeded_limit = _exceeded_limit(
+                limits, stop_reasons, return_code, usage, cgroup
+            )
+        if exceeded_limit is not None:
+            description = LIMIT_DESCRIPTIONS[exceeded_limit]
+            message = f"Process stopped: {description} limit exceeded.\n"
+            log_file.write(message.encode("utf-8"))
+        _write_atomically(usage_path(log_path), json.dumps(usage))
+        if exceeded_limit is not None:
+            _write_atomically(limit_path(log_path), exceeded_limit)
+        _write_atomically(return_code_path(log_path), str(return_code))
+    if cgroup is not None:
+        _remove_cgroup(cgroup)
+    return return_code
+
+
+def serve(modules):
+    """Imports modules and runs a single job read from standard input.
+
+    The job is a JSON object with log file path, resource limits,
+    Python interpreter arguments that start with -m
+    and additional environment variables.
+
+    Args:
+        modules (list of str): names of modules to import
+
+    Returns:
+        int: job's return code or 0 if standard input closed without a job
+    """
+    echo = _detach_stdout()
+    sys.path[0] = os.getcwd()
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except Exception:  # pylint: disable=broad-except
+            pass
+    line = sys.stdin.readline()
+    if not line:
+        return 0
+    job = json.loads(line)
+    os.environ.update(job["environment"])
+    return run(Path(job["log"]), job["limits"], job["arguments"], _ForkedProcess, echo)
+
+
+def _detach_stdout():
+    """Redirects standard output to null device.
+
+    Stray prints of the runner or imported modules
+    would otherwise get mixed with the echoed log.
+
+    Returns:
+        int: file descriptor of the original standard output
+    """
+    sys.stdout.flush()
+    echo = os.dup(1)
+    null_descriptor = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(null_descriptor, 1)
+    os.close(null_descriptor)
+    return echo
+
+
+class _EchoedLog:
+    """Log file that copies everything written to it to another file descriptor."""
+
+    def __init__(self, log_file, echo):
+        """
+        Args:
+            log_file (BinaryIO): unbuffered log file
+            echo (int, optional): file descriptor to copy writes to
+        """
+        self._file = log_file
+        self._echo = echo
+
+    def write(self, data):
+        """Writes data to log file and echoes it.
+
+        Echoing stops for good if writing fails,
+        e.g. because the task loop reading the pipe has quit.
+
+        Args:
+            data (bytes): data to write
+        """
+        self._file.write(data)
+        if self._echo is None:
+            return
+        try:
+            written = 0
+            while written < len(data):
+                written += os.write(self._echo, data[written:])
+        except OSError:
+            os.close(self._echo)
+            self._echo = None
+
+
+def _popen(command, set_limits):
+    """Starts a process in a new session.
+
+    Args:
+        command (list of str): command and its arguments
+        set_limits (Callable, optional): function that applies limits in the child
+
+    Returns:
+        Popen: started process
+    """
+    return Popen(
+        command,
+        stdout=PIPE,
+        stderr=STDOUT,
+        start_new_session=True,
+        preexec_fn=set_limits,
+    )
+
+
+class _ForkedProcess:
+    """Child process forked from worker that runs a module like python -m does.
+
+    Mimics the parts of Popen interface that the runner uses.
+    """
+
+    def __init__(self, arguments, set_limits):
+        """
+        Args:
+            arguments (list of str): Python interpreter arguments
+            set_limits (Callable): function that applies limits in the child
+        """
+        read_descriptor, write_descriptor = os.pipe()
+        self.pid = os.fork()
+        if self.pid == 0:
+            os.close(read_descriptor)
+            os.setsid()
+            os.dup2(write_descriptor, 1)
+            os.dup2(write_descriptor, 2)
+            os.close(write_descriptor)
+            # Like Popen's close_fds, so the child does not hold the log lock.
+            os.closerange(3, os.sysconf("SC_OPEN_MAX"))
+            _run_module(arguments, set_limits)
+        os.close(write_descriptor)
+        self.stdout = os.fdopen(read_descriptor, "rb")
+        self.returncode = None
+
+    def wait(self):
+        """Waits for process to exit.
+
+        Returns:
+            int: return code
+        """
+        if self.returncode is None:
+            _, status = os.waitpid(self.pid, 0)
+            self.returncode = os.waitstatus_to_exitcode(status)
+        return self.returncode
+
+    def terminate(self):
+        """Terminates the process."""
+        os.kill(self.pid, signal.SIGTERM)
+
+
+def _run_module(arguments, set_limits):
+    """Runs a module in forked child process and exits.
+
+    Args:
+        arguments (list of str): Python interpreter arguments
+        set_limits (Callable): function that applies limits
+    """
+    exit_code = 0
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    try:
+        set_limits()
+        if arguments[0] == "-m":
+            module, module_arguments = arguments[1], arguments[2:]
+        else:
+            module, module_arguments = arguments[0][2:], arguments[1:]
+        sys.argv = [module] + module_arguments
+        runpy.run_module(module, run_name="__main__", alter_sys=True)
+    except SystemExit as exit_request:
+        exit_code = _exit_code(exit_request.code)
+    except BaseException:  # pylint: disable=broad-except
+        traceback.print_exc()
+        exit_code = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    os._exit(exit_code)  # pylint: disable=protected-access
+
+
+def _exit_code(code):
+    """Converts SystemExit's code to process exit code like the interpreter does.
+
+    Args:
+        code (Any): SystemExit code
+
+    Returns:
+        int: exit code
+    """
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def _limit_setter(limits, cgroup):
+    """Creates a function that applies limits to the child process before it starts.
+
+    Args:
+        limits (dict): resource limits
+        cgroup (Path, optional): cgroup for the process
+
+    Returns:
+        Callable: function to call in the child process
+    """
+
+    def set_limits():
+        if cgroup is not None:
+            with open(cgroup / "cgroup.procs", "w", encoding="utf-8") as procs_file:
+                procs_file.write("0")
+        if limits.get("nice") is not None:
+            os.nice(limits["nice"])
+        if resource is None:
+            return
+        cpu_time = limits.get("cpu_time")
+        if cpu_time is not None:
+            resource.setrlimit(
+                resource.RLIMIT_CPU, (cpu_time, cpu_time + int(KILL_GRACE_PERIOD))
+            )
+        address_space = limits.get("address_space")
+        if address_space is not None:
+            resource.setrlimit(resource.RLIMIT_AS, (address_space, address_space))
+
+    return set_limits
+
+
+def _start_timers(limits, stop):
+    """Starts timers that enforce wall-clock time limit.
+
+    Args:
+        limits (dict): resource limits
+        stop (Callable): function that requests the process to stop
+
+    Returns:
+        list of threading.Timer: started timers
+    """
+    timeout = limits.get("timeout")
+    if timeout is None:
+        return []
+    timer = threading.Timer(timeout, stop, args=("timeout",))
+    timer.daemon = True
+    timer.start()
+    return [timer]
+
+
+def _terminate_process(process):
+    """Requests process and its descendants to terminate.
+
+    The processes are killed if they are still alive after a grace period.
+
+    Args:
+        process (Popen): execution process
+
+    Returns:
+        threading.Timer: started timer that kills the processes
+    """
+    _signal_process(process, signal.SIGTERM)
+    kill_signal = getattr(signal, "SIGKILL", signal.SIGTERM)
+    timer = threading.Timer(
+        KILL_GRACE_PERIOD, _signal_process, args=(process, kill_signal)
+    )
+    timer.daemon = True
+    timer.start()
+    return timer
+
+
+def _signal_process(process, signal_number):
+    """Sends a signal to process and its descendants.
+
+    Args:
+        process (Popen): process that leads a process group
+        signal_number (int): signal to send
+    """
+    if os.name != "posix":
+        process.terminate()
+        return
+    try:
+        os.killpg(process.pid, signal_number)
+    except ProcessLookupError:
+        pass
+
+
+def _create_cgroup(limits, log_file):
+    """Creates a cgroup v2 group for the execution process.
+
+    Args:
+        limits (dict): resource limits
+        log_file (BinaryIO): log file for error messages
+
+    Returns:
+        Path: path to cgroup or None if cgroup placement is disabled or unavailable
+    """
+    parent = limits.get("cgroup")
+    if parent is None:
+        return None
+    cgroup = Path(parent, f"execution_{os.getpid()}")
+    try:
+        cgroup.mkdir()
+        if limits.get("memory") is not None:
+            (cgroup / "memory.max").write_text(str(limits["memory"]), encoding="utf-8")
+    except OSError as error:
+        log_file.write(f"Cannot use cgroup in {parent}: {error}\n".encode("utf-8"))
+        _remove_cgroup(cgroup)
+        return None
+    return cgroup
+
+
+def _remove_cgroup(cgroup):
+    """Removes a cgroup if possible.
+
+    Args:
+        cgroup (Path): path to cgroup
+    """
+    try:
+        cgroup.rmdir()
+    except OSError:
+        pass
+
+
+def _exceeded_limit(limits, stop_reasons, return_code, usage, cgroup):
+    """Finds out which limit, if any, stopped the process.
+
+    Args:
+        limits (dict): resource limits
+        stop_reasons (list): reasons the runner has requested the process to stop
+        return_code (int): process' return code
+        usage (dict): resources used by the process
+        cgroup (Path, optional): process' cgroup
+
+    Returns:
+        str: name of exceeded limit or None
+    """
+    if "timeout" in stop_reasons:
+        return "timeout"
+    cpu_time = limits.get("cpu_time")
+    if cpu_time is not None:
+        if hasattr(signal, "SIGXCPU") and return_code == -signal.SIGXCPU:
+            return "cpu_time"
+        if usage["user_cpu_time"] is not None:
+            if usage["user_cpu_time"] + usage["system_cpu_time"] >= cpu_time:
+                return "cpu_time"
+    if cgroup is not None:
+        try:
+            with open(cgroup / "memory.events", encoding="utf-8") as events_file:
+                events = dict(line.split() for line in events_file)
+        except OSError:
+            return None
+        if int(events.get("oom_kill", 0)) > 0:
+            return "memory"
+    return None
+
+
+def resource_usage(wall_time, io_counters=None):
+    """Collects resources used by the runner's terminated child processes.
+
+    Figures that are not available on current platform are None.
+
+    Args:
+        wall_time (float): elapsed time in seconds
+        io_counters (dict, optional): child's storage I/O counters
+            from _child_io_counters(); if None, block counts of rusage are used
+
+    Returns:
+        dict: wall time, user and system CPU time in seconds,
+            peak resident set size and bytes read and written to storage
+    """
+    usage = {
+        "wall_time": wall_time,
+        "user_cpu_time": None,
+        "system_cpu_time": None,
+        "peak_memory": None,
+        "read_bytes": None,
+        "write_bytes": None,
+    }
+    if resource is not None:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        usage["user_cpu_time"] = children.ru_utime
+        usage["system_cpu_time"] = children.ru_stime
+        rss_unit = 1 if sys.platform == "darwin" else 1024
+        usage["peak_memory"] = children.ru_maxrss * rss_unit
+        usage["read_bytes"] = children.ru_inblock * 512
+        usage["write_bytes"] = children.ru_oublock * 512
+    if io_counters is not None:
+        usage.update(io_counters)
+    return usage
+
+
+def _child_io_counters(pid):
+    """Reads storage I/O counters of an exited child before it is reaped.
+
+    The child is waited for without reaping it,
+    so /proc/<pid>/io holds the child's counters,
+    those of its own reaped children included,
+    but not the log writes of the runner.
+
+    Args:
+        pid (int): child's process id
+
+    Returns:
+        dict: bytes read and written to storage or None if not available
+    """
+    if not hasattr(os, "waitid"):
+        return None
+    try:
+        os.waitid(os.P_PID, pid, os.WEXITED | os.WNOWAIT)
+        with open(f"/proc/{pid}/io", encoding="utf-8") as io_file:
+            counters = dict(line.split(": ") for line in io_file.read().splitlines())
+    except OSError:
+        return None
+    return {
+        "read_bytes": int(counters["read_bytes"]),
+        "write_bytes": int(counters["write_bytes"]),
+    }
+
+
+def _write_atomically(path, contents):
+    """Writes text to a file atomically.
+
+    Args:
+        path (Path): path to file
+        contents (str): file contents
+    """
+    temporary_path = path.with_name(path.name + ".tmp")
+    temporary_path.write_text(contents, encoding="utf-8")
+    os.replace(temporary_path, path)
+
+
+if __name__ == "__main__":
+    if sys.argv[1] == WORKER_OPTION:
+        _return_code = serve(sys.argv[2:])
+    else:
+        _return_code = run(
+            Path(sys.argv[1]),
+            json.loads(sys.argv[2]),
+            sys.argv[3:],
+            echo=_detach_stdout(),
+        )
+    sys.exit(0 if _return_code == 0 else 1)
@@ -0,0 +1,101 @@
+"""Cache of analysis query responses.
+
+The results database changes only when executions finish or are destroyed,
+so responses to analysis queries are cached per project
+and reused until the database's modification time or size changes.
+Least recently used responses are evicted
+when the cache grows beyond its byte budget.
+"""
+from collections import OrderedDict
+import functools
+import json
+import threading
+from django.conf import settings
+from django.http import HttpResponse
+
+DEFAULT_BUDGET = 64 * 1024 * 1024
+"""Cache size in bytes unless settings say otherwise."""
+
+_cache = OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+
+
+def cached_query(function):
+    """Decorates an analysis view function to cache its responses.
+
+    Responses are keyed by project, function and request body.
+    Only successful non-streaming responses are cached.
+
+    Args:
+        function (Callable): view function that takes project and optionally body
+
+    Returns:
+        Callable: caching view function
+    """
+
+    @functools.wraps(function)
+    def cached_function(project, *args):
+        version = _database_version(project)
+        if version is None:
+            return function(project, *args)
+        key = (project.id, function.__name__, json.dumps(args, sort_keys=True))
+        with _cache_lock:
+            entry = _cache.get(key)
+            if entry is not None and entry[0] == version:
+                _cache.move_to_end(key)
+                return HttpResponse(entry[2], content_type=entry[1])
+        response = function(project, *args)
+        if response.status_code == 200 and not response.streaming:
+            _store(key, version, response["Content-Type"], response.content)
+        return response
+
+    return cached_function
+
+
+def clear_cache():
+    """Empties the cache."""
+    global _cache_bytes
+    with _cache_lock:
+        _cache.clear()
+        _cache_bytes = 0
+
+
+def _database_version(project):
+    """Reads the version of project's results database.
+
+    Args:
+        project (Project): project
+
+    Returns:
+        tuple: modification time and size or None if database does not exist
+    """
+    try:
+        status = project.results_database_path().stat()
+    except OSError:
+        return None
+    return status.st_mtime_ns, status.st_size
+
+
+def _store(key, version, content_type, content):
+    """Stores response content evicting old entries as needed.
+
+    Args:
+        key (tuple): cache key
+        version (tuple): database version the content was made from
+        content_type (str): response's content type
+        content (bytes): response's content
+    """
+    global _cache_bytes
+    budget = getattr(settings, "FLEXTOOL_RESULTS_CACHE_BYTES", DEFAULT_BUDGET)
+    if len(content) > budget:
+        return
+    with _cache_lock:
+        previous = _cache.pop(key, None)
+        if previous is not None:
+            _cache_bytes -= len(previous[2])
+        _cache[key] = (version, content_type, content)
+        _cache_bytes += len(content)
+        while _cache_bytes > budget:
+            _, evicted = _cache.popitem(last=False)
+            _cache_bytes -= len(evicted[2])
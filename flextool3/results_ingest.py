@@ -0,0 +1,727 @@
+"""Solves the model and writes FlexTool's output files into the results database.
+
+The solve runs Spine Toolbox up to the FlexTool3 tool only.
+The output tables of each solved scenario are then written straight
+into the results database in one transaction per scenario
+instead of running them through the generic Import_results importer.
+The tables of all scenarios are checked before the first one is written.
+If the output files are not in the known FlexTool layout,
+Toolbox runs the importer as before.
+
+Known layout: each output table holds a single parameter.
+The entity class, its dimensions and the parameter of a table
+are taken from the Import_results importer specification
+where the table's mapping is found by the file name without extension.
+Tables that are missing from the specification or whose mapping
+is not a constant class and parameter are not in the known layout.
+A table has one header row per dimension of the entity class.
+The last header row starts with index names (solve, period, time)
+and the rows above it leave those columns empty.
+Remaining header cells name the entity of each value column;
+relationship entities are read from the header rows top to bottom.
+Data rows contain index values followed by one number or empty cell
+for each value column.
+
+Only the output of scenarios listed in FLEXTOOL_SCENARIOS environment variable
+is ingested so parallel solves of the same project
+never pick up each other's output.
+Parallel solves share the project and its results database,
+so the import step holds a lock file in the project directory
+and imports of the same project run one at a time.
+With --importer the results always go through the importer under that lock.
+
+Usage: python -m flextool3.results_ingest <project directory> <mod script> [--importer]
+"""
+from contextlib import contextmanager
+import csv
+from dataclasses import dataclass, field
+from datetime import datetime
+import itertools
+import json
+import os
+from pathlib import Path
+import re
+import sys
+
+from spinedb_api import (
+    DatabaseMapping,
+    import_alternatives,
+    import_object_classes,
+    import_object_parameters,
+    import_objects,
+    import_relationship_classes,
+    import_relationship_parameters,
+    import_relationships,
+    SpineDBAPIError,
+)
+from spinedb_api.import_mapping.import_mapping import (
+    ObjectClassMapping,
+    ParameterDefinitionMapping,
+    RelationshipClassMapping,
+    RelationshipClassObjectClassMapping,
+)
+from spinedb_api.import_mapping.import_mapping_compat import parse_named_mapping_spec
+from spinedb_api.mapping import Position
+from spinedb_api.parameter_value import Map, to_database
+
+from .exception import FlexToolException, UnknownOutputLayout
+from .value_index_catalogue import catalogue_entry, write_catalogue
+
+try:
+    import fcntl
+except ImportError:  # fcntl is not available on Windows
+    fcntl = None
+    import msvcrt
+
+SOLVE_ITEMS = ("Input_data", "Export_to_CSV", "FlexTool3")
+"""Project items that are executed to solve the model."""
+IMPORT_ITEMS = ("Input_data", "Import_results", "Results")
+"""Project items that import the latest output files with the generic importer."""
+IMPORTER_NAME = "Import_results"
+"""Name of the importer item; it is part of the results alternative names."""
+RESULTS_DATABASE_FILE_NAME = "Results.sqlite"
+INDEX_NAMES = ("solve", "period", "time")
+"""Names of index columns in output tables."""
+SKIPPED_FILE_NAMES = {"summary_solve.csv"}
+"""Output files that are not results tables."""
+SCENARIOS_VARIABLE = "FLEXTOOL_SCENARIOS"
+"""Environment variable that lists the solved scenarios as JSON."""
+IMPORT_LOCK_FILE_NAME = ".results_import.lock"
+"""Name of the lock file that serialises result imports of a project."""
+IMPORTER_OPTION = "--importer"
+"""Command line option that imports results with the importer only."""
+
+_BATCH_SIZE = 1000
+"""Number of parameter values inserted per executemany batch."""
+_RUN_DIRECTORY_NAME = re.compile(
+    r"^[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}\.[0-9]{2}\.[0-9]{2}$"
+)
+
+
+@dataclass(frozen=True)
+class TableDefinition:
+    """Entity class and parameter of an output table in the importer specification."""
+
+    entity_class: str
+    object_classes: tuple
+    parameter: str
+
+
+@dataclass
+class _Table:
+    """Output table in the known layout."""
+
+    entity_class: str
+    object_classes: tuple
+    parameter: str
+    index_names: list
+    entities: list
+    values: list = field(default_factory=list)
+    """Index and value pairs for each entity."""
+
+
+def output_directories(project_directory, since, scenarios=None):
+    """Finds the tool output directories of runs that started after given time.
+
+    Args:
+        project_directory (Path): path to project directory
+        since (datetime): naive local time
+        scenarios (Iterable of str, optional): names of scenarios to include;
+            if None, all scenarios are included
+
+    Yields:
+        tuple: scenario name and path to output directory
+    """
+    tool_output_directory = (
+        project_directory / ".spinetoolbox" / "items" / "flextool3" / "output"
+    )
+    if not tool_output_directory.exists():
+        return
+    earliest_run = since.strftime("%Y-%m-%dT%H.%M.%S")
+    if scenarios is not None:
+        scenarios = set(scenarios)
+    for filter_directory in tool_output_directory.iterdir():
+        filter_id_path = filter_directory / ".filter_id"
+        if not filter_id_path.is_file():
+            continue
+        with open(filter_id_path, encoding="utf-8") as filter_id_file:
+            filter_id = filter_id_file.readline().strip()
+        if not filter_id:
+            continue
+        scenario = _scenario_from_filter_id(filter_id)
+        if scenarios is not None and scenario not in scenarios:
+            continue
+        runs = [
+            run_directory.name
+            for run_directory in filter_directory.iterdir()
+            if _RUN_DIRECTORY_NAME.match(run_directory.name) is not None
+            and run_directory.name >= earliest_run
+        ]
+        if runs:
+            output_directory = filter_directory / max(runs) / "output"
+            yield scenario, output_directory
+
+
+def _scenario_from_filter_id(filter_id):
+    """Parses scenario name from filter id.
+
+    Args:
+        filter_id (str): filter id
+
+    Returns:
+        str: scenario name
+    """
+    front = filter_id[: -len(" - Input_data")]
+    filter_1_name, filter_2_name = (name.strip() for name in front.split(","))
+    return filter_1_name if filter_1_name != "FlexTool3" else filter_2_name
+
+
+def read_table_definitions(project_directory):
+    """Reads output table definitions from the importer specification.
+
+    Args:
+        project_directory (Path): path to project directory
+
+    Returns:
+        dict: mapping from table name to TableDefinition;
+            tables with ambiguous definitions map to None
+
+    Raises:
+        UnknownOutputLayout: raised if the specification cannot be read
+    """
+    specification = _importer_specification(project_directory)
+    try:
+        mapping = specification["mapping"]
+        table_mappings = mapping["table_mappings"]
+        selected_tables = mapping.get("selected_tables")
+        definitions = {}
+        for table_name, named_mapping_specs in table_mappings.items():
+            if selected_tables is not None and table_name not in selected_tables:
+                continue
+            table_definitions = set()
+            for named_mapping_spec in named_mapping_specs:
+                _, root_mapping = parse_named_mapping_spec(named_mapping_spec)
+                table_definitions.add(_table_definition(root_mapping))
+            if None in table_definitions:
+                continue
+            definitions[table_name] = (
+                table_definitions.pop() if len(table_definitions) == 1 else None
+            )
+    except (KeyError, TypeError, ValueError, AttributeError) as error:
+        raise UnknownOutputLayout(f"invalid importer specification: {error}")
+    return definitions
+
+
+def _importer_specification(project_directory):
+    """Loads the specification of the results importer from project.
+
+    Args:
+        project_directory (Path): path to project directory
+
+    Returns:
+        dict: importer specification
+
+    Raises:
+        UnknownOutputLayout: raised if the specification is not found
+    """
+    project_file_path = project_directory / ".spinetoolbox" / "project.json"
+    try:
+        with open(project_file_path, encoding="utf-8") as project_file:
+            project_dict = json.load(project_file)
+        specification_name = project_dict["items"][IMPORTER_NAME]["specification"]
+        for path_dict in project_dict["project"]["specifications"]["Importer"]:
+            path = Path(path_dict["path"])
+            if path_dict.get("relative", False):
+                path = project_directory / path
+            with open(path, encoding="utf-8") as specification_file:
+                specification = json.load(specification_file)
+            if specification.get("name") == specification_name:
+                return specification
+    except (OSError, KeyError, TypeError, ValueError) as error:
+        raise UnknownOutputLayout(f"cannot read importer specification: {error}")
+    raise UnknownOutputLayout(f"importer specification {specification_name} missing")
+
+
+def _table_definition(root_mapping):
+    """Picks entity class and parameter from an import mapping.
+
+    Args:
+        root_mapping (ImportMapping): root of flattened import mapping
+
+    Returns:
+        TableDefinition: table definition or None if mapping has no constant
+            entity class and parameter
+    """
+    entity_class = None
+    object_classes = []
+    parameter = None
+    for mapping in root_mapping.flatten():
+        constant = mapping.value if mapping.position == Position.hidden else None
+        if isinstance(mapping, ObjectClassMapping):
+            entity_class = constant
+            object_classes.append(constant)
+        elif isinstance(mapping, RelationshipClassMapping):
+            entity_class = constant
+        elif isinstance(mapping, RelationshipClassObjectClassMapping):
+            object_classes.append(constant)
+        elif isinstance(mapping, ParameterDefinitionMapping):
+            parameter = constant
+    if entity_class is None or parameter is None:
+        return None
+    if not object_classes or None in object_classes:
+        return None
+    return TableDefinition(entity_class, tuple(object_classes), parameter)
+
+
+def _table_paths(output_directory):
+    """Lists the results tables in output directory.
+
+    Args:
+        output_directory (Path): path to output directory
+
+    Returns:
+        list of Path: paths to table files
+    """
+    return sorted(
+        path
+        for path in output_directory.glob("*.csv")
+        if path.name not in SKIPPED_FILE_NAMES
+    )
+
+
+def check_layout(output_directory, definitions):
+    """Checks that all output tables, data rows included, are in the known layout.
+
+    Tables are read but not kept,
+    so every scenario can be checked before any of them is written.
+
+    Args:
+        output_directory (Path): path to output directory
+        definitions (dict): mapping from table name to TableDefinition
+
+    Raises:
+        UnknownOutputLayout: raised if a table is in an unknown layout
+    """
+    for path in _table_paths(output_directory):
+        _read_table(path, definitions)
+
+
+def _read_header(path, reader, definitions):
+    """Reads and validates table's header rows.
+
+    Args:
+        path (Path): path to table file
+        reader (Iterator): CSV reader positioned at the beginning of the file
+        definitions (dict): mapping from table name to TableDefinition
+
+    Returns:
+        _Table: table without values
+
+    Raises:
+        UnknownOutputLayout: raised if the header is not in the known layout
+    """
+    if path.stem not in definitions:
+        raise UnknownOutputLayout(f"{path.name}: not in importer specification")
+    definition = definitions[path.stem]
+    if definition is None:
+        raise UnknownOutputLayout(
+            f"{path.name}: importer specification maps it to several parameters"
+        )
+    object_classes = definition.object_classes
+    header = list(itertools.islice(reader, len(object_classes)))
+    if len(header) != len(object_classes):
+        raise UnknownOutputLayout(
+            f"{path.name}: expected {len(object_classes)} header rows"
+            f" for {definition.entity_class} in importer specification"
+        )
+    index_names = list(itertools.takewhile(lambda x: x in INDEX_NAMES, header[-1]))
+    index_count = len(index_names)
+    for row in header:
+        if len(row) != len(header[-1]) or len(row) == index_count:
+            raise UnknownOutputLayout(f"{path.name}: unexpected header row width")
+    for row in header[:-1]:
+        if any(row[:index_count]):
+            raise UnknownOutputLayout(f"{path.name}: unexpected header cells")
+    entities = list(zip(*(row[index_count:] for row in header)))
+    if not all(all(entity) for entity in entities):
+        raise UnknownOutputLayout(f"{path.name}: missing entity names")
+    if len(set(entities)) != len(entities):
+        raise UnknownOutputLayout(f"{path.name}: duplicate entities")
+    return _Table(
+        definition.entity_class,
+        object_classes,
+        definition.parameter,
+        index_names,
+        entities,
+    )
+
+
+def _read_table(path, definitions):
+    """Reads an output table.
+
+    Args:
+        path (Path): path to table file
+        definitions (dict): mapping from table name to TableDefinition
+
+    Returns:
+        _Table: table
+
+    Raises:
+        UnknownOutputLayout: raised if the table is not in the known layout
+    """
+    with open(path, encoding="utf-8", newline="") as table_file:
+        reader = csv.reader(table_file)
+        table = _read_header(path, reader, definitions)
+        index_count = len(table.index_names)
+        width = index_count + len(table.entities)
+        table.values = [[] for _ in table.entities]
+        for row_number, row in enumerate(reader, start=len(table.object_classes)):
+            if not row:
+                continue
+            if len(row) != width:
+                raise UnknownOutputLayout(
+                    f"{path.name}: row {row_number} has wrong width"
+                )
+            indexes = tuple(row[:index_count])
+            for column_values, cell in zip(table.values, row[index_count:]):
+                if not cell:
+                    continue
+                try:
+                    column_values.append((indexes, float(cell)))
+                except ValueError as error:
+                    raise UnknownOutputLayout(
+                        f"{path.name}: row {row_number} has non-numeric values"
+                    ) from error
+    if index_count == 0 and any(len(values) > 1 for values in table.values):
+        raise UnknownOutputLayout(f"{path.name}: more than one row of scalars")
+    return table
+
+
+def _to_value(index_names, values):
+    """Converts index and value pairs into a parameter value.
+
+    Args:
+        index_names (list of str): index names
+        values (list of tuple): index tuples and numbers
+
+    Returns:
+        float or Map: parameter value
+    """
+    if not index_names:
+        return values[0][1]
+    if len(index_names) == 1:
+        return Map(
+            [indexes[0] for indexes, _ in values],
+            [value for _, value in values],
+            index_name=index_names[0],
+        )
+    groups = {}
+    for indexes, value in values:
+        groups.setdefault(indexes[0], []).append((indexes[1:], value))
+    return Map(
+        list(groups),
+        [_to_value(index_names[1:], group) for group in groups.values()],
+        index_name=index_names[0],
+    )
+
+
+def ingest_output(database_path, output_directory, alternative_name, definitions):
+    """Writes the output tables of a scenario into the results database.
+
+    Everything is written in a single transaction;
+    nothing is written if any table fails.
+    The value index catalogue of the alternative is written afterwards.
+
+    Args:
+        database_path (Path): path to results database
+        output_directory (Path): path to scenario's output directory
+        alternative_name (str): name of results alternative
+        definitions (dict): mapping from table name to TableDefinition
+
+    Raises:
+        UnknownOutputLayout: raised if a table is not in the known layout
+        FlexToolException: raised if writing to the database fails
+    """
+    try:
+        db_map = DatabaseMapping("sqlite:///" + str(database_path), create=True)
+    except SpineDBAPIError as error:
+        raise FlexToolException(f"could not open results database: {error}")
+    try:
+        _check_import(import_alternatives(db_map, (alternative_name,)))
+        alternative_id = (
+            db_map.query(db_map.alternative_sq)
+            .filter(db_map.alternative_sq.c.name == alternative_name)
+            .one()
+            .id
+        )
+        catalogue = []
+        for path in _table_paths(output_directory):
+            table = _read_table(path, definitions)
+            _write_table(db_map, table, alternative_id)
+            catalogue.append(
+                catalogue_entry(
+                    table.entity_class,
+                    table.parameter,
+                    table.index_names,
+                    (indexes for values in table.values for indexes, _ in values),
+                )
+            )
+        db_map.commit_session(f"Import results of {alternative_name}")
+    except SpineDBAPIError as error:
+        raise FlexToolException(f"failed to write results: {error}")
+    finally:
+        db_map.connection.close()
+    try:
+        write_catalogue(database_path, alternative_name, catalogue)
+    except OSError:
+        pass
+
+
+def _write_table(db_map, table, alternative_id):
+    """Adds table's entities, parameter and values to database.
+
+    Args:
+        db_map (DatabaseMapping): results database
+        table (_Table): output table
+        alternative_id (int): results alternative id
+    """
+    _check_import(import_object_classes(db_map, table.object_classes))
+    _check_import(
+        import_objects(
+            db_map,
+            {
+                (class_name, entity[dimension])
+                for entity in table.entities
+                for dimension, class_name in enumerate(table.object_classes)
+            },
+        )
+    )
+    if len(table.object_classes) == 1:
+        _check_import(
+            import_object_parameters(db_map, ((table.entity_class, table.parameter),))
+        )
+        subquery = db_map.object_sq
+        class_id = (
+            db_map.query(db_map.object_class_sq)
+            .filter(db_map.object_class_sq.c.name == table.entity_class)
+            .one()
+            .id
+        )
+        entity_ids = {
+            (row.name,): row.id
+            for row in db_map.query(subquery).filter(subquery.c.class_id == class_id)
+        }
+    else:
+        _check_import(
+            import_relationship_classes(
+                db_map, ((table.entity_class, table.object_classes),)
+            )
+        )
+        _check_import(
+            import_relationships(
+                db_map, ((table.entity_class, entity) for entity in table.entities)
+            )
+        )
+        _check_import(
+            import_relationship_parameters(
+                db_map, ((table.entity_class, table.parameter),)
+            )
+        )
+        subquery = db_map.wide_relationship_sq
+        class_id = (
+            db_map.query(db_map.wide_relationship_class_sq)
+            .filter(db_map.wide_relationship_class_sq.c.name == table.entity_class)
+            .one()
+            .id
+        )
+        entity_ids = {
+            tuple(row.object_name_list.split(",")): row.id
+            for row in db_map.query(subquery).filter(subquery.c.class_id == class_id)
+        }
+    definition_id = (
+        db_map.query(db_map.parameter_definition_sq)
+        .filter(db_map.parameter_definition_sq.c.entity_class_id == class_id)
+        .filter(db_map.parameter_definition_sq.c.name == table.parameter)
+        .one()
+        .id
+    )
+    items = (
+        _value_item(
+            class_id,
+            entity_ids[entity],
+            definition_id,
+            alternative_id,
+            _to_value(table.index_names, values),
+        )
+        for entity, values in zip(table.entities, table.values)
+        if values
+    )
+    while True:
+        batch = list(itertools.islice(items, _BATCH_SIZE))
+        if not batch:
+            break
+        db_map.add_items("parameter_value", *batch, check=False)
+
+
+def _value_item(class_id, entity_id, definition_id, alternative_id, value):
+    """Creates a parameter value item for insertion.
+
+    Args:
+        class_id (int): entity class id
+        entity_id (int): entity id
+        definition_id (int): parameter definition id
+        alternative_id (int): alternative id
+        value (float or Map): parameter value
+
+    Returns:
+        dict: parameter value item
+    """
+    db_value, value_type = to_database(value)
+    return {
+        "entity_class_id": class_id,
+        "entity_id": entity_id,
+        "parameter_definition_id": definition_id,
+        "alternative_id": alternative_id,
+        "value": db_value,
+        "type": value_type,
+    }
+
+
+def _check_import(result):
+    """Raises if import function reported errors.
+
+    Args:
+        result (tuple): import count and errors
+
+    Raises:
+        FlexToolException: raised if there were errors
+    """
+    _, errors = result
+    if errors:
+        raise FlexToolException(f"failed to write results: {errors[0]}")
+
+
+@contextmanager
+def import_lock(project_directory):
+    """Holds project's import lock, waiting until other imports have released it.
+
+    Args:
+        project_directory (Path): path to project directory
+
+    Yields:
+        None
+    """
+    with open(Path(project_directory, IMPORT_LOCK_FILE_NAME), "a+b") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            yield
+            return
+        lock_file.seek(0)
+        while True:
+            try:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                break
+            except OSError:  # LK_LOCK gives up after ten seconds
+                continue
+        try:
+            yield
+        finally:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _run_toolbox(project_directory, mod_script, items):
+    """Executes project items with Spine Toolbox in this process.
+
+    Args:
+        project_directory (Path): path to project directory
+        mod_script (str): path to project modification script
+        items (Iterable of str): names of items to execute
+
+    Returns:
+        int: Toolbox' return code
+    """
+    # Toolbox pulls in Qt so it is imported only when a solve actually runs.
+    from spinetoolbox.main import main as toolbox_main
+
+    sys.argv = [
+        "spinetoolbox",
+        "--mod-script",
+        str(mod_script),
+        "--execute-only",
+        str(project_directory),
+        "--select",
+        *items,
+    ]
+    return toolbox_main()
+
+
+def main(arguments):
+    """Solves the model and ingests the results.
+
+    Args:
+        arguments (list of str): command line arguments
+
+    Returns:
+        int: exit code
+    """
+    importer_only = arguments[2:] == [IMPORTER_OPTION]
+    if len(arguments) != 2 and not importer_only:
+        print(__doc__, file=sys.stderr)
+        return 2
+    project_directory = Path(arguments[0])
+    mod_script = arguments[1]
+    start_time = datetime.now().replace(microsecond=0)
+    return_code = _run_toolbox(project_directory, mod_script, SOLVE_ITEMS)
+    if return_code != 0:
+        return return_code
+    with import_lock(project_directory):
+        if importer_only:
+            return _run_toolbox(project_directory, mod_script, IMPORT_ITEMS)
+        return _ingest_results(project_directory, mod_script, start_time)
+
+
+def _ingest_results(project_directory, mod_script, start_time):
+    """Ingests the output of solved scenarios.
+
+    Args:
+        project_directory (Path): path to project directory
+        mod_script (str): path to project modification script
+        start_time (datetime): time when the solve started
+
+    Returns:
+        int: exit code
+    """
+    scenarios = os.environ.get(SCENARIOS_VARIABLE)
+    outputs = list(
+        output_directories(
+            project_directory,
+            start_time,
+            json.loads(scenarios) if scenarios is not None else None,
+        )
+    )
+    database_path = project_directory / RESULTS_DATABASE_FILE_NAME
+    try:
+        definitions = read_table_definitions(project_directory)
+        for _, output_directory in outputs:
+            check_layout(output_directory, definitions)
+        for scenario, output_directory in outputs:
+            print(f"Importing results of scenario {scenario}", flush=True)
+            time_stamp = datetime.now().isoformat(timespec="seconds")
+            ingest_output(
+                database_path,
+                output_directory,
+                f"{scenario}__{IMPORTER_NAME}@{time_stamp}",
+                definitions,
+            )
+    except UnknownOutputLayout as error:
+        print(f"Unknown output layout, {error}; running the importer.", flush=True)
+        return _run_toolbox(project_directory, mod_script, IMPORT_ITEMS)
+    except FlexToolException as error:
+        print(f"Results import failed: {error}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -6,16 +6,22 @@ from flextool3.models import ScenarioExecution
 from flextool3.utils import database_map, Database, FlexToolException
 
 from .side_quest import delete_directory
+from .value_index_catalogue import remove_catalogue
 
 @receiver(pre_delete, sender=ScenarioExecution)
 def delete_result_data(sender, **kwargs):
     """Deletes Tool output files and result records from the results database.
 
+    Executions that reused results of another execution own no data;
+    neither do executions that have handed their results over to such executions.
+
     Args:
         sender (type): ``ScenarioExecution`` model class
         **kwargs (): signal arguments
     """
     scenario_execution = kwargs["instance"]
+    if not scenario_execution.owns_results():
+        return
     summary_path = scenario_execution.summary_path()
     if summary_path is not None:
         tool_output_path = summary_path.parent.parent
@@ -29,8 +35,18 @@ def delete_result_data(sender, **kwargs):
         with database_map(
             scenario_execution.scenario.project, Database.RESULT
         ) as db_map:
+            alternative = (
+                db_map.query(db_map.alternative_sq)
+                .filter(db_map.alternative_sq.c.id == alternative_id)
+                .one_or_none()
+            )
             db_map.cascade_remove_items(alternative={alternative_id})
             db_map.commit_session(
                 f"Deleted results for scenario '{scenario_execution.scenario.name}'"
                 + f" run on {scenario_execution.execution_time}."
             )
+        if alternative is not None:
+            remove_catalogue(
+                scenario_execution.scenario.project.results_database_path(),
+                alternative.name,
+            )
@@ -1,3 +1,6 @@
+import json
+import os
+
 from spinedb_api import DatabaseMapping
 from spinedb_api.filters.scenario_filter import SCENARIO_FILTER_TYPE
 from spinedb_api.filters.tool_filter import TOOL_FILTER_TYPE
@@ -7,7 +10,7 @@ connection.options["purge_before_writing"] = False
 db_path = project.project_dir / "Input_data.sqlite"
 db_url = "sqlite:///" + str(db_path)
 db_map = DatabaseMapping(db_url)
-active_scenarios = {{{scenarios}}}
+active_scenarios = set(json.loads(os.environ["FLEXTOOL_SCENARIOS"]))
 try:
     connection = project.find_connection("Input_data", "Export_to_CSV")
     available_scenarios = [r.name for r in db_map.query(db_map.scenario_sq)]
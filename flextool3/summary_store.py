@@ -0,0 +1,231 @@
+"""Parsed summary storage and cache.
+
+Summary CSV files are parsed once and stored next to the CSV
+in a columnar file that holds row lengths, cell kinds, numbers
+and strings in typed arrays. The columnar file records the size
+and modification time of the CSV it was made from and is rebuilt
+when the CSV changes. Recently used summaries are kept in memory.
+"""
+from array import array
+from collections import OrderedDict
+import csv
+import struct
+import sys
+import threading
+from django.conf import settings
+from .exception import FlexToolException
+
+COLUMNS_SUFFIX = ".columns"
+"""File suffix of columnar summary files."""
+DEFAULT_CACHE_SIZE = 64
+"""Number of summaries kept in memory unless settings say otherwise."""
+
+_MAGIC = b"FTSUMMARY1\n"
+_HEADER = struct.Struct("<qqIIII")
+_STRING = 0
+_NUMBER = 1
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def number_to_float(value):
+    """Converts x to float if possible.
+
+    Args:
+        value (Any): a value
+
+    Returns:
+        float or Any: float or x if conversion was unsuccessful
+    """
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def load_summary(summary_path):
+    """Loads summary rows.
+
+    Rows come from memory cache, columnar file or the CSV, in that order.
+    The returned rows are shared with the cache and must not be modified.
+
+    Args:
+        summary_path (Path): path to summary CSV file
+
+    Returns:
+        list of list: summary rows where numeric cells are floats
+
+    Raises:
+        FlexToolException: raised if summary file does not exist
+    """
+    try:
+        return _load_summary(summary_path)
+    except FileNotFoundError as error:
+        raise FlexToolException(
+            f"Summary file {summary_path.name} is missing."
+        ) from error
+
+
+def _load_summary(summary_path):
+    """Loads summary rows; see load_summary().
+
+    Args:
+        summary_path (Path): path to summary CSV file
+
+    Returns:
+        list of list: summary rows where numeric cells are floats
+    """
+    status = summary_path.stat()
+    version = (status.st_mtime_ns, status.st_size)
+    with _cache_lock:
+        entry = _cache.get(summary_path)
+        if entry is not None and entry[0] == version:
+            _cache.move_to_end(summary_path)
+            return entry[1]
+    columns_path = summary_path.with_name(summary_path.name + COLUMNS_SUFFIX)
+    rows = _read_columns(columns_path, version)
+    if rows is None:
+        rows = _read_csv(summary_path)
+        try:
+            _write_columns(columns_path, version, rows)
+        except OSError:
+            pass
+    cache_size = getattr(settings, "FLEXTOOL_SUMMARY_CACHE_SIZE", DEFAULT_CACHE_SIZE)
+    with _cache_lock:
+        _cache[summary_path] = (version, rows)
+        _cache.move_to_end(summary_path)
+        while len(_cache) > cache_size:
+            _cache.popitem(last=False)
+    return rows
+
+
+def clear_cache():
+    """Empties the in-memory summary cache."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def _read_csv(summary_path):
+    """Parses summary CSV file.
+
+    Args:
+        summary_path (Path): path to summary file
+
+    Returns:
+        list of list: summary rows
+    """
+    with open(summary_path, encoding="utf-8") as summary_file:
+        reader = csv.reader(summary_file)
+        return [[number_to_float(i) for i in row] for row in reader]
+
+
+def _write_columns(columns_path, version, rows):
+    """Writes summary rows to columnar file.
+
+    Args:
+        columns_path (Path): path to columnar file
+        version (tuple): modification time and size of the CSV file
+        rows (list of list): summary rows
+    """
+    row_lengths = array("I", (len(row) for row in rows))
+    kinds = array("B")
+    numbers = array("d")
+    strings = []
+    for row in rows:
+        for cell in row:
+            if isinstance(cell, float):
+                kinds.append(_NUMBER)
+                numbers.append(cell)
+            else:
+                kinds.append(_STRING)
+                strings.append(cell.encode("utf-8"))
+    string_lengths = array("I", (len(string) for string in strings))
+    for typed_array in (row_lengths, numbers, string_lengths):
+        _to_little_endian(typed_array)
+    header = _HEADER.pack(
+        version[0], version[1], len(row_lengths), len(kinds), len(numbers), len(strings)
+    )
+    temporary_path = columns_path.with_name(columns_path.name + ".tmp")
+    with open(temporary_path, "wb") as columns_file:
+        columns_file.write(_MAGIC)
+        columns_file.write(header)
+        for typed_array in (row_lengths, kinds, numbers, string_lengths):
+            typed_array.tofile(columns_file)
+        columns_file.write(b"".join(strings))
+    temporary_path.replace(columns_path)
+
+
+def _read_columns(columns_path, version):
+    """Reads summary rows from columnar file.
+
+    Args:
+        columns_path (Path): path to columnar file
+        version (tuple): modification time and size of the CSV file
+
+    Returns:
+        list of list: summary rows or None if file is missing or outdated
+    """
+    try:
+        with open(columns_path, "rb") as columns_file:
+            if columns_file.read(len(_MAGIC)) != _MAGIC:
+                return None
+            header = columns_file.read(_HEADER.size)
+            if len(header) != _HEADER.size:
+                return None
+            (
+                mtime,
+                size,
+                row_count,
+                cell_count,
+                number_count,
+                string_count,
+            ) = _HEADER.unpack(header)
+            if (mtime, size) != version:
+                return None
+            row_lengths = _read_array(columns_file, "I", row_count)
+            kinds = _read_array(columns_file, "B", cell_count)
+            numbers = _read_array(columns_file, "d", number_count)
+            string_lengths = _read_array(columns_file, "I", string_count)
+            string_data = columns_file.read()
+    except (OSError, EOFError):
+        return None
+    strings = []
+    position = 0
+    for length in string_lengths:
+        strings.append(str(string_data[position : position + length], "utf-8"))
+        position += length
+    number_iterator = iter(numbers)
+    string_iterator = iter(strings)
+    cell_iterator = (
+        next(number_iterator) if kind == _NUMBER else next(string_iterator)
+        for kind in kinds
+    )
+    return [[next(cell_iterator) for _ in range(length)] for length in row_lengths]
+
+
+def _read_array(columns_file, type_code, count):
+    """Reads a typed array from columnar file.
+
+    Args:
+        columns_file (BinaryIO): columnar file
+        type_code (str): array type code
+        count (int): number of items
+
+    Returns:
+        array: items
+    """
+    typed_array = array(type_code)
+    typed_array.fromfile(columns_file, count)
+    _to_little_endian(typed_array)
+    return typed_array
+
+
+def _to_little_endian(typed_array):
+    """Converts array between native and little endian byte order in place.
+
+    Args:
+        typed_array (array): array to convert
+    """
+    if sys.byteorder == "big":
+        typed_array.byteswap()
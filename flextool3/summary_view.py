@@ -1,55 +1,229 @@
 """Utilities and helpers for the summary interface."""
-import csv
+import base64
+import binascii
+from datetime import datetime, timezone
+import heapq
+import itertools
+import json
+from operator import attrgetter
 
+from django.conf import settings
+from django.db.models import Q
 from django.http import HttpResponseBadRequest, JsonResponse
 
 from .exception import FlexToolException
 from .models import Scenario, ScenarioExecution
-from .view_utils import resolve_scenario_execution
+from .summary_store import (  # pylint: disable=unused-import
+    load_summary,
+    number_to_float,
+)
+from .utils import get_and_validate
+from .view_utils import resolve_scenario_execution, resolve_scenario_executions
 
+DEFAULT_HISTORY_PAGE_SIZE = 50
+"""Number of executions in execution history page unless client asks otherwise."""
 
-def number_to_float(value):
-    """Converts x to float if possible.
+
+def get_scenario_list(project):
+    """Generates a response that contains project's scenarios and their execution dates.
 
     Args:
-        value (Any): a value
+        project (Project): a project
 
     Returns:
-        float or Any: float or x if conversion was unsuccessful
+        HTTPResponse: a response object
     """
-    try:
-        return float(value)
-    except ValueError:
-        return value
+    scenarios_and_executions = {}
+    for execution in _project_executions(project):
+        scenarios_and_executions.setdefault(execution.scenario.name, []).append(
+            _execution_data(execution)
+        )
+    return JsonResponse({"scenarios": scenarios_and_executions})
 
 
-def get_scenario_list(project):
-    """Generates a response that contains project's scenarios and their execution dates.
+def get_execution_history(project, body):
+    """Generates a response that contains a page of project's executions.
+
+    Executions are ordered from the newest to the oldest.
+    Request body may contain 'scenario' to filter by scenario name,
+    'since' and 'until' ISO time stamps to filter by execution time,
+    'limit' for page size and 'cursor' from previous page.
 
     Args:
         project (Project): a project
+        body (dict): request body
 
     Returns:
         HTTPResponse: a response object
     """
+    try:
+        scenario_name = get_and_validate(body, "scenario", str, required=False)
+        since = _parse_time(get_and_validate(body, "since", str, required=False))
+        until = _parse_time(get_and_validate(body, "until", str, required=False))
+        limit = get_and_validate(body, "limit", int, required=False)
+        cursor = get_and_validate(body, "cursor", str, required=False)
+        max_limit = getattr(settings, "FLEXTOOL_MAX_HISTORY_PAGE_SIZE", 500)
+        if limit is None:
+            limit = min(DEFAULT_HISTORY_PAGE_SIZE, max_limit)
+        elif not 0 < limit <= max_limit:
+            raise FlexToolException(f"'limit' should be between 1 and {max_limit}.")
+        conditions = Q()
+        if since is not None:
+            conditions &= Q(execution_time__gte=since)
+        if until is not None:
+            conditions &= Q(execution_time__lt=until)
+        if cursor is not None:
+            cursor_time, cursor_id = _decode_cursor(cursor)
+            conditions &= Q(execution_time__lt=cursor_time) | Q(
+                execution_time=cursor_time, id__lt=cursor_id
+            )
+    except FlexToolException as error:
+        return HttpResponseBadRequest(str(error))
     # pylint: disable=no-member
     scenarios = Scenario.objects.filter(project=project.id)
-    scenarios_and_executions = {}
-    for scenario in scenarios:
-        # pylint: disable=no-member
-        scenario_executions = ScenarioExecution.objects.filter(scenario=scenario)
-        for execution in scenario_executions:
-            scenarios_and_executions.setdefault(scenario.name, []).append(
-                {
-                    "scenario_execution_id": execution.id,
-                    "time_stamp": execution.execution_time.isoformat(),
-                }
-            )
-    scenarios_and_executions = {
-        name: sorted(executions, key=lambda x: x["time_stamp"], reverse=True)
-        for name, executions in scenarios_and_executions.items()
+    if scenario_name is not None:
+        scenarios = scenarios.filter(name=scenario_name)
+    page = list(
+        itertools.islice(
+            heapq.merge(
+                *(
+                    _scenario_history(scenario, conditions, limit + 1)
+                    for scenario in scenarios
+                ),
+                key=attrgetter("execution_time", "id"),
+                reverse=True,
+            ),
+            limit + 1,
+        )
+    )
+    next_cursor = _encode_cursor(page[limit - 1]) if len(page) > limit else None
+    history = []
+    for execution in page[:limit]:
+        execution_data = _execution_data(execution)
+        execution_data["scenario"] = execution.scenario.name
+        history.append(execution_data)
+    return JsonResponse({"executions": history, "cursor": next_cursor})
+
+
+def _scenario_history(scenario, conditions, limit):
+    """Reads scenario's latest executions that meet given conditions.
+
+    Args:
+        scenario (Scenario): scenario
+        conditions (Q): filter conditions
+        limit (int): maximum number of executions
+
+    Returns:
+        list of ScenarioExecution: executions from the newest to the oldest
+    """
+    executions = list(_scenario_executions(scenario.id, conditions)[:limit])
+    for execution in executions:
+        execution.scenario = scenario
+    return executions
+
+
+def _scenario_executions(scenario_id, conditions):
+    """Queries scenario's executions from the newest to the oldest.
+
+    Each scenario is queried separately so the (scenario, execution_time, id)
+    index serves both filtering and ordering.
+
+    Args:
+        scenario_id (int): scenario id
+        conditions (Q): filter conditions
+
+    Returns:
+        QuerySet: scenario executions
+    """
+    # pylint: disable=no-member
+    return ScenarioExecution.objects.filter(conditions, scenario=scenario_id).order_by(
+        "-execution_time", "-id"
+    )
+
+
+def _project_executions(project):
+    """Queries project's scenario executions from the newest to the oldest.
+
+    Args:
+        project (Project): a project
+
+    Returns:
+        QuerySet: scenario executions with their scenarios
+    """
+    # pylint: disable=no-member
+    return (
+        ScenarioExecution.objects.filter(scenario__project=project.id)
+        .select_related("scenario")
+        .order_by("-execution_time", "-id")
+    )
+
+
+def _execution_data(execution):
+    """Serializes scenario execution.
+
+    Args:
+        execution (ScenarioExecution): scenario execution
+
+    Returns:
+        dict: execution data
+    """
+    execution_data = {
+        "scenario_execution_id": execution.id,
+        "time_stamp": execution.execution_time.isoformat(),
     }
-    return JsonResponse({"scenarios": scenarios_and_executions})
+    resource_usage = execution.resource_usage()
+    if resource_usage is not None:
+        execution_data["resource_usage"] = resource_usage
+    return execution_data
+
+
+def _parse_time(time_stamp):
+    """Parses ISO time stamp; time stamps without time zone are in UTC.
+
+    Args:
+        time_stamp (str, optional): time stamp
+
+    Returns:
+        datetime: parsed time or None if time_stamp is None
+    """
+    if time_stamp is None:
+        return None
+    try:
+        time_point = datetime.fromisoformat(time_stamp)
+    except ValueError as error:
+        raise FlexToolException(f"'{time_stamp}' is not a valid time stamp.") from error
+    if time_point.tzinfo is None:
+        time_point = time_point.replace(tzinfo=timezone.utc)
+    return time_point
+
+
+def _encode_cursor(execution):
+    """Creates a pagination cursor that points past given execution.
+
+    Args:
+        execution (ScenarioExecution): last execution of a page
+
+    Returns:
+        str: cursor
+    """
+    position = json.dumps([execution.execution_time.isoformat(), execution.id])
+    return base64.urlsafe_b64encode(position.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor):
+    """Parses a pagination cursor.
+
+    Args:
+        cursor (str): cursor
+
+    Returns:
+        tuple: execution time and id
+    """
+    try:
+        time_stamp, execution_id = json.loads(base64.urlsafe_b64decode(cursor))
+        return datetime.fromisoformat(time_stamp), int(execution_id)
+    except (binascii.Error, ValueError, TypeError) as error:
+        raise FlexToolException("Invalid cursor.") from error
 
 
 def get_summary(project, body):
@@ -64,15 +238,98 @@ def get_summary(project, body):
     """
     try:
         scenario_execution = resolve_scenario_execution(project, body)
+        summary_path = scenario_execution.summary_path()
+        summary_rows = load_summary(summary_path) if summary_path is not None else []
+    except FlexToolException as error:
+        return HttpResponseBadRequest(str(error))
+    summary_data = {"summary": summary_rows}
+    resource_usage = scenario_execution.resource_usage()
+    if resource_usage is not None:
+        summary_data["resource_usage"] = resource_usage
+    return JsonResponse(summary_data)
+
+
+def compare_summaries(project, body):
+    """Generates a response that compares the summaries of multiple executions.
+
+    Summary rows are matched by section, leading text cells and
+    occurrence of the same text within the section.
+    Each row of the comparison lists the numbers of the row in every execution,
+    or null if the execution's summary has no such row.
+
+    Args:
+        project (Project): a project
+        body (dict): request body
+
+    Returns:
+        HTTPResponse: a response object
+    """
+    try:
+        scenario_execution_ids = get_and_validate(body, "scenarioExecutionIds", list)
+        scenario_executions = resolve_scenario_executions(
+            project, scenario_execution_ids
+        )
     except FlexToolException as error:
         return HttpResponseBadRequest(str(error))
-    summary_path = scenario_execution.summary_path()
-    if summary_path is None:
-        return JsonResponse({"summary": []})
-    with open(summary_path, encoding="utf-8") as summary_file:
-        reader = csv.reader(summary_file)
-        summary_rows = [[number_to_float(i) for i in row] for row in reader]
-    return JsonResponse({"summary": summary_rows})
+    numbers_by_execution = []
+    keys = {}
+    for scenario_execution in scenario_executions:
+        summary_path = scenario_execution.summary_path()
+        try:
+            summary_rows = (
+                load_summary(summary_path) if summary_path is not None else []
+            )
+        except FlexToolException as error:
+            return HttpResponseBadRequest(str(error))
+        numbers = _numeric_summary_rows(summary_rows)
+        numbers_by_execution.append(numbers)
+        for key in numbers:
+            keys.setdefault(key, None)
+    comparison = []
+    for key in keys:
+        section, label, _ = key
+        values = [numbers.get(key) for numbers in numbers_by_execution]
+        comparison.append(
+            {
+                "section": section,
+                "label": list(label),
+                "values": values,
+                "differs": any(value != values[0] for value in values[1:]),
+            }
+        )
+    return JsonResponse(
+        {"scenarioExecutionIds": scenario_execution_ids, "comparison": comparison}
+    )
+
+
+def _numeric_summary_rows(summary_rows):
+    """Collects rows that contain numbers from summary.
+
+    Args:
+        summary_rows (list of list): summary rows
+
+    Returns:
+        dict: mapping from row key to row's numbers
+    """
+    numeric_rows = {}
+    occurrences = {}
+    section = ""
+    for row in summary_rows:
+        numbers = [cell for cell in row if isinstance(cell, float)]
+        if not numbers:
+            if len(row) == 1:
+                section = row[0]
+            continue
+        label = []
+        for cell in row:
+            if isinstance(cell, float):
+                break
+            label.append(cell.strip())
+        label = tuple(label)
+        occurrence = occurrences.get((section, label), 0)
+        occurrences[(section, label)] = occurrence + 1
+        numeric_rows[(section, label, occurrence)] = numbers
+    return numeric_rows
 
 
 def get_result_alternative(project, body):
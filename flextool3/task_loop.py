@@ -1,8 +1,51 @@
 """Task loop and subprocess management."""
+from collections import deque
+import ctypes
+from dataclasses import asdict, dataclass, replace
 from enum import auto, Enum, unique
+import functools
+import heapq
+import itertools
+import json
+import mmap
+import os
+from pathlib import Path
 import queue
-from subprocess import PIPE, Popen, STDOUT
+import re
+import signal
+from subprocess import DEVNULL, PIPE, Popen, TimeoutExpired
+import sys
+import tempfile
 import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # fcntl is not available on Windows
+    fcntl = None
+
+from . import process_runner
+
+DEFAULT_LOG_MEMORY_LINES = 1000
+"""Default number of latest log lines kept in memory per execution."""
+_LINE_INDEX_STRIDE = 1024
+"""Log file byte offset is stored for every this many lines."""
+_FOLLOW_READ_SIZE = 64 * 1024
+"""Maximum number of bytes to read from runner's output or log file at once."""
+_LINE_BREAK = re.compile(rb"\r\n|\r|\n")
+"""Line breaks of log output; like universal newlines, a lone carriage return
+ends a line."""
+_IN_MODIFY = 0x2
+_IN_CLOSE_WRITE = 0x8
+_IN_CLOEXEC = 0o2000000
+"""Values of inotify event masks and flags from <sys/inotify.h>."""
+_RUNNER_PATH = Path(__file__).parent / "process_runner.py"
+"""Path to script that runs execution processes."""
+LOST_RETURN_CODE = -1
+"""Return code of processes that have exited without recording their return code."""
+_RUNNER_KILL_DELAY = process_runner.KILL_GRACE_PERIOD + 5.0
+"""Time in seconds a terminated runner has to stop its execution process
+before the runner's process group is killed."""
 
 
 @unique
@@ -25,6 +68,14 @@ class Task(Enum):
     """Write return code or None of given execution to connection pipe."""
     SEND_PROCESS_COUNT = auto()
     """Write process count (running and finished) to connection pipe."""
+    SEND_QUEUE_POSITION = auto()
+    """Write queue position or None of given execution to connection pipe."""
+    SEND_BRIEFING = auto()
+    """Write status, latest stdout, return code and queue position to pipe."""
+    SEND_LOG_LINES = auto()
+    """Write given range of log lines of given execution to connection pipe."""
+    WAIT_FOR_CHANGE = auto()
+    """Write True to pipe when given executions change or False on timeout."""
 
 
 @unique
@@ -35,15 +86,26 @@ class Field(Enum):
     EXECUTION_ID = auto()
     PROCESS_COMMAND = auto()
     PROCESS_ARGUMENTS = auto()
+    PRIORITY = auto()
+    REQUEST_ID = auto()
+    FIRST_LINE = auto()
+    LAST_LINE = auto()
+    EXECUTION_IDS = auto()
+    TIMEOUT = auto()
+    LIMITS = auto()
+    PROCESS_ENVIRONMENT = auto()
+    LINE_COUNTS = auto()
 
 
 @unique
 class Status(Enum):
     """Execution statuses."""
 
+    QUEUED = auto()
     RUNNING = auto()
     FINISHED = auto()
     ABORTED = auto()
+    LIMIT_EXCEEDED = auto()
 
 
 @unique
@@ -53,44 +115,304 @@ class Error(Enum):
     UNKNOWN_EXECUTION_ID = auto()
 
 
+@dataclass
+class LogSpan:
+    """Location of a range of log lines in a log file.
+
+    Task loop sends spans instead of lines;
+    the receiver reads and decodes the lines from the file.
+    """
+
+    path: str
+    start: int
+    """Byte offset where reading starts."""
+    end: int
+    """Byte offset where reading stops."""
+    skip: int = 0
+    """Number of lines to skip after start."""
+    count: int = 0
+    """Number of lines in span."""
+
+    def lines(self):
+        """Reads the lines from log file.
+
+        Only the spanned bytes are mapped to memory and decoded.
+
+        Returns:
+            list of str: lines
+        """
+        if self.count == 0:
+            return []
+        offset = self.start - self.start % mmap.ALLOCATIONGRANULARITY
+        try:
+            with open(self.path, "rb") as log_file, mmap.mmap(
+                log_file.fileno(),
+                self.end - offset,
+                offset=offset,
+                access=mmap.ACCESS_READ,
+            ) as mapped:
+                with memoryview(mapped) as data:
+                    text = str(data[self.start - offset :], "utf-8", "replace")
+        except (OSError, ValueError):
+            return []
+        return _split_lines(text)[self.skip : self.skip + self.count]
+
+
+@dataclass
+class Briefing:
+    """Execution's state sent in response to a single briefing request.
+
+    Task loop sends lines as LogSpan; unpack_response() replaces it with the lines.
+    """
+
+    status: Status
+    lines: list
+    return_code: int = None
+    queue_position: int = None
+    line_count: int = 0
+    resource_usage: dict = None
+    exceeded_limit: str = None
+
+
+@dataclass
+class Limits:
+    """Resource limits of an execution process; None means unlimited.
+
+    Memory limit requires cgroup placement.
+    The parent cgroup must be writable and have the memory controller
+    enabled in its cgroup.subtree_control.
+    """
+
+    timeout: float = None
+    """Wall-clock time in seconds."""
+    cpu_time: int = None
+    """CPU time in seconds."""
+    address_space: int = None
+    """Size of virtual memory in bytes."""
+    memory: int = None
+    """Size of memory in cgroup in bytes."""
+    nice: int = None
+    """Niceness increment."""
+    cgroup: str = None
+    """Path to cgroup v2 directory under which execution cgroups are created."""
+
+
+@dataclass
+class _Exit:
+    """Execution process' outcome collected by a log follower."""
+
+    return_code: int
+    resource_usage: dict = None
+    exceeded_limit: str = None
+
+
 class _ProcessLog:
-    """Stores execution process output as lines of text."""
+    """Stores execution process output in a log file.
 
-    _n = 0
-    """Counter to name listener threads."""
+    The log keeps track of where lines are in the file
+    so ranges of lines can be sent as LogSpans.
+    Byte offsets of the latest lines are kept in memory;
+    offsets of older lines are known for every _LINE_INDEX_STRIDE lines.
+    The log file can be written by the execution process itself
+    in which case the log only keeps track of the lines in the file.
+    """
 
-    def __init__(self, out):
+    def __init__(self, directory=None, memory_lines=DEFAULT_LOG_MEMORY_LINES):
         """
         Args:
-            out (IOBase): output stream to log
+            directory (Path, optional): directory for the log file;
+                if None, system's temporary directory is used
+            memory_lines (int): number of latest lines whose offsets are kept in memory
         """
-        self.lines: list = []
-        self.unmerged: list = []
         self.return_code = None
-        self.status = Status.RUNNING
-        self._line_queue = queue.SimpleQueue()
-        _ProcessLog._n += 1
-        self._listener = threading.Thread(
-            target=_read_stream,
-            args=(out, self._line_queue),
-            name=f"fExecution logger {_ProcessLog._n}",
+        self.resource_usage = None
+        self.exceeded_limit = None
+        self.status = Status.QUEUED
+        self.line_count = 0
+        self._directory = directory
+        self._tail = deque(maxlen=memory_lines)
+        self._read_count = 0
+        self._path = None
+        self._file = None
+        self._external = False
+        self._byte_count = 0
+        self._line_offsets = []
+        self._closed = False
+
+    @property
+    def path(self):
+        """Path to log file or None if nothing has been logged."""
+        return self._path
+
+    @property
+    def return_code_path(self):
+        """Path to file where process runner writes the return code."""
+        return process_runner.return_code_path(self._path)
+
+    @property
+    def usage_path(self):
+        """Path to file where process runner writes resource usage."""
+        return process_runner.usage_path(self._path)
+
+    @property
+    def limit_path(self):
+        """Path to file where process runner writes the exceeded limit."""
+        return process_runner.limit_path(self._path)
+
+    @property
+    def has_unread_lines(self):
+        """True if log has lines that have not been marked read."""
+        return self._read_count < self.line_count
+
+    def attach(self, path=None):
+        """Makes log follow a file that is written by someone else.
+
+        Args:
+            path (Path, optional): path to log file; if None, creates a new empty file
+
+        Returns:
+            Path: path to log file
+        """
+        if path is None:
+            file_descriptor, path = tempfile.mkstemp(
+                suffix=".log", prefix="execution_", dir=self._directory
+            )
+            os.close(file_descriptor)
+        self._path = Path(path)
+        self._external = True
+        return self._path
+
+    def append(self, line):
+        """Appends a new line to log.
+
+        Args:
+            line (str): line to append
+        """
+        self.extend(line.encode("utf-8"))
+
+    def extend(self, data):
+        """Appends raw output to log.
+
+        Args:
+            data (bytes): output that consists of whole lines;
+                the last line may lack its line break only if no output follows
+        """
+        if self._closed or not data:
+            return
+        if not self._external:
+            if self._file is None:
+                file_descriptor, path = tempfile.mkstemp(
+                    suffix=".log", prefix="execution_", dir=self._directory
+                )
+                self._path = Path(path)
+                self._file = os.fdopen(file_descriptor, "ab")
+            self._file.write(data)
+        position = 0
+        while position < len(data):
+            offset = self._byte_count + position
+            if self.line_count % _LINE_INDEX_STRIDE == 0:
+                self._line_offsets.append(offset)
+            self._tail.append(offset)
+            self.line_count += 1
+            line_break = _LINE_BREAK.search(data, position)
+            position = len(data) if line_break is None else line_break.end()
+        self._byte_count += len(data)
+
+    def span(self, first, last=None):
+        """Locates a range of lines in log file.
+
+        Args:
+            first (int): index of first line
+            last (int, optional): index of one past last line;
+                if None, spans to the end of log
+
+        Returns:
+            LogSpan: location of lines
+        """
+        last = self.line_count if last is None else min(last, self.line_count)
+        first = max(first, 0)
+        if first >= last:
+            return LogSpan(None, 0, 0)
+        if self._file is not None:
+            self._file.flush()
+        tail_first = self.line_count - len(self._tail)
+        if first >= tail_first:
+            start = self._tail[first - tail_first]
+            skip = 0
+        else:
+            start = self._line_offsets[first // _LINE_INDEX_STRIDE]
+            skip = first % _LINE_INDEX_STRIDE
+        return LogSpan(
+            str(self._path), start, self._end_offset(last), skip, last - first
         )
-        self._listener.daemon = True
-        self._listener.start()
 
-    def merge(self):
-        """Merges unmerged log lines to final log."""
-        self.lines += self.unmerged
-        self.unmerged.clear()
+    def _end_offset(self, last):
+        """Finds a byte offset at or after the end of given line.
 
-    def read_to_unmerged(self):
-        """Appends new output (if available) to unmerged lines."""
-        try:
-            while True:
-                line = self._line_queue.get_nowait()
-                self.unmerged.append(line)
-        except queue.Empty:
-            pass
+        Args:
+            last (int): index of one past last line
+
+        Returns:
+            int: byte offset
+        """
+        if last >= self.line_count:
+            return self._byte_count
+        tail_first = self.line_count - len(self._tail)
+        if last >= tail_first:
+            return self._tail[last - tail_first]
+        index = -(-last // _LINE_INDEX_STRIDE)
+        if index < len(self._line_offsets) and index * _LINE_INDEX_STRIDE < tail_first:
+            return self._line_offsets[index]
+        return self._tail[0] if self._tail else self._byte_count
+
+    def read(self, first, last=None):
+        """Reads a range of lines.
+
+        Args:
+            first (int): index of first line to read
+            last (int, optional): index of one past last line to read;
+                if None, reads to the end of log
+
+        Returns:
+            list of str: lines
+        """
+        return self.span(first, last).lines()
+
+    def read_new(self):
+        """Reads lines that have not been read before.
+
+        Returns:
+            list of str: new lines
+        """
+        return self.span_new().lines()
+
+    def span_new(self):
+        """Locates lines that have not been read before and marks them read.
+
+        Returns:
+            LogSpan: location of new lines
+        """
+        span = self.span(self._read_count)
+        self._read_count = self.line_count
+        return span
+
+    def close(self):
+        """Closes and deletes the log file."""
+        self._closed = True
+        if self._path is None:
+            return
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._path.unlink(missing_ok=True)
+        if self._external:
+            self.return_code_path.unlink(missing_ok=True)
+            self.usage_path.unlink(missing_ok=True)
+            self.limit_path.unlink(missing_ok=True)
+
+    def run(self):
+        """Marks process as running."""
+        self.status = Status.RUNNING
 
     def finish(self, return_code):
         """Marks process as finished.
@@ -99,7 +421,7 @@ class _ProcessLog:
             return_code (int): return code of the process
         """
         self.status = Status.FINISHED
-        self._close(return_code)
+        self.return_code = return_code
 
     def abort(self, return_code):
         """Marks process as aborted.
@@ -108,65 +430,749 @@ class _ProcessLog:
             return_code (int): return code of the process
         """
         self.status = Status.ABORTED
-        self._close(return_code)
+        self.return_code = return_code
 
-    def _close(self, return_code):
-        """Stops listening to process output.
+    def exceed_limit(self, return_code, limit):
+        """Marks process as stopped by a resource limit.
 
         Args:
             return_code (int): return code of the process
+            limit (str): name of exceeded limit
         """
+        self.status = Status.LIMIT_EXCEEDED
         self.return_code = return_code
-        self._listener.join()
-        self._listener = None
-        self._line_queue = None
+        self.exceeded_limit = limit
+
+
+class _WaitingQueue:
+    """Executions waiting for a free process slot.
+
+    Executions with lower priority value are started first;
+    executions with equal priority are started in submission order.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
 
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, execution_id, message, priority):
+        """Adds an execution to the queue.
+
+        Args:
+            execution_id (int): execution id
+            message (dict): start task message
+            priority (int): execution priority
+        """
+        heapq.heappush(
+            self._heap, (priority, next(self._counter), execution_id, message)
+        )
+
+    def pop(self):
+        """Removes the next execution from the queue.
+
+        Returns:
+            tuple: execution id and start task message
+        """
+        _, _, execution_id, message = heapq.heappop(self._heap)
+        return execution_id, message
+
+    def remove(self, execution_id):
+        """Removes given execution from the queue.
+
+        Args:
+            execution_id (int): execution id
+
+        Returns:
+            bool: True if execution was in the queue, False otherwise
+        """
+        remaining = [entry for entry in self._heap if entry[2] != execution_id]
+        if len(remaining) == len(self._heap):
+            return False
+        heapq.heapify(remaining)
+        self._heap = remaining
+        return True
+
+    def position(self, execution_id):
+        """Returns execution's position in the queue.
+
+        Args:
+            execution_id (int): execution id
+
+        Returns:
+            int: 1-based position or None if execution is not queued
+        """
+        for position, entry in enumerate(sorted(self._heap), start=1):
+            if entry[2] == execution_id:
+                return position
+        return None
+
+
+class _ChangeWaiters:
+    """Requests that wait for new output or status change of executions."""
+
+    def __init__(self):
+        self._waiters = []
+
+    def __len__(self):
+        return len(self._waiters)
+
+    def add(self, message, logs, out_connection):
+        """Adds a new waiter or responds immediately if there already are changes.
+
+        Args:
+            message (dict): task message
+            logs (dict): process logs
+            out_connection (Connection): connection that is capable of sending
+        """
+        statuses = {}
+        for execution_id in message[Field.EXECUTION_IDS]:
+            log = logs.get(execution_id)
+            statuses[execution_id] = log.status if log is not None else None
+        line_counts = message.get(Field.LINE_COUNTS, {})
+        if _has_changed(statuses, line_counts, logs):
+            _respond(message, True, out_connection)
+            return
+        deadline = time.monotonic() + message[Field.TIMEOUT]
+        self._waiters.append((deadline, message, statuses, line_counts))
 
-def _read_stream(out, log_queue):
-    """Puts lines of text from stream into a queue.
+    def timeout(self):
+        """Returns time until the earliest waiter times out.
+
+        Returns:
+            float: timeout in seconds or None if there are no waiters
+        """
+        if not self._waiters:
+            return None
+        deadline = min(waiter[0] for waiter in self._waiters)
+        return max(deadline - time.monotonic(), 0.0)
+
+    def wake(self, logs, out_connection):
+        """Responds to waiters whose executions have changed or who have timed out.
+
+        Args:
+            logs (dict): process logs
+            out_connection (Connection): connection that is capable of sending
+        """
+        if not self._waiters:
+            return
+        now = time.monotonic()
+        remaining = []
+        for waiter in self._waiters:
+            deadline, message, statuses, line_counts = waiter
+            if _has_changed(statuses, line_counts, logs):
+                _respond(message, True, out_connection)
+            elif deadline <= now:
+                _respond(message, False, out_connection)
+            else:
+                remaining.append(waiter)
+        self._waiters = remaining
+
+
+def _has_changed(statuses, line_counts, logs):
+    """Checks if executions have new output or their statuses have changed.
+
+    Output is new if it is beyond known line count
+    or, if line count is not known, if it has not been read.
+
+    Args:
+        statuses (dict): mapping from execution id to known status
+        line_counts (dict): mapping from execution id to known line count
+        logs (dict): process logs
+
+    Returns:
+        bool: True if any of the executions has changed, False otherwise
+    """
+    for execution_id, status in statuses.items():
+        log = logs.get(execution_id)
+        if log is None or log.status != status:
+            return True
+        line_count = line_counts.get(execution_id)
+        if line_count is None:
+            if log.has_unread_lines:
+                return True
+        elif log.line_count > line_count:
+            return True
+    return False
+
+
+@unique
+class _Event(Enum):
+    """Internal events that wake up the task loop."""
+
+    TASK = auto()
+    """New message has arrived from task queue."""
+    OUTPUT = auto()
+    """Execution process has written whole lines to its log file."""
+    EXIT = auto()
+    """Execution process has exited."""
+
+
+_listener_count = itertools.count(1)
+"""Counter to name listener threads."""
+
+
+class _AdoptedProcess:
+    """Execution process that was started by an earlier task loop.
+
+    Mimics the parts of Popen interface that task loop uses.
+    """
+
+    def __init__(self, pid, log):
+        """
+        Args:
+            pid (int, optional): process id of the process runner
+            log (_ProcessLog): process log attached to runner's log file
+        """
+        self.pid = pid
+        self.returncode = None
+        self._log = log
+        if not _is_runner_alive(log.path):
+            self._collect_return_code()
+
+    def poll(self):
+        """Checks if process has exited.
+
+        Returns:
+            int: return code or None if process is still running
+        """
+        if self.returncode is None and not _is_runner_alive(self._log.path):
+            self._collect_return_code()
+        return self.returncode
+
+    def wait(self, timeout=None):
+        """Waits for process to exit.
+
+        Args:
+            timeout (float, optional): maximum time to wait in seconds
+
+        Returns:
+            int: return code
+
+        Raises:
+            TimeoutExpired: raised if process is still running after timeout
+        """
+        if self.returncode is not None:
+            return self.returncode
+        if timeout is None:
+            _wait_for_runner(self._log.path)
+        else:
+            waiter = threading.Thread(
+                target=_wait_for_runner, args=(self._log.path,), daemon=True
+            )
+            waiter.start()
+            waiter.join(timeout)
+            if waiter.is_alive():
+                raise TimeoutExpired(str(self.pid), timeout)
+        self._collect_return_code()
+        return self.returncode
+
+    def terminate(self):
+        """Terminates the process."""
+        if self.poll() is None:
+            os.kill(self.pid, signal.SIGTERM)
+
+    def _collect_return_code(self):
+        """Reads return code from the file written by process runner."""
+        return_code = _read_return_code(self._log.return_code_path)
+        self.returncode = return_code if return_code is not None else LOST_RETURN_CODE
+
+
+def _is_runner_alive(log_path):
+    """Checks if a process runner is still running.
+
+    Runner holds an exclusive lock on its log file until it has written
+    the outcome, so the check cannot be fooled by a reused process id.
 
     Args:
-        out (IOBase): output stream
-        log_queue (queue.Queue): target queue
+        log_path (Path): path to runner's log file
+
+    Returns:
+        bool: True if runner is alive, False otherwise
     """
+    if fcntl is None:
+        return False
     try:
-        for line in iter(out.readline, ""):
-            if line.startswith("\x1b"):
-                continue
-            log_queue.put(line)
-    except ValueError:
+        with open(log_path, "rb") as log_file:
+            fcntl.flock(log_file.fileno(), fcntl.LOCK_SH | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return True
+    except OSError:
+        return False
+    return False
+
+
+def _wait_for_runner(log_path):
+    """Blocks until process runner has written its outcome and released its log.
+
+    Args:
+        log_path (Path): path to runner's log file
+    """
+    if fcntl is None:
+        return
+    try:
+        with open(log_path, "rb") as log_file:
+            fcntl.flock(log_file.fileno(), fcntl.LOCK_SH)
+    except OSError:
         pass
 
 
-# pylint: disable=too-many-branches
-def loop(task_queue, out_connection):
+def _watch_file(path):
+    """Starts watching a file for writes with inotify.
+
+    Args:
+        path (Path): path to file
+
+    Returns:
+        int: inotify file descriptor that becomes readable when the file
+            is written or closed after writing or None if inotify is not available
+    """
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        descriptor = libc.inotify_init1(_IN_CLOEXEC)
+    except (AttributeError, OSError, TypeError):
+        return None
+    if descriptor < 0:
+        return None
+    mask = _IN_MODIFY | _IN_CLOSE_WRITE
+    if libc.inotify_add_watch(descriptor, os.fsencode(path), mask) < 0:
+        os.close(descriptor)
+        return None
+    return descriptor
+
+
+def _read_return_code(path):
+    """Reads return code written by process runner.
+
+    Args:
+        path (Path): path to return code file
+
+    Returns:
+        int: return code or None if it is not available
+    """
+    try:
+        return int(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _read_resource_usage(path):
+    """Reads resource usage written by process runner.
+
+    Args:
+        path (Path): path to resource usage file
+
+    Returns:
+        dict: resource usage or None if it is not available
+    """
+    try:
+        with open(path, encoding="utf-8") as usage_file:
+            return json.load(usage_file)
+    except (OSError, ValueError):
+        return None
+
+
+def _read_exceeded_limit(path):
+    """Reads the name of the limit that stopped the process.
+
+    Args:
+        path (Path): path to exceeded limit file
+
+    Returns:
+        str: limit name or None if no limit was exceeded
+    """
+    try:
+        return path.read_text(encoding="utf-8")
+    except OSError:
+        return None
+
+
+def _split_lines(text):
+    """Splits decoded log text into lines.
+
+    Args:
+        text (str): log text
+
+    Returns:
+        list of str: lines with line breaks
+    """
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    last_line = lines.pop()
+    lines = [line + "\n" for line in lines]
+    if last_line:
+        lines.append(last_line)
+    return lines
+
+
+def unpack_response(response):
+    """Reads the log lines that task loop's response refers to.
+
+    Args:
+        response (Any): task loop's response
+
+    Returns:
+        Any: response with log spans replaced by lines
+    """
+    if isinstance(response, LogSpan):
+        return response.lines()
+    if isinstance(response, Briefing) and isinstance(response.lines, LogSpan):
+        return replace(response, lines=response.lines.lines())
+    return response
+
+
+class _WorkerPool:
+    """Idle process runners that have imported modules and wait for a job.
+
+    Each worker runs a single job in a child process forked from itself,
+    so jobs that run a Python module skip interpreter startup and imports.
+    Workers that have taken a job are replaced by new ones.
+    """
+
+    def __init__(self, size=0, preload_modules=()):
+        """
+        Args:
+            size (int): number of idle workers to keep
+            preload_modules (Iterable of str): modules the workers import
+        """
+        self._size = size if os.name == "posix" else 0
+        self._preload_modules = list(preload_modules)
+        self._idle = deque()
+
+    def fill(self):
+        """Starts new workers until the pool is full."""
+        while len(self._idle) < self._size:
+            self._idle.append(
+                Popen(
+                    [sys.executable, str(_RUNNER_PATH), process_runner.WORKER_OPTION]
+                    + self._preload_modules,
+                    stdin=PIPE,
+                    stdout=PIPE,
+                    stderr=DEVNULL,
+                    start_new_session=True,
+                )
+            )
+
+    # pylint: disable=too-many-arguments
+    def take(self, command, arguments, environment, log, limits):
+        """Hands a job to an idle worker.
+
+        Only jobs that run a Python module with the interpreter
+        the workers use are accepted.
+
+        Args:
+            command (str): command to execute
+            arguments (list of str): command's arguments
+            environment (dict): additional environment variables
+            log (_ProcessLog): process log attached to an empty log file
+            limits (Limits): resource limits
+
+        Returns:
+            Popen: worker that runs the job or None if no worker can run it
+        """
+        if command != sys.executable or not arguments:
+            return None
+        if not arguments[0].startswith("-m"):
+            return None
+        job = {
+            "log": str(log.path),
+            "limits": asdict(limits),
+            "arguments": arguments,
+            "environment": environment,
+        }
+        while self._idle:
+            worker = self._idle.popleft()
+            if worker.poll() is not None:
+                continue
+            try:
+                worker.stdin.write((json.dumps(job) + "\n").encode("utf-8"))
+                worker.stdin.close()
+            except OSError:
+                continue
+            return worker
+        return None
+
+    def close(self):
+        """Stops idle workers."""
+        while self._idle:
+            worker = self._idle.popleft()
+            worker.terminate()
+            worker.stdin.close()
+            worker.stdout.close()
+            worker.wait()
+
+
+class _NoRegistry:
+    """Execution registry that does not persist anything."""
+
+    persistent = False
+
+    def records(self):
+        """Returns registered executions.
+
+        Returns:
+            list of dict: execution records
+        """
+        return []
+
+    # pylint: disable=too-many-arguments
+    def queued(self, execution_id, command, arguments, environment, priority, limits):
+        """Registers a queued execution.
+
+        Args:
+            execution_id (Any): execution id
+            command (str): command to execute
+            arguments (list of str): command's arguments
+            environment (dict): additional environment variables
+            priority (int): execution priority
+            limits (Limits): resource limits
+        """
+
+    def started(self, execution_id, pid, log_path):
+        """Registers that execution's process has started.
+
+        Args:
+            execution_id (Any): execution id
+            pid (int): process id
+            log_path (Path): path to log file
+        """
+
+    def stopped(self, execution_id, status, return_code):
+        """Registers that execution's process has stopped.
+
+        Args:
+            execution_id (Any): execution id
+            status (Status): final status
+            return_code (int, optional): process' return code
+        """
+
+    def removed(self, execution_id):
+        """Removes execution from registry.
+
+        Args:
+            execution_id (Any): execution id
+        """
+
+    def close(self):
+        """Releases registry's resources."""
+
+
+def _forward_tasks(task_queue, events):
+    """Forwards messages from task queue to the event queue.
+
+    Args:
+        task_queue (Queue): task queue
+        events (queue.SimpleQueue): task loop's event queue
+    """
+    while True:
+        try:
+            message = task_queue.get()
+        except (EOFError, OSError):
+            message = {Field.TASK: Task.QUIT}
+        events.put((_Event.TASK, message))
+        if message[Field.TASK] == Task.QUIT:
+            break
+
+
+def _follow_output(execution_id, process, log, events):
+    """Posts lines echoed by a runner and runner's exit to the event queue.
+
+    Blocks on runner's standard output until the pipe closes.
+
+    Args:
+        execution_id (int): execution id
+        process (Popen): process runner started by this loop
+        log (_ProcessLog): process log attached to runner's log file
+        events (queue.SimpleQueue): task loop's event queue
+    """
+    with process.stdout:
+        chunks = iter(functools.partial(process.stdout.read1, _FOLLOW_READ_SIZE), b"")
+        _post_lines(chunks, log, events)
+    process.wait()
+    _post_exit(execution_id, process, log, events)
+
+
+def _follow_adopted_log(execution_id, process, log, events):
+    """Posts lines appended to log file of an adopted runner and its exit.
+
+    On Linux, the follower sleeps on inotify until the log file is written
+    or closed by the runner. Elsewhere, it waits for the runner to exit
+    and reads the log in one go.
+
+    Args:
+        execution_id (int): execution id
+        process (_AdoptedProcess): process runner started by an earlier loop
+        log (_ProcessLog): process log attached to runner's log file
+        events (queue.SimpleQueue): task loop's event queue
+    """
+    watch = _watch_file(log.path)
+    try:
+        with open(log.path, "rb") as log_file:
+            _post_lines(_read_log_file(log_file, process, watch), log, events)
+    finally:
+        if watch is not None:
+            os.close(watch)
+    _post_exit(execution_id, process, log, events)
+
+
+def _read_log_file(log_file, process, watch):
+    """Reads log file until its runner has exited.
+
+    Args:
+        log_file (BinaryIO): log file
+        process (_AdoptedProcess): process runner
+        watch (int, optional): inotify file descriptor watching the log file
+
+    Yields:
+        bytes: data appended to log file
+    """
+    while True:
+        data = log_file.read(_FOLLOW_READ_SIZE)
+        if data:
+            yield data
+            continue
+        if process.poll() is not None:
+            data = log_file.read()
+            if data:
+                yield data
+            return
+        if watch is None:
+            process.wait()
+        else:
+            os.read(watch, _FOLLOW_READ_SIZE)
+
+
+def _post_lines(chunks, log, events):
+    """Posts whole lines of output to the event queue.
+
+    Args:
+        chunks (Iterable of bytes): output
+        log (_ProcessLog): process log the lines belong to
+        events (queue.SimpleQueue): task loop's event queue
+    """
+    partial_line = b""
+    for data in chunks:
+        partial_line += data
+        # A trailing carriage return may be the first half of \r\n.
+        search_end = len(partial_line) - partial_line.endswith(b"\r")
+        lines_end = (
+            max(
+                partial_line.rfind(b"\n", 0, search_end),
+                partial_line.rfind(b"\r", 0, search_end),
+            )
+            + 1
+        )
+        if lines_end:
+            events.put((_Event.OUTPUT, log, partial_line[:lines_end]))
+            partial_line = partial_line[lines_end:]
+    if partial_line:
+        events.put((_Event.OUTPUT, log, partial_line))
+
+
+def _post_exit(execution_id, process, log, events):
+    """Posts outcome of an exited runner to the event queue.
+
+    Args:
+        execution_id (int): execution id
+        process (Popen or _AdoptedProcess): exited process runner
+        log (_ProcessLog): process log attached to runner's log file
+        events (queue.SimpleQueue): task loop's event queue
+    """
+    return_code = _read_return_code(log.return_code_path)
+    if return_code is None:
+        return_code = process.wait()
+    outcome = _Exit(
+        return_code,
+        _read_resource_usage(log.usage_path),
+        _read_exceeded_limit(log.limit_path),
+    )
+    events.put((_Event.EXIT, execution_id, log, outcome))
+
+
+# pylint: disable=too-many-branches,too-many-arguments
+def loop(
+    task_queue,
+    out_connection,
+    max_processes=None,
+    log_directory=None,
+    log_memory_lines=DEFAULT_LOG_MEMORY_LINES,
+    registry_factory=None,
+    warm_workers=0,
+    preload_modules=(),
+):
     """Event loop for the parallel process.
 
+    The loop sleeps until a task arrives, an execution process writes output,
+    an execution process exits or a request waiting for changes times out.
+
+    If a registry is given, executions registered by an earlier loop
+    are restored on startup and running execution processes are left alive
+    when the loop quits so the next loop can re-attach to them.
+    Re-attaching relies on process sessions and file locks,
+    so the registry is ignored on platforms other than POSIX
+    and execution processes do not survive the loop there.
+
     Args:
         task_queue (Queue): task queue
         out_connection (Connection): connection capable of sending
+        max_processes (int, optional): maximum number of simultaneously running
+            execution processes; if None, the number is unlimited
+        log_directory (Path, optional): directory for execution log files;
+            if None, system's temporary directory is used
+        log_memory_lines (int): number of latest log lines kept in memory
+            per execution
+        registry_factory (Callable, optional): factory for execution registry
+            that persists executions
+        warm_workers (int): number of idle worker runners to keep
+            for executions that run a Python module
+        preload_modules (Iterable of str): modules the workers import in advance
     """
+    make_log = functools.partial(_ProcessLog, log_directory, log_memory_lines)
+    if registry_factory is not None and os.name == "posix":
+        registry = registry_factory()
+    else:
+        registry = _NoRegistry()
+    events = queue.SimpleQueue()
+    task_listener = threading.Thread(
+        target=_forward_tasks,
+        args=(task_queue, events),
+        name="Task listener",
+        daemon=True,
+    )
+    task_listener.start()
     running = True
     processes = {}
     logs = {}
+    waiting = _WaitingQueue()
+    change_waiters = _ChangeWaiters()
+    workers = _WorkerPool(warm_workers, preload_modules)
+    for record in registry.records():
+        _restore(record, processes, logs, waiting, make_log, events, registry)
+    workers.fill()
     while running:
         try:
-            timeout = 0.2 if processes else None
-            message = task_queue.get(timeout=timeout)
+            event, *payload = events.get(timeout=change_waiters.timeout())
         except queue.Empty:
-            processes = _update_logs_and_delete_finished(logs, processes)
+            event = None
         except KeyboardInterrupt:
-            running = False
-        else:
+            break
+        if event == _Event.OUTPUT:
+            log, data = payload
+            log.extend(data)
+        elif event == _Event.EXIT:
+            _finish(*payload, processes, logs, registry)
+        elif event == _Event.TASK:
+            message = payload[0]
             task = message[Field.TASK]
             if task == Task.QUIT:
                 running = False
             elif task == Task.START_PROCESS:
-                _start(message, processes, logs)
+                _enqueue(message, logs, waiting, make_log, registry)
             elif task == Task.ABORT_PROCESS:
-                _abort(message, processes, logs)
+                _abort(message, processes, logs, waiting, registry)
             elif task == Task.REMOVE_PROCESS:
-                _remove(message, processes, logs)
+                _remove(message, processes, logs, waiting, registry)
             elif task == Task.SEND_OUTPUT:
                 _send_output(message, logs, out_connection)
             elif task == Task.SEND_STATUS:
@@ -174,87 +1180,375 @@ def loop(task_queue, out_connection):
             elif task == Task.SEND_RETURN_CODE:
                 _send_return_code(message, logs, out_connection)
             elif task == Task.SEND_PROCESS_COUNT:
-                out_connection.send(len(logs))
-            processes = _update_logs_and_delete_finished(logs, processes)
-    for process in processes.values():
+                _respond(message, len(logs), out_connection)
+            elif task == Task.SEND_QUEUE_POSITION:
+                _send_queue_position(message, logs, waiting, out_connection)
+            elif task == Task.SEND_BRIEFING:
+                _send_briefing(message, logs, waiting, out_connection)
+            elif task == Task.SEND_LOG_LINES:
+                _send_log_lines(message, logs, out_connection)
+            elif task == Task.WAIT_FOR_CHANGE:
+                change_waiters.add(message, logs, out_connection)
+        if running:
+            _start_waiting(
+                processes, logs, waiting, max_processes, events, registry, workers
+            )
+            workers.fill()
+            change_waiters.wake(logs, out_connection)
+    workers.close()
+    registry.close()
+    if registry.persistent:
+        return
+    _terminate_all(processes.values())
+    for log in logs.values():
+        log.close()
+
+
+def _restore(record, processes, logs, waiting, make_log, events, registry):
+    """Restores an execution that was registered by an earlier task loop.
+
+    Queued executions are queued again.
+    Running execution processes that are still alive are re-attached;
+    those that have exited while nobody was watching are marked finished
+    with the return code they left behind or LOST_RETURN_CODE.
+
+    Args:
+        record (dict): execution record
+        processes (dict): running processes
+        logs (dict): process logs
+        waiting (_WaitingQueue): executions waiting to be started
+        make_log (Callable): factory for process logs
+        events (queue.SimpleQueue): task loop's event queue
+        registry (Any): execution registry
+    """
+    execution_id = record["execution_id"]
+    status = record["status"]
+    logs[execution_id] = log = make_log()
+    if status == Status.QUEUED:
+        message = {
+            Field.TASK: Task.START_PROCESS,
+            Field.EXECUTION_ID: execution_id,
+            Field.PROCESS_COMMAND: record["command"],
+            Field.PROCESS_ARGUMENTS: record["arguments"],
+            Field.PROCESS_ENVIRONMENT: record["environment"],
+            Field.PRIORITY: record["priority"],
+            Field.LIMITS: record["limits"],
+        }
+        waiting.push(execution_id, message, record["priority"])
+        return
+    log_path = record["log_path"]
+    if log_path is None or not Path(log_path).exists():
+        if status == Status.RUNNING:
+            log.finish(LOST_RETURN_CODE)
+            registry.stopped(execution_id, log.status, log.return_code)
+        else:
+            _set_final_status(log, status, record)
+        return
+    log.attach(Path(log_path))
+    pid = record["pid"] if status == Status.RUNNING else None
+    process = _AdoptedProcess(pid, log)
+    if status == Status.RUNNING:
+        log.run()
         if process.poll() is None:
-            process.terminate()
-            process.wait()
+            processes[execution_id] = process
+    else:
+        _set_final_status(log, status, record)
+    _start_following(_follow_adopted_log, execution_id, process, log, events)
 
 
-def _start(message, processes, logs):
-    """Starts a new process.
+def _set_final_status(log, status, record):
+    """Restores the status of a stopped execution.
 
     Args:
-        message (dict): task message
+        log (_ProcessLog): process log
+        status (Status): registered status
+        record (dict): execution record
+    """
+    if status == Status.FINISHED:
+        log.finish(record["return_code"])
+    elif status == Status.LIMIT_EXCEEDED:
+        log.exceed_limit(record["return_code"], _read_exceeded_limit(log.limit_path))
+    else:
+        log.abort(record["return_code"])
+
+
+# pylint: disable=too-many-arguments
+def _finish(execution_id, log, outcome, processes, logs, registry):
+    """Marks execution finished after its process has exited.
+
+    Args:
+        execution_id (int): execution id
+        log (_ProcessLog): log of the exited process
+        outcome (_Exit): process' outcome
         processes (dict): running processes
         logs (dict): process logs
+        registry (Any): execution registry
     """
-    execution_id = message[Field.EXECUTION_ID]
-    if execution_id in processes:
+    if logs.get(execution_id) is not log:
         return
+    processes.pop(execution_id, None)
+    log.resource_usage = outcome.resource_usage
+    if log.status == Status.RUNNING:
+        if outcome.exceeded_limit is not None:
+            log.exceed_limit(outcome.return_code, outcome.exceeded_limit)
+        else:
+            log.finish(outcome.return_code)
+        registry.stopped(execution_id, log.status, outcome.return_code)
+    elif log.status == Status.ABORTED:
+        log.return_code = outcome.return_code
+        registry.stopped(execution_id, log.status, outcome.return_code)
+
+
+def _enqueue(message, logs, waiting, make_log, registry):
+    """Queues a new process for starting.
+
+    Args:
+        message (dict): task message
+        logs (dict): process logs
+        waiting (_WaitingQueue): executions waiting to be started
+        make_log (Callable): factory for process logs
+        registry (Any): execution registry
+    """
+    execution_id = message[Field.EXECUTION_ID]
+    log = logs.get(execution_id)
+    if log is not None:
+        if log.status in (Status.QUEUED, Status.RUNNING):
+            return
+        log.close()
+    logs[execution_id] = make_log()
+    priority = message.get(Field.PRIORITY, 0)
+    waiting.push(execution_id, message, priority)
+    registry.queued(
+        execution_id,
+        message[Field.PROCESS_COMMAND],
+        message[Field.PROCESS_ARGUMENTS],
+        message.get(Field.PROCESS_ENVIRONMENT, {}),
+        priority,
+        message.get(Field.LIMITS, Limits()),
+    )
+
+
+# pylint: disable=too-many-arguments
+def _start_waiting(processes, logs, waiting, max_processes, events, registry, workers):
+    """Starts queued processes while there are free process slots.
+
+    Args:
+        processes (dict): running processes
+        logs (dict): process logs
+        waiting (_WaitingQueue): executions waiting to be started
+        max_processes (int, optional): maximum number of running processes
+        events (queue.SimpleQueue): task loop's event queue
+        registry (Any): execution registry
+        workers (_WorkerPool): warm worker runners
+    """
+    while waiting and (max_processes is None or len(processes) < max_processes):
+        execution_id, message = waiting.pop()
+        _start(execution_id, message, processes, logs[execution_id], events, workers)
+        registry.started(
+            execution_id, processes[execution_id].pid, logs[execution_id].path
+        )
+
+
+# pylint: disable=too-many-arguments
+def _start(execution_id, message, processes, log, events, workers):
+    """Starts a new process.
+
+    Args:
+        execution_id (int): execution id
+        message (dict): task message
+        processes (dict): running processes
+        log (_ProcessLog): process log
+        events (queue.SimpleQueue): task loop's event queue
+        workers (_WorkerPool): warm worker runners
+    """
     command = message[Field.PROCESS_COMMAND]
     arguments = message[Field.PROCESS_ARGUMENTS]
-    processes[execution_id] = process = _create_process(command, arguments)
-    logs[execution_id] = _ProcessLog(process.stdout)
+    environment = message.get(Field.PROCESS_ENVIRONMENT, {})
+    limits = message.get(Field.LIMITS, Limits())
+    log.attach()
+    process = workers.take(command, arguments, environment, log, limits)
+    if process is None:
+        process = _create_process(command, arguments, environment, log, limits)
+    processes[execution_id] = process
+    log.run()
+    _start_following(_follow_output, execution_id, process, log, events)
 
 
-def _create_process(command, arguments):
-    """Starts a new process.
+def _start_following(follow, execution_id, process, log, events):
+    """Starts a thread that follows process' output.
+
+    Args:
+        follow (Callable): follower function
+        execution_id (int): execution id
+        process (Popen or _AdoptedProcess): process runner
+        log (_ProcessLog): process log
+        events (queue.SimpleQueue): task loop's event queue
+    """
+    listener = threading.Thread(
+        target=follow,
+        args=(execution_id, process, log, events),
+        name=f"Execution logger {next(_listener_count)}",
+        daemon=True,
+    )
+    listener.start()
+
+
+def _create_process(command, arguments, environment, log, limits):
+    """Starts a new process through process runner.
+
+    The runner is started in a new session so it survives the task loop.
+    It also enforces the resource limits
+    and echoes the log to its standard output which the loop follows.
 
     Args:
         command (str): command to execute
         arguments (list of str): command's arguments
+        environment (dict): additional environment variables
+        log (_ProcessLog): process log attached to an empty log file
+        limits (Limits): resource limits
+
+    Returns:
+        Popen: process runner
+    """
+    return Popen(
+        [
+            sys.executable,
+            str(_RUNNER_PATH),
+            str(log.path),
+            json.dumps(asdict(limits)),
+            command,
+        ]
+        + arguments,
+        env={**os.environ, **environment} if environment else None,
+        stdin=DEVNULL,
+        stdout=PIPE,
+        stderr=DEVNULL,
+        start_new_session=True,
+    )
+
+
+def _terminate(process):
+    """Terminates process runner and the execution process it runs.
+
+    Returns immediately; a timer kills the runner's process group
+    if the runner has not exited after a grace period.
+    The runner's exit is handled like any other exit by its follower.
+
+    Args:
+        process (Popen or _AdoptedProcess): process runner
 
     Returns:
-        Popen: new process
+        Timer: timer that kills the runner
+    """
+    _signal_runner(process, signal.SIGTERM)
+    killer = threading.Timer(_RUNNER_KILL_DELAY, _kill_if_running, args=(process,))
+    killer.daemon = True
+    killer.start()
+    return killer
+
+
+def _kill_if_running(process):
+    """Kills process runner's process group unless the runner has exited.
+
+    Args:
+        process (Popen or _AdoptedProcess): process runner
+    """
+    if process.poll() is None:
+        _signal_runner(process, getattr(signal, "SIGKILL", signal.SIGTERM))
+
+
+def _terminate_all(processes):
+    """Terminates process runners and waits until they have exited.
+
+    Used when the task loop quits and nothing else is waiting for it.
+    Runners still alive after a grace period are killed.
+
+    Args:
+        processes (Iterable of Popen or _AdoptedProcess): process runners
     """
-    return Popen([command] + arguments, stdout=PIPE, stderr=STDOUT, text=True)
+    processes = [process for process in processes if process.poll() is None]
+    for process in processes:
+        _signal_runner(process, signal.SIGTERM)
+    deadline = time.monotonic() + _RUNNER_KILL_DELAY
+    for process in processes:
+        try:
+            process.wait(max(deadline - time.monotonic(), 0.0))
+        except TimeoutExpired:
+            _signal_runner(process, getattr(signal, "SIGKILL", signal.SIGTERM))
+    for process in processes:
+        try:
+            process.wait(process_runner.KILL_GRACE_PERIOD)
+        except TimeoutExpired:
+            pass
 
 
-def _abort(message, processes, logs):
-    """Terminates a running process.
+def _signal_runner(process, signal_number):
+    """Sends a signal to process runner's process group.
+
+    Args:
+        process (Popen or _AdoptedProcess): process runner
+        signal_number (int): signal to send
+    """
+    if os.name != "posix":
+        process.terminate()
+        return
+    try:
+        os.killpg(process.pid, signal_number)
+    except ProcessLookupError:
+        pass
+
+
+def _abort(message, processes, logs, waiting, registry):
+    """Terminates a running process or cancels a queued one.
 
     Args:
         message (dict): task message
         processes (dict): running processes
         logs (dict): process logs
+        waiting (_WaitingQueue): executions waiting to be started
+        registry (Any): execution registry
     """
     execution_id = message[Field.EXECUTION_ID]
+    if waiting.remove(execution_id):
+        logs[execution_id].abort(None)
+        registry.stopped(execution_id, Status.ABORTED, None)
+        return
     try:
         process = processes[execution_id]
     except KeyError:
         return
-    process.terminate()
-    process.wait()
-    if not process.stdout.closed:
-        process.stdout.close()
-    del processes[execution_id]
-    logs[execution_id].abort(process.returncode)
+    log = logs[execution_id]
+    if log.status != Status.RUNNING:
+        return
+    _terminate(process)
+    log.abort(None)
+    registry.stopped(execution_id, Status.ABORTED, None)
 
 
-def _remove(message, processes, logs):
+def _remove(message, processes, logs, waiting, registry):
     """Removes process and its logs.
 
     Args:
         message (dict): task message
         processes (dict): running processes
         logs (dict): process logs
+        waiting (_WaitingQueue): executions waiting to be started
+        registry (Any): execution registry
     """
     execution_id = message[Field.EXECUTION_ID]
+    waiting.remove(execution_id)
     process = processes.get(execution_id)
     if process is not None:
-        process.terminate()
-        process.wait()
+        _terminate(process)
         del processes[execution_id]
-    try:
-        del logs[execution_id]
-    except KeyError:
-        pass
+    log = logs.pop(execution_id, None)
+    if log is not None:
+        log.close()
+    registry.removed(execution_id)
 
 
 def _send_output(message, logs, out_connection):
-    """Writes process output to pipe.
+    """Writes location of unread process output to pipe.
 
     Args:
         message (dict): task message
@@ -265,10 +1559,9 @@ def _send_output(message, logs, out_connection):
     try:
         log = logs[execution_id]
     except KeyError:
-        out_connection.send(Error.UNKNOWN_EXECUTION_ID)
+        _respond(message, Error.UNKNOWN_EXECUTION_ID, out_connection)
     else:
-        out_connection.send(log.unmerged)
-        log.merge()
+        _respond(message, log.span_new(), out_connection)
 
 
 def _send_status(message, logs, out_connection):
@@ -283,9 +1576,9 @@ def _send_status(message, logs, out_connection):
     try:
         log = logs[execution_id]
     except KeyError:
-        out_connection.send(Error.UNKNOWN_EXECUTION_ID)
+        _respond(message, Error.UNKNOWN_EXECUTION_ID, out_connection)
     else:
-        out_connection.send(log.status)
+        _respond(message, log.status, out_connection)
 
 
 def _send_return_code(message, logs, out_connection):
@@ -300,38 +1593,82 @@ def _send_return_code(message, logs, out_connection):
     try:
         log = logs[execution_id]
     except KeyError:
-        out_connection.send(Error.UNKNOWN_EXECUTION_ID)
+        _respond(message, Error.UNKNOWN_EXECUTION_ID, out_connection)
     else:
-        out_connection.send(log.return_code)
+        _respond(message, log.return_code, out_connection)
 
 
-def _update_logs_and_delete_finished(logs, processes):
-    """Updates process logs but doesn't merge.
+def _send_queue_position(message, logs, waiting, out_connection):
+    """Writes execution's position in the waiting queue to pipe.
 
     Args:
+        message (dict): task message
         logs (dict): process logs
-        processes (dict): execution processes
+        waiting (_WaitingQueue): executions waiting to be started
+        out_connection (Connection): connection that is capable of sending
+    """
+    execution_id = message[Field.EXECUTION_ID]
+    if execution_id not in logs:
+        _respond(message, Error.UNKNOWN_EXECUTION_ID, out_connection)
+    else:
+        _respond(message, waiting.position(execution_id), out_connection)
 
-    Returns:
-        dict: still running execution processes
+
+def _send_briefing(message, logs, waiting, out_connection):
+    """Writes execution's status, latest output, return code and queue position to pipe.
+
+    Output consists of unread lines unless the message gives the first line to send.
+    Output is sent as LogSpan.
+
+    Args:
+        message (dict): task message
+        logs (dict): process logs
+        waiting (_WaitingQueue): executions waiting to be started
+        out_connection (Connection): connection that is capable of sending
     """
-    running = {}
-    for execution_id, process in processes.items():
-        return_code = process.poll()
+    execution_id = message[Field.EXECUTION_ID]
+    try:
         log = logs[execution_id]
-        log.read_to_unmerged()
-        if return_code is None:
-            running[execution_id] = process
-        else:
-            log.finish(return_code)
-    return running
+    except KeyError:
+        _respond(message, Error.UNKNOWN_EXECUTION_ID, out_connection)
+        return
+    first = message.get(Field.FIRST_LINE)
+    briefing = Briefing(
+        log.status,
+        log.span_new() if first is None else log.span(first),
+        log.return_code,
+        waiting.position(execution_id),
+        log.line_count,
+        log.resource_usage,
+        log.exceeded_limit,
+    )
+    _respond(message, briefing, out_connection)
+
+
+def _send_log_lines(message, logs, out_connection):
+    """Writes location of a range of execution's log lines to pipe.
 
+    Args:
+        message (dict): task message
+        logs (dict): process logs
+        out_connection (Connection): connection that is capable of sending
+    """
+    execution_id = message[Field.EXECUTION_ID]
+    try:
+        log = logs[execution_id]
+    except KeyError:
+        _respond(message, Error.UNKNOWN_EXECUTION_ID, out_connection)
+        return
+    span = log.span(message.get(Field.FIRST_LINE, 0), message.get(Field.LAST_LINE))
+    _respond(message, span, out_connection)
 
-def _merge_logs(logs):
-    """Merges unmerged logs.
+
+def _respond(message, response, out_connection):
+    """Writes response to a request to pipe.
 
     Args:
-        logs (dict): execution logs
+        message (dict): request's task message
+        response (Any): response
+        out_connection (Connection): connection that is capable of sending
     """
-    for log in logs.values():
-        log.merge()
+    out_connection.send((message.get(Field.REQUEST_ID), response))
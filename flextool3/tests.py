@@ -1,16 +1,30 @@
+import asyncio
 import csv
-from datetime import datetime
+from datetime import datetime, timezone
 from io import StringIO
+import itertools
 import json
+from multiprocessing import Pipe
+import os
+import pickle
+import queue
+import signal
 from contextlib import contextmanager
 from operator import itemgetter
 from pathlib import Path
 from shutil import copyfile
+from subprocess import PIPE, Popen
 import sys
 from tempfile import TemporaryDirectory
+import threading
+import time
 import unittest
+from unittest import mock
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.db import OperationalError
+from django.db.models import ProtectedError, Q
+from django.http import HttpResponse, JsonResponse
+from django.test import override_settings, TestCase
 from django.urls import reverse
 from spinetoolbox.project import (
     LATEST_PROJECT_VERSION as LATEST_TOOLBOX_PROJECT_VERSION,
@@ -31,23 +45,43 @@ from spinedb_api import (
     import_scenarios,
     import_scenario_alternatives,
     import_relationship_parameter_values,
+    TimeSeriesVariableResolution,
+    to_database,
 )
 
-from .exception import FlexToolException
-from . import executor, task_loop, views
+from .exception import FlexToolException, UnknownOutputLayout
+from . import (
+    analysis_view,
+    async_executor,
+    broker,
+    execution_backend,
+    execution_registry,
+    executor,
+    fingerprint,
+    process_runner,
+    results_cache,
+    results_ingest,
+    task_loop,
+    value_aggregation,
+    value_columns,
+    value_index_catalogue,
+    views,
+)
 from .models import (
     DEFAULT_PLOT_SPECIFICATION_FILE_NAME,
     PLOT_MULTIPLE_SPECIFICATION_DIRECTORY_NAME,
     PLOT_SINGLE_SPECIFICATION_DIRECTORY_NAME,
     PLOT_SPECIFICATION_DIRECTORY_NAME,
     Project,
+    ProjectExecution,
+    resolve_results_alternative_ids,
     Scenario,
     ScenarioExecution,
     SUMMARY_FILE_NAME,
 )
 from .summary_view import number_to_float
 from .utils import FLEXTOOL_PROJECT_TEMPLATE
-from . import executions_view
+from . import executions_view, summary_store, summary_view
 
 
 PATH_TO_MODEL_DATABASE = Path("Input_data.sqlite")
@@ -288,6 +322,114 @@ class ScenarioExecutionModelTests(TestCase):
                 run_dir / "2023-05-23T15.23.05" / "output" / SUMMARY_FILE_NAME,
             )
 
+    def test_summary_path_is_indexed_and_rechecked(self):
+        with new_project(self.baron) as project:
+            scenario = Scenario(project=project, name="my_scenario")
+            scenario.save()
+            scenario_execution = ScenarioExecution(
+                scenario=scenario,
+                execution_time=datetime.fromisoformat("2023-05-23T15:23:00+03:00"),
+                execution_time_offset=3 * 3600,
+                log="",
+            )
+            scenario_execution.save()
+            run_dir = (
+                Path(project.path)
+                / ".spinetoolbox"
+                / "items"
+                / "flextool3"
+                / "output"
+                / "dc03f1ea3aebbee9146b9cf380472f6045c0927d"
+            )
+            run_dir.mkdir(parents=True)
+            with open(run_dir / ".filter_id", "w", encoding="utf-8") as filter_id_file:
+                filter_id_file.writelines(["my_scenario, FlexTool3 - Input_data\n"])
+            first_summary = (
+                run_dir / "2023-05-23T15.23.05" / "output" / SUMMARY_FILE_NAME
+            )
+            first_summary.parent.mkdir(parents=True)
+            first_summary.touch()
+            self.assertEqual(scenario_execution.summary_path(), first_summary)
+            stored_execution = ScenarioExecution.objects.get(pk=scenario_execution.pk)
+            self.assertEqual(
+                stored_execution.summary_file,
+                first_summary.relative_to(project.path).as_posix(),
+            )
+            with mock.patch.object(
+                ScenarioExecution, "_find_summary_path"
+            ) as find_summary_path:
+                self.assertEqual(stored_execution.summary_path(), first_summary)
+                find_summary_path.assert_not_called()
+            first_summary.unlink()
+            second_summary = (
+                run_dir / "2023-05-23T15.30.00" / "output" / SUMMARY_FILE_NAME
+            )
+            second_summary.parent.mkdir(parents=True)
+            second_summary.touch()
+            self.assertEqual(stored_execution.summary_path(), second_summary)
+            stored_execution = ScenarioExecution.objects.get(pk=scenario_execution.pk)
+            self.assertEqual(
+                stored_execution.summary_file,
+                second_summary.relative_to(project.path).as_posix(),
+            )
+
+    def test_results_alternative_ids_are_resolved_in_bulk_and_stored(self):
+        with new_project(self.baron) as project:
+            scenario_executions = []
+            for name, time_stamp in (
+                ("Base", "2022-06-01T14:14:00+03:00"),
+                ("high_price", "2022-06-01T14:34:00+03:00"),
+                ("high_price", "2022-06-01T16:34:00+03:00"),
+            ):
+                scenario, _ = Scenario.objects.get_or_create(project=project, name=name)
+                scenario_execution = ScenarioExecution(
+                    scenario=scenario,
+                    execution_time=datetime.fromisoformat(time_stamp),
+                    execution_time_offset=3 * 3600,
+                    log="",
+                )
+                scenario_execution.save()
+                scenario_executions.append(scenario_execution)
+            url = "sqlite:///" + str(Path(project.path) / PATH_TO_RESULT_DATABASE)
+            with open_database(url, create=True) as db_map:
+                import_alternatives(
+                    db_map,
+                    (
+                        "Base__Import_Flex3@2022-06-01T14:15:00",
+                        "high_price__Import_Flex3@2022-06-01T14:35:00",
+                        "high_price__Import_Flex3@2022-06-01T16:35:00",
+                    ),
+                )
+                db_map.commit_session("Add test data.")
+                expected_ids = [
+                    row.id
+                    for row in sorted(
+                        db_map.query(db_map.alternative_sq).filter(
+                            db_map.alternative_sq.c.name != "Base"
+                        ),
+                        key=lambda row: row.name,
+                    )
+                ]
+            alternative_ids = resolve_results_alternative_ids(
+                project, scenario_executions
+            )
+            self.assertEqual(alternative_ids, expected_ids)
+            stored_executions = list(
+                ScenarioExecution.objects.filter(scenario__project=project).order_by(
+                    "id"
+                )
+            )
+            self.assertEqual(
+                [execution.alternative_id for execution in stored_executions],
+                expected_ids,
+            )
+            with mock.patch("flextool3.models.database_map") as database_map:
+                self.assertEqual(
+                    resolve_results_alternative_ids(project, stored_executions),
+                    expected_ids,
+                )
+                database_map.assert_not_called()
+
     def test_deleting_scenario_execution_removes_leftover_files_and_data(self):
         with new_project(self.baron) as project:
             scenario = Scenario(project=project, name="my_scenario")
@@ -2432,23 +2574,752 @@ class ExecutorTests(unittest.TestCase):
         self.assertNotEqual(executor.execution_return_code(self._id), 0)
         self.assertEqual(executor.execution_status(self._id), task_loop.Status.ABORTED)
 
+    def test_output_is_available_while_process_is_running(self):
+        executor.start(
+            self._id,
+            sys.executable,
+            ["-u", "-c", "import time; print('early bird'); time.sleep(1000)"],
+        )
+        output = []
+        while not output:
+            output += executor.read_lines(self._id)
+        self.assertEqual(output, ["early bird\n"])
+        self.assertEqual(executor.execution_status(self._id), task_loop.Status.RUNNING)
+        executor.abort(self._id)
+        self.assertEqual(executor.execution_status(self._id), task_loop.Status.ABORTED)
+
+    def test_briefing(self):
+        executor.start(self._id, sys.executable, ["-c", "print('my output')"])
+        lines = []
+        while True:
+            briefing = executor.briefing(self._id)
+            lines += briefing.lines
+            if briefing.status != task_loop.Status.RUNNING:
+                break
+        self.assertEqual(briefing.status, task_loop.Status.FINISHED)
+        self.assertEqual(briefing.return_code, 0)
+        self.assertIsNone(briefing.queue_position)
+        self.assertEqual(lines, ["my output\n"])
+
+    def test_read_log_range(self):
+        executor.start(
+            self._id, sys.executable, ["-c", "for i in range(5): print(f'line {i}')"]
+        )
+        while executor.execution_status(self._id) == task_loop.Status.RUNNING:
+            pass
+        self.assertEqual(executor.read_log(self._id, 1, 3), ["line 1\n", "line 2\n"])
+        self.assertEqual(executor.read_log(self._id, 4), ["line 4\n"])
+
+    def test_concurrent_requests_get_their_own_responses(self):
+        executor.start(self._id, sys.executable, ["-c", "exit(23)"])
+        while executor.execution_status(self._id) == task_loop.Status.RUNNING:
+            pass
+        results = {}
+
+        def query(key, function):
+            results[key] = [function(self._id) for _ in range(20)]
+
+        threads = [
+            threading.Thread(target=query, args=("status", executor.execution_status)),
+            threading.Thread(
+                target=query, args=("return code", executor.execution_return_code)
+            ),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results["status"], 20 * [task_loop.Status.FINISHED])
+        self.assertEqual(results["return code"], 20 * [23])
+
+    def test_briefing_reports_resource_usage_of_finished_process(self):
+        executor.start(
+            self._id, sys.executable, ["-c", "data = bytearray(50 * 1024 * 1024)"]
+        )
+        while True:
+            briefing = executor.briefing(self._id)
+            if briefing.status != task_loop.Status.RUNNING:
+                break
+        usage = briefing.resource_usage
+        self.assertGreater(usage["wall_time"], 0.0)
+        self.assertGreaterEqual(usage["user_cpu_time"], 0.0)
+        self.assertGreater(usage["peak_memory"], 50 * 1024 * 1024)
+
+    def test_follow_log_yields_lines_until_process_stops(self):
+        async def follow():
+            await async_executor.start(
+                self._id,
+                sys.executable,
+                [
+                    "-u",
+                    "-c",
+                    "import time\nfor i in range(3): print(i); time.sleep(0.1)",
+                ],
+            )
+            return [line async for line in async_executor.follow_log(self._id)]
+
+        self.assertEqual(asyncio.run(follow()), ["0\n", "1\n", "2\n"])
+        self.assertEqual(executor.execution_status(self._id), task_loop.Status.FINISHED)
+
     def test_process_count(self):
         self.assertEqual(executor.execution_count(), 0)
         executor.start(self._id, sys.executable, ["--version"])
         self.assertEqual(executor.execution_count(), 1)
 
 
+class ExecutorSettingsTests(unittest.TestCase):
+    def test_unset_process_limit_allows_one_process_per_cpu(self):
+        with override_settings(FLEXTOOL_MAX_CONCURRENT_EXECUTIONS=None):
+            backend = executor._create_backend()
+        self.assertEqual(backend._loop_options["max_processes"], os.cpu_count())
+
+
+class ProcessLogTests(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir = TemporaryDirectory()
+        self._log = task_loop._ProcessLog(Path(self._temp_dir.name), memory_lines=3)
+
+    def tearDown(self):
+        self._log.close()
+        self._temp_dir.cleanup()
+
+    def test_lines_beyond_memory_are_read_from_log_file(self):
+        lines = [f"line {i}\n" for i in range(10)]
+        with mock.patch.object(task_loop, "_LINE_INDEX_STRIDE", 4):
+            for line in lines:
+                self._log.append(line)
+            self.assertEqual(self._log.line_count, 10)
+            self.assertEqual(self._log.read(0), lines)
+            self.assertEqual(self._log.read(5, 9), lines[5:9])
+            self.assertEqual(self._log.read(8), lines[8:])
+            self.assertEqual(self._log.read(9, 20), lines[9:])
+            self.assertEqual(self._log.read(10), [])
+
+    def test_read_new_returns_lines_since_previous_call(self):
+        for i in range(5):
+            self._log.append(f"line {i}\n")
+        self.assertEqual(len(self._log.read_new()), 5)
+        self.assertEqual(self._log.read_new(), [])
+        self._log.append("last line\n")
+        self.assertEqual(self._log.read_new(), ["last line\n"])
+
+    def test_extend_splits_raw_output_into_lines(self):
+        self._log.extend(b"first\r\nsecond\n")
+        self._log.extend("\u00e4\nno line break".encode("utf-8"))
+        self.assertEqual(self._log.line_count, 4)
+        self.assertEqual(
+            self._log.read(0), ["first\n", "second\n", "\u00e4\n", "no line break"]
+        )
+
+    def test_lone_carriage_return_ends_line(self):
+        events = queue.SimpleQueue()
+        task_loop._post_lines([b"10%\r20%\r", b"\ndone\r"], self._log, events)
+        while not events.empty():
+            _, log, data = events.get()
+            log.extend(data)
+        self.assertEqual(self._log.line_count, 3)
+        self.assertEqual(self._log.read(0), ["10%\n", "20%\n", "done\n"])
+
+    def test_span_is_read_without_log(self):
+        lines = [f"line {i}\n" for i in range(10)]
+        with mock.patch.object(task_loop, "_LINE_INDEX_STRIDE", 4):
+            for line in lines:
+                self._log.append(line)
+            spans = [self._log.span(1, 3), self._log.span(5, 9), self._log.span(8)]
+        pickled_spans = [pickle.loads(pickle.dumps(span)) for span in spans]
+        self.assertEqual(pickled_spans[0].lines(), lines[1:3])
+        self.assertEqual(pickled_spans[1].lines(), lines[5:9])
+        self.assertEqual(pickled_spans[2].lines(), lines[8:])
+
+    def test_close_deletes_log_file(self):
+        self._log.append("line\n")
+        self.assertTrue(self._log.path.exists())
+        self._log.close()
+        self.assertFalse(self._log.path.exists())
+        self._log.append("line after close\n")
+        self.assertEqual(self._log.line_count, 1)
+
+
+class TaskLoopTests(unittest.TestCase):
+    def setUp(self):
+        self._task_queue = queue.Queue()
+        self._receiving_connection, sending_connection = Pipe(duplex=False)
+        self._loop_thread = threading.Thread(
+            target=task_loop.loop,
+            args=(self._task_queue, sending_connection),
+            kwargs={"max_processes": 1},
+        )
+        self._loop_thread.start()
+
+    def tearDown(self):
+        self._task_queue.put({task_loop.Field.TASK: task_loop.Task.QUIT})
+        self._loop_thread.join()
+
+    def _send(self, task, execution_id, fields=None):
+        message = {
+            task_loop.Field.TASK: task,
+            task_loop.Field.EXECUTION_ID: execution_id,
+        }
+        if fields is not None:
+            message.update(fields)
+        self._task_queue.put(message)
+
+    def _query(self, task, execution_id):
+        self._send(task, execution_id, {task_loop.Field.REQUEST_ID: execution_id})
+        request_id, response = self._receiving_connection.recv()
+        self.assertEqual(request_id, execution_id)
+        return task_loop.unpack_response(response)
+
+    def _wait_for_status(self, execution_id, status):
+        deadline = time.monotonic() + 10.0
+        while self._query(task_loop.Task.SEND_STATUS, execution_id) != status:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.05)
+
+    def _start_sleeper(self, execution_id, priority=0):
+        self._send(
+            task_loop.Task.START_PROCESS,
+            execution_id,
+            {
+                task_loop.Field.PROCESS_COMMAND: sys.executable,
+                task_loop.Field.PROCESS_ARGUMENTS: [
+                    "-c",
+                    "import time; time.sleep(1000)",
+                ],
+                task_loop.Field.PRIORITY: priority,
+            },
+        )
+
+    def test_executions_wait_in_queue_when_process_slots_are_full(self):
+        self._start_sleeper("first")
+        self._start_sleeper("second")
+        self._start_sleeper("urgent", priority=-1)
+        Status = task_loop.Status
+        self.assertEqual(
+            self._query(task_loop.Task.SEND_STATUS, "first"), Status.RUNNING
+        )
+        self.assertEqual(
+            self._query(task_loop.Task.SEND_STATUS, "second"), Status.QUEUED
+        )
+        self.assertEqual(self._query(task_loop.Task.SEND_QUEUE_POSITION, "urgent"), 1)
+        self.assertEqual(self._query(task_loop.Task.SEND_QUEUE_POSITION, "second"), 2)
+        self._send(task_loop.Task.ABORT_PROCESS, "first")
+        self.assertEqual(
+            self._query(task_loop.Task.SEND_STATUS, "first"), Status.ABORTED
+        )
+        self._wait_for_status("urgent", Status.RUNNING)
+        self.assertEqual(self._query(task_loop.Task.SEND_QUEUE_POSITION, "second"), 1)
+        self._send(task_loop.Task.ABORT_PROCESS, "second")
+        self.assertEqual(
+            self._query(task_loop.Task.SEND_STATUS, "second"), Status.ABORTED
+        )
+        self.assertIsNone(self._query(task_loop.Task.SEND_RETURN_CODE, "second"))
+
+    def test_wait_for_change(self):
+        self._send(
+            task_loop.Task.START_PROCESS,
+            "talker",
+            {
+                task_loop.Field.PROCESS_COMMAND: sys.executable,
+                task_loop.Field.PROCESS_ARGUMENTS: [
+                    "-c",
+                    "import time; time.sleep(0.5); print('hello', flush=True); "
+                    "time.sleep(1000)",
+                ],
+            },
+        )
+        self.assertEqual(
+            self._query(task_loop.Task.SEND_STATUS, "talker"), task_loop.Status.RUNNING
+        )
+        wait_fields = {
+            task_loop.Field.EXECUTION_IDS: ["talker"],
+            task_loop.Field.TIMEOUT: 60.0,
+            task_loop.Field.REQUEST_ID: "wait",
+        }
+        self._task_queue.put(
+            {task_loop.Field.TASK: task_loop.Task.WAIT_FOR_CHANGE, **wait_fields}
+        )
+        self.assertEqual(self._receiving_connection.recv(), ("wait", True))
+        self.assertEqual(self._query(task_loop.Task.SEND_OUTPUT, "talker"), ["hello\n"])
+        wait_fields[task_loop.Field.TIMEOUT] = 0.1
+        self._task_queue.put(
+            {task_loop.Field.TASK: task_loop.Task.WAIT_FOR_CHANGE, **wait_fields}
+        )
+        self.assertEqual(self._receiving_connection.recv(), ("wait", False))
+        self._send(task_loop.Task.ABORT_PROCESS, "talker")
+
+    def test_briefing_from_given_line_leaves_new_lines_unread(self):
+        self._send(
+            task_loop.Task.START_PROCESS,
+            "printer",
+            {
+                task_loop.Field.PROCESS_COMMAND: sys.executable,
+                task_loop.Field.PROCESS_ARGUMENTS: ["-c", "print('a'); print('b')"],
+            },
+        )
+        while (
+            self._query(task_loop.Task.SEND_STATUS, "printer")
+            == task_loop.Status.RUNNING
+        ):
+            time.sleep(0.01)
+        self._send(
+            task_loop.Task.SEND_BRIEFING,
+            "printer",
+            {task_loop.Field.FIRST_LINE: 1, task_loop.Field.REQUEST_ID: "briefing"},
+        )
+        request_id, briefing = self._receiving_connection.recv()
+        self.assertEqual(request_id, "briefing")
+        self.assertIsInstance(briefing.lines, task_loop.LogSpan)
+        briefing = task_loop.unpack_response(briefing)
+        self.assertEqual(briefing.lines, ["b\n"])
+        self.assertEqual(briefing.line_count, 2)
+        self.assertEqual(
+            self._query(task_loop.Task.SEND_OUTPUT, "printer"), ["a\n", "b\n"]
+        )
+        wait_fields = {
+            task_loop.Field.EXECUTION_IDS: ["printer"],
+            task_loop.Field.TIMEOUT: 0.1,
+            task_loop.Field.LINE_COUNTS: {"printer": 2},
+            task_loop.Field.REQUEST_ID: "wait",
+        }
+        self._task_queue.put(
+            {task_loop.Field.TASK: task_loop.Task.WAIT_FOR_CHANGE, **wait_fields}
+        )
+        self.assertEqual(self._receiving_connection.recv(), ("wait", False))
+        wait_fields[task_loop.Field.LINE_COUNTS] = {"printer": 1}
+        self._task_queue.put(
+            {task_loop.Field.TASK: task_loop.Task.WAIT_FOR_CHANGE, **wait_fields}
+        )
+        self.assertEqual(self._receiving_connection.recv(), ("wait", True))
+
+    def test_process_gets_additional_environment_variables(self):
+        self._send(
+            task_loop.Task.START_PROCESS,
+            "printer",
+            {
+                task_loop.Field.PROCESS_COMMAND: sys.executable,
+                task_loop.Field.PROCESS_ARGUMENTS: [
+                    "-c",
+                    "import os; print(os.environ['FLEXTOOL_TEST_VARIABLE'])",
+                ],
+                task_loop.Field.PROCESS_ENVIRONMENT: {
+                    "FLEXTOOL_TEST_VARIABLE": "from message"
+                },
+            },
+        )
+        self._wait_until_stopped("printer")
+        briefing = self._query(task_loop.Task.SEND_BRIEFING, "printer")
+        self.assertEqual(briefing.return_code, 0)
+        self.assertEqual(briefing.lines, ["from message\n"])
+
+    def _wait_until_stopped(self, execution_id):
+        deadline = time.monotonic() + 60.0
+        while time.monotonic() < deadline:
+            status = self._query(task_loop.Task.SEND_STATUS, execution_id)
+            if status not in (task_loop.Status.QUEUED, task_loop.Status.RUNNING):
+                return
+            time.sleep(0.1)
+        self.fail("execution did not stop")
+
+    def test_timeout_stops_process(self):
+        self._send(
+            task_loop.Task.START_PROCESS,
+            "sleeper",
+            {
+                task_loop.Field.PROCESS_COMMAND: sys.executable,
+                task_loop.Field.PROCESS_ARGUMENTS: [
+                    "-c",
+                    "import time; time.sleep(1000)",
+                ],
+                task_loop.Field.LIMITS: task_loop.Limits(timeout=0.5),
+            },
+        )
+        self._wait_until_stopped("sleeper")
+        briefing = self._query(task_loop.Task.SEND_BRIEFING, "sleeper")
+        self.assertEqual(briefing.status, task_loop.Status.LIMIT_EXCEEDED)
+        self.assertEqual(briefing.exceeded_limit, "timeout")
+        self.assertNotEqual(briefing.return_code, 0)
+        self.assertEqual(
+            briefing.lines, ["Process stopped: wall-clock time limit exceeded.\n"]
+        )
+
+    @unittest.skipIf(sys.platform == "win32", "CPU time limit requires POSIX")
+    def test_cpu_time_limit_stops_process(self):
+        self._send(
+            task_loop.Task.START_PROCESS,
+            "spinner",
+            {
+                task_loop.Field.PROCESS_COMMAND: sys.executable,
+                task_loop.Field.PROCESS_ARGUMENTS: ["-c", "while True: pass"],
+                task_loop.Field.LIMITS: task_loop.Limits(cpu_time=1, nice=5),
+            },
+        )
+        self._wait_until_stopped("spinner")
+        briefing = self._query(task_loop.Task.SEND_BRIEFING, "spinner")
+        self.assertEqual(briefing.status, task_loop.Status.LIMIT_EXCEEDED)
+        self.assertEqual(briefing.exceeded_limit, "cpu_time")
+        self.assertGreater(
+            briefing.resource_usage["user_cpu_time"]
+            + briefing.resource_usage["system_cpu_time"],
+            0.5,
+        )
+
+
+@unittest.skipIf(sys.platform == "win32", "warm workers require fork")
+class WorkerPoolTests(unittest.TestCase):
+    def setUp(self):
+        self._pool = task_loop._WorkerPool(1, ["json"])
+        self._pool.fill()
+        self._log = task_loop._ProcessLog()
+        self._log.attach()
+
+    def tearDown(self):
+        self._pool.close()
+        self._log.close()
+
+    def test_worker_runs_module_job(self):
+        worker = self._pool.take(
+            sys.executable, ["-mjson.tool", "--help"], {}, self._log, task_loop.Limits()
+        )
+        self.assertIsNotNone(worker)
+        worker.wait()
+        self.assertEqual(self._log.return_code_path.read_text(encoding="utf-8"), "0")
+        self.assertTrue(
+            self._log.path.read_text(encoding="utf-8").startswith(
+                "usage: python -m json.tool"
+            )
+        )
+
+    def test_worker_does_not_take_non_module_jobs(self):
+        self.assertIsNone(
+            self._pool.take(
+                sys.executable, ["-c", "pass"], {}, self._log, task_loop.Limits()
+            )
+        )
+        self.assertIsNone(
+            self._pool.take(
+                "python2", ["-mjson.tool"], {}, self._log, task_loop.Limits()
+            )
+        )
+
+
+class ProcessRunnerTests(unittest.TestCase):
+    def test_runner_echoes_log_and_holds_lock_until_outcome_is_written(self):
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        log = task_loop._ProcessLog()
+        log_path = log.attach(Path(temp_dir.name, "execution.log"))
+        runner = Popen(
+            [
+                sys.executable,
+                str(task_loop._RUNNER_PATH),
+                str(log_path),
+                "{}",
+                sys.executable,
+                "-u",
+                "-c",
+                "import sys; print('ready'); sys.stdin.read()",
+            ],
+            stdin=PIPE,
+            stdout=PIPE,
+        )
+        with runner:
+            self.assertEqual(runner.stdout.readline(), b"ready\n")
+            process = task_loop._AdoptedProcess(runner.pid, log)
+            self.assertIsNone(process.poll())
+            runner.stdin.close()
+            self.assertEqual(process.wait(), 0)
+            self.assertEqual(runner.stdout.read(), b"")
+        self.assertEqual(log_path.read_bytes(), b"ready\n")
+        self.assertEqual(runner.returncode, 0)
+
+    @unittest.skipIf(sys.platform == "win32", "process groups require POSIX")
+    def test_terminate_kills_runner_that_ignores_termination(self):
+        process = Popen(
+            [
+                sys.executable,
+                "-u",
+                "-c",
+                "import signal, sys, time; "
+                "signal.signal(signal.SIGTERM, signal.SIG_IGN); "
+                "print('ready'); time.sleep(1000)",
+            ],
+            stdout=PIPE,
+            start_new_session=True,
+        )
+        with process:
+            self.assertEqual(process.stdout.readline(), b"ready\n")
+            with mock.patch.object(task_loop, "_RUNNER_KILL_DELAY", 0.5):
+                killer = task_loop._terminate(process)
+            self.assertIsNone(process.poll())
+            killer.join()
+            self.assertEqual(process.wait(5.0), -signal.SIGKILL)
+
+    @unittest.skipIf(not Path("/proc/self/io").exists(), "requires /proc/<pid>/io")
+    def test_child_io_counters_are_read_before_child_is_reaped(self):
+        process = Popen([sys.executable, "-c", "import sys; sys.exit(3)"])
+        with process:
+            counters = process_runner._child_io_counters(process.pid)
+            self.assertEqual(set(counters), {"read_bytes", "write_bytes"})
+            self.assertEqual(process.wait(5.0), 3)
+        self.assertIsNone(process_runner._child_io_counters(process.pid))
+
+
+class BrokerTests(unittest.TestCase):
+    _AUTHKEY = b"secret"
+
+    def setUp(self):
+        self._broker = broker.Broker(("localhost", 0), self._AUTHKEY)
+        self._broker_thread = threading.Thread(target=self._broker.serve)
+        self._broker_thread.start()
+        self._worker_thread = None
+        self._backend = execution_backend.BrokerBackend(
+            self._broker.address, self._AUTHKEY
+        )
+        self._backend.ensure_running()
+        self._request_ids = itertools.count()
+
+    def tearDown(self):
+        self._backend.close()
+        self._broker.close()
+        self._broker_thread.join()
+        if self._worker_thread is not None:
+            self._worker_thread.join()
+
+    def _start_worker(self):
+        self._worker_thread = threading.Thread(
+            target=broker.run_worker,
+            args=(self._broker.address, self._AUTHKEY, 2),
+        )
+        self._worker_thread.start()
+
+    def _query(self, task, execution_id, fields=None):
+        request_id = next(self._request_ids)
+        message = {
+            task_loop.Field.TASK: task,
+            task_loop.Field.EXECUTION_ID: execution_id,
+            task_loop.Field.REQUEST_ID: request_id,
+        }
+        if fields is not None:
+            message.update(fields)
+        self._backend.send(message)
+        response_id, response = self._backend.receive()
+        self.assertEqual(response_id, request_id)
+        return response
+
+    def _start_printer(self, execution_id):
+        self._backend.send(
+            {
+                task_loop.Field.TASK: task_loop.Task.START_PROCESS,
+                task_loop.Field.EXECUTION_ID: execution_id,
+                task_loop.Field.PROCESS_COMMAND: sys.executable,
+                task_loop.Field.PROCESS_ARGUMENTS: ["-c", "print('a'); print('b')"],
+            }
+        )
+
+    def test_execution_runs_on_worker_node(self):
+        self._start_worker()
+        self._start_printer("printer")
+        deadline = time.monotonic() + 10.0
+        while (
+            self._query(task_loop.Task.SEND_STATUS, "printer")
+            != task_loop.Status.FINISHED
+        ):
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.05)
+        self.assertEqual(
+            self._query(task_loop.Task.SEND_LOG_LINES, "printer"), ["a\n", "b\n"]
+        )
+        briefing = self._query(
+            task_loop.Task.SEND_BRIEFING, "printer", {task_loop.Field.FIRST_LINE: 1}
+        )
+        self.assertEqual(briefing.lines, ["b\n"])
+        self.assertEqual(briefing.return_code, 0)
+        self.assertEqual(self._query(task_loop.Task.SEND_PROCESS_COUNT, None), 1)
+        self._backend.send(
+            {
+                task_loop.Field.TASK: task_loop.Task.REMOVE_PROCESS,
+                task_loop.Field.EXECUTION_ID: "printer",
+            }
+        )
+        self.assertEqual(
+            self._query(task_loop.Task.SEND_STATUS, "printer"),
+            task_loop.Error.UNKNOWN_EXECUTION_ID,
+        )
+
+    def test_execution_waits_in_broker_until_worker_node_connects(self):
+        self._start_printer("printer")
+        self.assertEqual(
+            self._query(task_loop.Task.SEND_STATUS, "printer"), task_loop.Status.QUEUED
+        )
+        self.assertEqual(self._query(task_loop.Task.SEND_QUEUE_POSITION, "printer"), 1)
+        wait_fields = {
+            task_loop.Field.EXECUTION_IDS: ["printer"],
+            task_loop.Field.TIMEOUT: 0.1,
+        }
+        self.assertFalse(self._query(task_loop.Task.WAIT_FOR_CHANGE, None, wait_fields))
+        wait_fields[task_loop.Field.TIMEOUT] = 10.0
+        self._start_worker()
+        self.assertTrue(self._query(task_loop.Task.WAIT_FOR_CHANGE, None, wait_fields))
+
+
+class _MemoryRegistry:
+    persistent = True
+
+    def __init__(self):
+        self.executions = {}
+
+    def records(self):
+        return [
+            dict(record, execution_id=execution_id)
+            for execution_id, record in self.executions.items()
+        ]
+
+    def queued(self, execution_id, command, arguments, environment, priority, limits):
+        self.executions[execution_id] = {
+            "command": command,
+            "arguments": arguments,
+            "environment": environment,
+            "priority": priority,
+            "limits": limits,
+            "status": task_loop.Status.QUEUED,
+            "pid": None,
+            "log_path": None,
+            "return_code": None,
+        }
+
+    def started(self, execution_id, pid, log_path):
+        self.executions[execution_id].update(
+            status=task_loop.Status.RUNNING, pid=pid, log_path=str(log_path)
+        )
+
+    def stopped(self, execution_id, status, return_code):
+        self.executions[execution_id].update(status=status, return_code=return_code)
+
+    def removed(self, execution_id):
+        self.executions.pop(execution_id, None)
+
+    def close(self):
+        pass
+
+
+class PersistentTaskLoopTests(unittest.TestCase):
+    def setUp(self):
+        self._registry = _MemoryRegistry()
+        self._task_queue = None
+        self._receiving_connection = None
+        self._loop_thread = None
+
+    def tearDown(self):
+        for execution_id in list(self._registry.executions):
+            self._send(task_loop.Task.REMOVE_PROCESS, execution_id)
+        self._quit_loop()
+
+    def _start_loop(self):
+        self._task_queue = queue.Queue()
+        self._receiving_connection, sending_connection = Pipe(duplex=False)
+        self._loop_thread = threading.Thread(
+            target=task_loop.loop,
+            args=(self._task_queue, sending_connection),
+            kwargs={"registry_factory": lambda: self._registry},
+        )
+        self._loop_thread.start()
+
+    def _quit_loop(self):
+        self._task_queue.put({task_loop.Field.TASK: task_loop.Task.QUIT})
+        self._loop_thread.join()
+
+    def _send(self, task, execution_id, fields=None):
+        message = {
+            task_loop.Field.TASK: task,
+            task_loop.Field.EXECUTION_ID: execution_id,
+        }
+        if fields is not None:
+            message.update(fields)
+        self._task_queue.put(message)
+
+    def _query(self, task, execution_id, fields=None):
+        fields = dict(fields) if fields is not None else {}
+        fields[task_loop.Field.REQUEST_ID] = execution_id
+        self._send(task, execution_id, fields)
+        request_id, response = self._receiving_connection.recv()
+        self.assertEqual(request_id, execution_id)
+        return task_loop.unpack_response(response)
+
+    def _wait_for_status(self, execution_id, status):
+        deadline = time.monotonic() + 10.0
+        while self._query(task_loop.Task.SEND_STATUS, execution_id) != status:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.05)
+
+    def _wait_for_lines(self, execution_id, count):
+        deadline = time.monotonic() + 10.0
+        while True:
+            lines = self._query(task_loop.Task.SEND_LOG_LINES, execution_id)
+            if len(lines) >= count:
+                return lines
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.05)
+
+    def test_new_loop_re_attaches_to_running_process(self):
+        self._start_loop()
+        self._send(
+            task_loop.Task.START_PROCESS,
+            "solve",
+            {
+                task_loop.Field.PROCESS_COMMAND: sys.executable,
+                task_loop.Field.PROCESS_ARGUMENTS: [
+                    "-u",
+                    "-c",
+                    "import time; print('before'); time.sleep(0.5); print('after'); "
+                    "time.sleep(1000)",
+                ],
+            },
+        )
+        self.assertEqual(self._wait_for_lines("solve", 1), ["before\n"])
+        self._quit_loop()
+        self.assertEqual(
+            self._registry.executions["solve"]["status"], task_loop.Status.RUNNING
+        )
+        self._start_loop()
+        self.assertEqual(
+            self._query(task_loop.Task.SEND_STATUS, "solve"), task_loop.Status.RUNNING
+        )
+        self.assertEqual(self._wait_for_lines("solve", 2), ["before\n", "after\n"])
+        self._send(task_loop.Task.ABORT_PROCESS, "solve")
+        self._wait_for_status("solve", task_loop.Status.ABORTED)
+        self.assertEqual(
+            self._registry.executions["solve"]["status"], task_loop.Status.ABORTED
+        )
+
+    def test_process_that_exited_unobserved_is_marked_finished(self):
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        log_path = Path(temp_dir.name, "execution.log")
+        log_path.write_text("last words\n", encoding="utf-8")
+        self._registry.queued("lost", sys.executable, [], {}, 0, task_loop.Limits())
+        self._registry.started("lost", None, log_path)
+        self._start_loop()
+        self._wait_for_status("lost", task_loop.Status.FINISHED)
+        self.assertEqual(
+            self._query(task_loop.Task.SEND_RETURN_CODE, "lost"),
+            task_loop.LOST_RETURN_CODE,
+        )
+        self.assertEqual(self._wait_for_lines("lost", 1), ["last words\n"])
+        self.assertEqual(
+            self._registry.executions["lost"]["return_code"],
+            task_loop.LOST_RETURN_CODE,
+        )
+
+
 class ExecutionsViewTests(unittest.TestCase):
     def test_arguments(self):
         project_path = Path("path", "to", "project")
-        mod_script_path = Path("path", "to", "mod script")
-        arguments = executions_view.solve_model_interpreter_arguments(
-            project_path, mod_script_path
-        )
+        arguments = executions_view.solve_model_interpreter_arguments(project_path)
         expected = [
             "-mspinetoolbox",
             "--mod-script",
-            str(mod_script_path),
+            str(executions_view.SOLVE_MODEL_MOD_SCRIPT),
             "--execute-only",
             str(project_path),
             "--select",
@@ -2460,51 +3331,836 @@ class ExecutionsViewTests(unittest.TestCase):
         ]
         self.assertEqual(arguments, expected)
 
+    def test_arguments_with_results_ingest(self):
+        project_path = Path("path", "to", "project")
+        arguments = executions_view.solve_model_interpreter_arguments(
+            project_path, ingest_results=True
+        )
+        expected = [
+            "-mflextool3.results_ingest",
+            str(project_path),
+            str(executions_view.SOLVE_MODEL_MOD_SCRIPT),
+        ]
+        self.assertEqual(arguments, expected)
 
-class ExecutionsInterfaceTests(TestCase):
-    baron = None
-    executions_url = reverse("flextool3:executions")
-
-    @classmethod
-    def setUpTestData(cls):
-        cls.baron = User(username="baron", password="")
-        cls.baron.set_password("secretbaron")
-        cls.baron.save()
+    @override_settings(FLEXTOOL_STORED_LOG_LINES=2)
+    def test_stored_log_keeps_latest_lines(self):
+        job = executions_view.Job("solve", line_count=5)
+        with mock.patch.object(
+            executions_view.executor, "read_log", return_value=["line 3\n", "line 4\n"]
+        ) as read_log:
+            log = executions_view._stored_log(job)
+        read_log.assert_called_once_with("solve", 3)
+        self.assertEqual(log, "... 3 earlier lines omitted ...\nline 3\nline 4\n")
+        job.line_count = 2
+        with mock.patch.object(
+            executions_view.executor, "read_log", return_value=["line 0\n", "line 1\n"]
+        ) as read_log:
+            log = executions_view._stored_log(job)
+        read_log.assert_called_once_with("solve", 0)
+        self.assertEqual(log, "line 0\nline 1\n")
+
+    def test_parallel_solve_splits_scenarios_into_jobs(self):
+        project = Project(id=23, name="my_project", path=str(Path("path", "to")))
+        execution = executions_view.SolveModel(
+            scenarios=["base", "high_price"], parallel=True
+        )
+        jobs_and_arguments = execution.job_arguments(project)
+        jobs = [job for job, _, _ in jobs_and_arguments]
+        self.assertEqual(
+            [job.executor_id for job in jobs], [(23, "base"), (23, "high_price")]
+        )
+        self.assertEqual([job.label for job in jobs], ["base", "high_price"])
+        for job, arguments, environment in jobs_and_arguments:
+            self.assertEqual(arguments[2], str(executions_view.SOLVE_MODEL_MOD_SCRIPT))
+            self.assertEqual(
+                json.loads(environment[executions_view.SCENARIOS_VARIABLE]),
+                [job.label],
+            )
+        with override_settings(FLEXTOOL_DIRECT_RESULTS_INGEST=False):
+            jobs_and_arguments = execution.job_arguments(project)
+        for _, arguments, _ in jobs_and_arguments:
+            self.assertEqual(arguments[0], "-mflextool3.results_ingest")
+            self.assertEqual(arguments[-1], results_ingest.IMPORTER_OPTION)
+
+    def test_serial_solve_is_single_job(self):
+        project = Project(id=23, name="my_project", path=str(Path("path", "to")))
+        execution = executions_view.SolveModel(scenarios=["base", "high_price"])
+        jobs_and_arguments = execution.job_arguments(project)
+        self.assertEqual(len(jobs_and_arguments), 1)
+        job, _, environment = jobs_and_arguments[0]
+        self.assertEqual(job.executor_id, 23)
+        self.assertEqual(
+            json.loads(environment[executions_view.SCENARIOS_VARIABLE]),
+            ["base", "high_price"],
+        )
 
-    def test_current_execution_creates_yet_to_run_execution_when_needed(self):
-        with new_project(self.baron):
-            with login_as_baron(self.client) as login_successful:
-                self.assertTrue(login_successful)
-                response = self.client.post(
-                    self.executions_url,
-                    {"type": "current execution?", "projectId": 1},
-                    content_type="application/json",
+    def test_parallel_job_has_results_only_for_its_own_scenario(self):
+        with TemporaryDirectory() as temp_dir:
+            project = Project(id=23, name="my_project", path=temp_dir)
+            execution = executions_view.SolveModel(
+                scenarios=["base", "high_price"],
+                parallel=True,
+                execution_time=datetime(2024, 1, 2, 3, 4, tzinfo=timezone.utc),
+                execution_time_offset=7200,
+            )
+            base_job = executions_view.Job((23, "base"), "base")
+            high_price_job = executions_view.Job((23, "high_price"), "high_price")
+            self.assertFalse(execution.has_results(project, base_job))
+            url = "sqlite:///" + str(Path(temp_dir) / PATH_TO_RESULT_DATABASE)
+            with open_database(url, create=True) as db_map:
+                import_alternatives(
+                    db_map,
+                    (
+                        "base__Import_Flex3@2024-01-02T05:05:00",
+                        "high_price__Import_Flex3@2024-01-02T04:00:00",
+                    ),
                 )
-                self.assertEqual(response.status_code, 200)
-                content = json.loads(response.content)
-                self.assertEqual(content, {"status": "YS", "scenarios": []})
+                db_map.commit_session("Add test data.")
+            self.assertTrue(execution.has_results(project, base_job))
+            self.assertFalse(execution.has_results(project, high_price_job))
+
+    def test_combined_status_of_jobs(self):
+        Job = executions_view.Job
+        Status = executions_view.Status
+        jobs = [Job(1, status=Status.FINISHED), Job(2, status=Status.QUEUED)]
+        self.assertEqual(executions_view._combined_status(jobs), Status.QUEUED)
+        jobs.append(Job(3, status=Status.RUNNING))
+        self.assertEqual(executions_view._combined_status(jobs), Status.RUNNING)
+        jobs = [Job(1, status=Status.FINISHED), Job(2, status=Status.ERROR)]
+        self.assertEqual(executions_view._combined_status(jobs), Status.ERROR)
+        jobs = [Job(1, status=Status.FINISHED), Job(2, status=Status.FINISHED)]
+        self.assertEqual(executions_view._combined_status(jobs), Status.FINISHED)
+
+    def test_execution_events_send_log_lines_since_offset(self):
+        project = Project(id=23, name="my_project", path=str(Path("path", "to")))
+        execution = executions_view.SolveModel(status=executions_view.Status.FINISHED)
+        execution.log.extend(["first", "second", "third"])
+        execution.log_line_count = 3
+        executions_view._executions[project.id] = execution
+        try:
+            events = list(executions_view._execution_events(project, 1))
+        finally:
+            del executions_view._executions[project.id]
+        self.assertEqual(
+            events,
+            [
+                'id: 3\nevent: log\ndata: {"log": ["second", "third"]}\n\n',
+                'event: status\ndata: {"status": "OK"}\n\n',
+            ],
+        )
 
+    def test_asynchronous_execution_events_send_log_lines_since_offset(self):
+        project = Project(id=23, name="my_project", path=str(Path("path", "to")))
+        execution = executions_view.SolveModel(status=executions_view.Status.FINISHED)
+        execution.log.extend(["first", "second", "third"])
+        execution.log_line_count = 3
+        executions_view._executions[project.id] = execution
+
+        async def collect_events():
+            return [
+                event async for event in executions_view._aexecution_events(project, 2)
+            ]
+
+        try:
+            events = asyncio.run(collect_events())
+        finally:
+            del executions_view._executions[project.id]
+        self.assertEqual(
+            events,
+            [
+                'id: 3\nevent: log\ndata: {"log": ["third"]}\n\n',
+                'event: status\ndata: {"status": "OK"}\n\n',
+            ],
+        )
 
-class SummaryInterfaceTests(TestCase):
-    baron = None
-    summary_url = reverse("flextool3:summary")
+    def test_cached_scenarios_are_not_solved(self):
+        project = Project(id=23, name="my_project", path=str(Path("path", "to")))
+        execution = executions_view.SolveModel(
+            scenarios=["base", "high_price"], parallel=True, cached={"base": 5}
+        )
+        jobs_and_arguments = execution.job_arguments(project)
+        self.assertEqual(len(jobs_and_arguments), 1)
+        job, _, environment = jobs_and_arguments[0]
+        self.assertEqual(job.executor_id, 23)
+        self.assertEqual(
+            json.loads(environment[executions_view.SCENARIOS_VARIABLE]),
+            ["high_price"],
+        )
+        execution.cached["high_price"] = 7
+        self.assertEqual(execution.job_arguments(project), [])
 
-    _SUMMARY = """"Diagnostic results from all solves. Output at (UTC): 2022-05-04T11:00:25Z"
 
-"Solve",y2020
-"Total cost obj. function (M CUR)",59546.4047356,"Minimized total system cost as given by the solver (includes all penalty costs)"
-"Total cost calculated full horizon (M CUR)",59546.4047356,"Annualized operational, penalty and investment costs"
-"Total cost calculated realized periods (M CUR)",29773.5447224
-"Time in use in years",0.00547945205479,"The amount of time the solve includes - calculated in years"
+class FingerprintTests(unittest.TestCase):
+    def test_fingerprint_changes_only_with_scenario_input(self):
+        with TemporaryDirectory() as temp_dir:
+            database_path = Path(temp_dir, "input.sqlite")
+            project = mock.MagicMock()
+            project.database_path.return_value = database_path
+            db_map = DatabaseMapping("sqlite:///" + str(database_path), create=True)
+            try:
+                import_object_classes(db_map, ("node",))
+                import_objects(db_map, (("node", "east"),))
+                import_object_parameters(db_map, (("node", "inflow"),))
+                import_alternatives(db_map, ("extra",))
+                import_scenarios(db_map, ("base", "extended"))
+                import_scenario_alternatives(
+                    db_map, (("base", "Base"), ("extended", "Base", "extra"))
+                )
+                import_object_parameter_values(
+                    db_map, (("node", "east", "inflow", 2.0, "Base"),)
+                )
+                db_map.commit_session("Add test data.")
+            finally:
+                db_map.connection.close()
+            base = fingerprint.scenario_input_fingerprint(project, "base", "v1")
+            extended = fingerprint.scenario_input_fingerprint(project, "extended", "v1")
+            self.assertEqual(
+                fingerprint.scenario_input_fingerprint(project, "base", "v1"), base
+            )
+            self.assertNotEqual(
+                fingerprint.scenario_input_fingerprint(project, "base", "v2"), base
+            )
+            db_map = DatabaseMapping("sqlite:///" + str(database_path))
+            try:
+                import_object_parameter_values(
+                    db_map, (("node", "east", "inflow", 3.0, "extra"),)
+                )
+                db_map.commit_session("Change extra alternative.")
+            finally:
+                db_map.connection.close()
+            self.assertEqual(
+                fingerprint.scenario_input_fingerprint(project, "base", "v1"), base
+            )
+            self.assertNotEqual(
+                fingerprint.scenario_input_fingerprint(project, "extended", "v1"),
+                extended,
+            )
 
-Emissions
-"CO2 (Mt)",0.59568,"System-wide annualized CO2 emissions for all periods"
-"CO2 (Mt)",0.29784,"System-wide annualized CO2 emissions for realized periods"
+    def test_solver_version_depends_on_model_files(self):
+        with TemporaryDirectory() as temp_dir:
+            model_directory = Path(temp_dir, "flextool")
+            model_directory.mkdir()
+            model_file = model_directory / "flextool.mod"
+            model_file.write_text("param p;")
+            version = fingerprint.solver_version(temp_dir)
+            Path(temp_dir, "notes.txt").write_text("unrelated")
+            self.assertEqual(fingerprint.solver_version(temp_dir), version)
+            model_file.write_text("param q;")
+            self.assertNotEqual(fingerprint.solver_version(temp_dir), version)
 
-"Possible issues (creating or removing energy/matter, creating inertia, changing non-synchronous generation to synchronous)"
-Created, NodeA, p2020, 6259.3
-Created, NodeA, p2025, 6259.3
-Created, NodeB, p2020, 79.569
+
+def write_results_importer_specification(project_directory, tables):
+    """Writes project file and results importer specification with given tables.
+
+    Args:
+        project_directory (Path): path to project directory
+        tables (dict): mapping from table name to entity class name,
+            object class names and parameter name
+    """
+    table_mappings = {}
+    for table_name, (entity_class, object_classes, parameter) in tables.items():
+        if len(object_classes) == 1:
+            mapping = [
+                {
+                    "map_type": "ObjectClass",
+                    "position": "hidden",
+                    "value": entity_class,
+                },
+                {"map_type": "Object", "position": -1},
+            ]
+        else:
+            mapping = [
+                {
+                    "map_type": "RelationshipClass",
+                    "position": "hidden",
+                    "value": entity_class,
+                },
+                *(
+                    {
+                        "map_type": "RelationshipClassObjectClass",
+                        "position": "hidden",
+                        "value": object_class,
+                    }
+                    for object_class in object_classes
+                ),
+                {"map_type": "Relationship", "position": "hidden", "value": "r"},
+                *(
+                    {"map_type": "RelationshipObject", "position": -(row + 1)}
+                    for row in range(len(object_classes))
+                ),
+            ]
+        mapping.append(
+            {
+                "map_type": "ParameterDefinition",
+                "position": "hidden",
+                "value": parameter,
+            }
+        )
+        table_mappings[table_name] = [{table_name: {"mapping": mapping}}]
+    specification_path = Path(".spinetoolbox", "specifications", "Importer", "ir.json")
+    (project_directory / specification_path).parent.mkdir(parents=True)
+    (project_directory / specification_path).write_text(
+        json.dumps(
+            {
+                "name": "Import results",
+                "item_type": "Importer",
+                "mapping": {
+                    "table_mappings": table_mappings,
+                    "selected_tables": list(table_mappings),
+                },
+            }
+        )
+    )
+    (project_directory / ".spinetoolbox" / "project.json").write_text(
+        json.dumps(
+            {
+                "project": {
+                    "specifications": {
+                        "Importer": [
+                            {
+                                "type": "path",
+                                "relative": True,
+                                "path": str(specification_path),
+                            }
+                        ]
+                    }
+                },
+                "items": {
+                    results_ingest.IMPORTER_NAME: {
+                        "type": "Importer",
+                        "specification": "Import results",
+                    }
+                },
+            }
+        )
+    )
+
+
+class ResultsIngestTests(unittest.TestCase):
+    def test_import_lock_serialises_imports(self):
+        with TemporaryDirectory() as temp_dir:
+            acquired = threading.Event()
+
+            def import_results():
+                with results_ingest.import_lock(Path(temp_dir)):
+                    acquired.set()
+
+            with results_ingest.import_lock(Path(temp_dir)):
+                thread = threading.Thread(target=import_results)
+                thread.start()
+                self.assertFalse(acquired.wait(0.2))
+            self.assertTrue(acquired.wait(5.0))
+            thread.join()
+
+    def test_importer_option_runs_importer_under_import_lock(self):
+        with TemporaryDirectory() as temp_dir:
+            lock_held = []
+            acquired = threading.Event()
+
+            def acquire_lock():
+                with results_ingest.import_lock(Path(temp_dir)):
+                    acquired.set()
+
+            waiter = threading.Thread(target=acquire_lock)
+
+            def run_toolbox(project_directory, mod_script, items):
+                if items == results_ingest.IMPORT_ITEMS:
+                    waiter.start()
+                    lock_held.append(not acquired.wait(0.2))
+                return 0
+
+            with mock.patch.object(
+                results_ingest, "_run_toolbox", side_effect=run_toolbox
+            ) as toolbox:
+                return_code = results_ingest.main(
+                    [temp_dir, "mod_script.py", results_ingest.IMPORTER_OPTION]
+                )
+            self.assertEqual(return_code, 0)
+            self.assertEqual(
+                [call.args[2] for call in toolbox.call_args_list],
+                [results_ingest.SOLVE_ITEMS, results_ingest.IMPORT_ITEMS],
+            )
+            self.assertEqual(lock_held, [True])
+            self.assertTrue(acquired.wait(5.0))
+            waiter.join()
+
+    def test_ingest_writes_object_and_relationship_tables(self):
+        with TemporaryDirectory() as temp_dir:
+            output_directory = Path(temp_dir, "output")
+            output_directory.mkdir()
+            (output_directory / "summary_solve.csv").write_text("Summary\n")
+            (output_directory / "node__balance.csv").write_text(
+                "solve,period,time,east,west\n"
+                "y2020,p2020,t01,1.5,-1.5\n"
+                "y2020,p2020,t02,2.0,\n"
+            )
+            (output_directory / "unit__node__flow.csv").write_text(
+                ",,coal\nsolve,period,east\ny2020,p2020,3.0\n"
+            )
+            (output_directory / "model__objective.csv").write_text("total\n42.0\n")
+            write_results_importer_specification(
+                Path(temp_dir),
+                {
+                    "node__balance": ("node", ("node",), "balance"),
+                    "unit__node__flow": ("unit__outputNode", ("unit", "node"), "flow"),
+                    "model__objective": ("model", ("model",), "objective"),
+                },
+            )
+            definitions = results_ingest.read_table_definitions(Path(temp_dir))
+            database_path = Path(temp_dir, "Results.sqlite")
+            results_ingest.check_layout(output_directory, definitions)
+            results_ingest.ingest_output(
+                database_path,
+                output_directory,
+                "base__Import_results@2023-05-23T15:23:05",
+                definitions,
+            )
+            db_map = DatabaseMapping("sqlite:///" + str(database_path))
+            try:
+                values = {
+                    (row.entity_class_name, row.entity_name, row.parameter_name): (
+                        from_database(row.value, row.type)
+                    )
+                    for row in db_map.query(db_map.entity_parameter_value_sq)
+                }
+                alternatives = {
+                    row.alternative_name
+                    for row in db_map.query(db_map.entity_parameter_value_sq)
+                }
+            finally:
+                db_map.connection.close()
+        self.assertEqual(alternatives, {"base__Import_results@2023-05-23T15:23:05"})
+        self.assertEqual(len(values), 4)
+        self.assertEqual(values[("model", "total", "objective")], 42.0)
+        east = values[("node", "east", "balance")]
+        self.assertEqual(east.index_name, "solve")
+        self.assertEqual(east.get_value("y2020").index_name, "period")
+        time_series = east.get_value("y2020").get_value("p2020")
+        self.assertEqual(time_series.index_name, "time")
+        self.assertEqual(list(time_series.indexes), ["t01", "t02"])
+        self.assertEqual(list(time_series.values), [1.5, 2.0])
+        west = values[("node", "west", "balance")].get_value("y2020")
+        self.assertEqual(list(west.get_value("p2020").values), [-1.5])
+        flow_key = next(key for key in values if key[0] == "unit__outputNode")
+        self.assertEqual(
+            values[flow_key].get_value("y2020"),
+            Map(["p2020"], [3.0], index_name="period"),
+        )
+
+    def test_ingest_writes_value_index_catalogue(self):
+        with TemporaryDirectory() as temp_dir:
+            output_directory = Path(temp_dir, "output")
+            output_directory.mkdir()
+            (output_directory / "node__balance.csv").write_text(
+                "solve,period,time,east,west\n"
+                "y2020,p2020,t02,1.5,-1.5\n"
+                "y2020,p2020,t01,2.0,\n"
+            )
+            (output_directory / "model__objective.csv").write_text("total\n42.0\n")
+            definitions = {
+                "node__balance": results_ingest.TableDefinition(
+                    "node", ("node",), "balance"
+                ),
+                "model__objective": results_ingest.TableDefinition(
+                    "model", ("model",), "objective"
+                ),
+            }
+            database_path = Path(temp_dir, "Results.sqlite")
+            alternative_name = "base__Import_results@2023-05-23T15:23:05"
+            results_ingest.ingest_output(
+                database_path, output_directory, alternative_name, definitions
+            )
+            catalogue = value_index_catalogue.read_catalogue(
+                database_path, alternative_name
+            )
+            db_map = DatabaseMapping("sqlite:///" + str(database_path))
+            try:
+                alternative_id = (
+                    db_map.query(db_map.alternative_sq)
+                    .filter(db_map.alternative_sq.c.name == alternative_name)
+                    .one()
+                    .id
+                )
+                built_catalogue = value_index_catalogue.build_catalogue(
+                    db_map, alternative_id
+                )
+            finally:
+                db_map.connection.close()
+        entries = {
+            (entry["class_name"], entry["parameter_name"]): entry["dimensions"]
+            for entry in catalogue
+        }
+        self.assertEqual(
+            entries[("node", "balance")],
+            [
+                {"index_name": "solve", "depth": 0, "indexes": ["y2020"]},
+                {"index_name": "period", "depth": 1, "indexes": ["p2020"]},
+                {"index_name": "time", "depth": 2, "indexes": ["t01", "t02"]},
+            ],
+        )
+        self.assertEqual(entries[("model", "objective")], [])
+        built_entries = {
+            (entry["class_name"], entry["parameter_name"]): entry["dimensions"]
+            for entry in built_catalogue
+        }
+        self.assertEqual(
+            built_entries[("node", "balance")], entries[("node", "balance")]
+        )
+
+    def test_unknown_layout_writes_nothing(self):
+        with TemporaryDirectory() as temp_dir:
+            output_directory = Path(temp_dir, "output")
+            output_directory.mkdir()
+            (output_directory / "node__balance.csv").write_text(
+                "solve,east\ny2020,1.0\n"
+            )
+            (output_directory / "node__state.csv").write_text(
+                "solve,east\ny2020,full\n"
+            )
+            (output_directory / "unknown.csv").write_text("a,b\n")
+            definitions = {
+                "node__balance": results_ingest.TableDefinition(
+                    "node", ("node",), "balance"
+                ),
+                "node__state": results_ingest.TableDefinition(
+                    "node", ("node",), "state"
+                ),
+            }
+            with self.assertRaises(UnknownOutputLayout):
+                results_ingest.check_layout(output_directory, definitions)
+            (output_directory / "unknown.csv").unlink()
+            with self.assertRaises(UnknownOutputLayout):
+                results_ingest.check_layout(output_directory, definitions)
+            database_path = Path(temp_dir, "Results.sqlite")
+            with self.assertRaises(UnknownOutputLayout):
+                results_ingest.ingest_output(
+                    database_path,
+                    output_directory,
+                    "base__Import_results@2023",
+                    definitions,
+                )
+            db_map = DatabaseMapping("sqlite:///" + str(database_path))
+            try:
+                value_count = db_map.query(db_map.parameter_value_sq).count()
+                alternatives = {row.name for row in db_map.query(db_map.alternative_sq)}
+            finally:
+                db_map.connection.close()
+        self.assertEqual(value_count, 0)
+        self.assertEqual(alternatives, {"Base"})
+
+    def test_tables_must_match_importer_specification(self):
+        with TemporaryDirectory() as temp_dir:
+            output_directory = Path(temp_dir, "output")
+            output_directory.mkdir()
+            (output_directory / "node__balance.csv").write_text("solve,east\n")
+            with self.assertRaises(UnknownOutputLayout):
+                results_ingest.read_table_definitions(Path(temp_dir))
+            write_results_importer_specification(
+                Path(temp_dir),
+                {"node__balance": ("node__node", ("node", "node"), "balance")},
+            )
+            definitions = results_ingest.read_table_definitions(Path(temp_dir))
+            self.assertEqual(
+                definitions,
+                {
+                    "node__balance": results_ingest.TableDefinition(
+                        "node__node", ("node", "node"), "balance"
+                    )
+                },
+            )
+            with self.assertRaisesRegex(UnknownOutputLayout, "expected 2 header rows"):
+                results_ingest.check_layout(output_directory, definitions)
+
+    def test_output_directories_lists_latest_runs_since_time(self):
+        with TemporaryDirectory() as temp_dir:
+            project_directory = Path(temp_dir)
+            tool_output = (
+                project_directory / ".spinetoolbox" / "items" / "flextool3" / "output"
+            )
+            filter_directory = tool_output / "dc03f1ea3aebbee9146b9cf380472f6045c0927d"
+            for run in ("2023-05-23T14.05.23", "2023-05-23T15.23.05"):
+                (filter_directory / run / "output").mkdir(parents=True)
+            (filter_directory / ".filter_id").write_text(
+                "my_scenario, FlexTool3 - Input_data\n"
+            )
+            other_directory = tool_output / "9c1185a5c5e9fc54612808977ee8f548b2258d31"
+            (other_directory / "2023-05-23T15.23.05" / "output").mkdir(parents=True)
+            (other_directory / ".filter_id").write_text(
+                "FlexTool3, other_scenario - Input_data\n"
+            )
+            (tool_output / "failed").mkdir()
+            outputs = list(
+                results_ingest.output_directories(
+                    project_directory, datetime(2023, 5, 23, 14, 30), ["my_scenario"]
+                )
+            )
+            self.assertEqual(
+                outputs,
+                [("my_scenario", filter_directory / "2023-05-23T15.23.05" / "output")],
+            )
+            outputs = list(
+                results_ingest.output_directories(
+                    project_directory, datetime(2023, 5, 23, 14, 30)
+                )
+            )
+            self.assertEqual(
+                {scenario for scenario, _ in outputs}, {"my_scenario", "other_scenario"}
+            )
+            outputs = list(
+                results_ingest.output_directories(
+                    project_directory, datetime(2023, 5, 23, 16, 0)
+                )
+            )
+            self.assertEqual(outputs, [])
+
+
+class ExecutionsInterfaceTests(TestCase):
+    baron = None
+    executions_url = reverse("flextool3:executions")
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.baron = User(username="baron", password="")
+        cls.baron.set_password("secretbaron")
+        cls.baron.save()
+
+    def test_current_execution_creates_yet_to_run_execution_when_needed(self):
+        with new_project(self.baron):
+            with login_as_baron(self.client) as login_successful:
+                self.assertTrue(login_successful)
+                response = self.client.post(
+                    self.executions_url,
+                    {"type": "current execution?", "projectId": 1},
+                    content_type="application/json",
+                )
+                self.assertEqual(response.status_code, 200)
+                content = json.loads(response.content)
+                self.assertEqual(content, {"status": "YS", "scenarios": []})
+
+
+class ExecutionPersistenceTests(TestCase):
+    baron = None
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.baron = User(username="baron", password="")
+        cls.baron.save()
+
+    def test_execution_is_restored_from_database(self):
+        project = Project(user=self.baron, name="my_project", path="path")
+        project.save()
+        execution = executions_view.SolveModel(
+            status=executions_view.Status.RUNNING,
+            scenarios=["base", "high_price"],
+            parallel=True,
+            execution_time=datetime(2024, 1, 2, 3, 4, tzinfo=timezone.utc),
+            execution_time_offset=7200,
+            jobs=[
+                executions_view.Job(
+                    (project.id, "base"), "base", executions_view.Status.FINISHED
+                ),
+                executions_view.Job(
+                    (project.id, "high_price"),
+                    "high_price",
+                    executions_view.Status.RUNNING,
+                ),
+            ],
+        )
+        executions_view._store_execution(project.id, execution)
+        try:
+            restored = executions_view._find_execution(project.id)
+            self.assertIsNot(restored, execution)
+            self.assertEqual(restored, execution)
+        finally:
+            executions_view._executions.pop(project.id, None)
+        with mock.patch.object(executions_view, "_discard_jobs") as discard_jobs:
+            executions_view.clear_execution(project.id)
+            discard_jobs.assert_called_once()
+        self.assertFalse(ProjectExecution.objects.filter(project=project).exists())
+        self.assertIsNone(executions_view._find_execution(project.id))
+
+
+class ReusedResultsTests(TestCase):
+    baron = None
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.baron = User(username="baron", password="")
+        cls.baron.save()
+
+    def setUp(self):
+        self._temp_dir = TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self._project = Project(
+            user=self.baron, name="my_project", path=self._temp_dir.name
+        )
+        self._project.save()
+        self._scenario = Scenario(project=self._project, name="base")
+        self._scenario.save()
+
+    def _add_execution(self, hour, reused_from=None):
+        scenario_execution = ScenarioExecution(
+            scenario=self._scenario,
+            execution_time=datetime(2024, 1, 2, hour, tzinfo=timezone.utc),
+            execution_time_offset=0,
+            log="",
+            reused_from=reused_from,
+            alternative_id=5 if reused_from is None else None,
+        )
+        scenario_execution.save()
+        return scenario_execution
+
+    def test_deleting_origin_hands_results_over_to_earliest_reuse(self):
+        origin = self._add_execution(1)
+        heir = self._add_execution(2, reused_from=origin)
+        other = self._add_execution(3, reused_from=origin)
+        with self.assertRaises(ProtectedError):
+            ScenarioExecution.objects.filter(id=origin.id).delete()
+        origin.delete()
+        heir.refresh_from_db()
+        other.refresh_from_db()
+        self.assertIsNone(heir.reused_from)
+        self.assertEqual(heir.alternative_id, 5)
+        self.assertEqual(other.reused_from, heir)
+        self.assertTrue(heir.owns_results())
+
+    def test_notes_do_not_store_reused_executions(self):
+        origin = self._add_execution(1)
+        execution = executions_view.SolveModel(
+            scenarios=["base"],
+            cached={"base": origin.id},
+            fingerprints={"base": "f"},
+            execution_time=datetime(2024, 1, 2, 5, tzinfo=timezone.utc),
+            execution_time_offset=0,
+        )
+        self.assertEqual(len(execution.notes(self._project)), 1)
+        self.assertEqual(ScenarioExecution.objects.count(), 1)
+        execution.store_replaced_jobs(self._project)
+        reuse = ScenarioExecution.objects.get(reused_from=origin)
+        self.assertEqual(reuse.input_fingerprint, "f")
+
+    def test_reused_executions_share_origins_results_alternative(self):
+        origin = self._add_execution(1)
+        reuse = self._add_execution(2, reused_from=origin)
+        alternatives = analysis_view._execution_alternatives(
+            self._project, {"scenarioExecutionIds": [origin.id, reuse.id]}
+        )
+        self.assertEqual(list(alternatives), [5])
+        self.assertEqual([e.id for e in alternatives[5]], [origin.id, reuse.id])
+
+
+class ExecutionRegistryTests(unittest.TestCase):
+    def test_operation_on_locked_database_is_retried(self):
+        failures = [OperationalError("database is locked")]
+
+        @execution_registry._fail_safe()
+        def write(registry, execution_id):
+            if failures:
+                raise failures.pop()
+            return execution_id
+
+        with mock.patch.object(execution_registry, "_RETRY_DELAYS", (0.0,)):
+            self.assertEqual(write(None, 23), 23)
+
+    def test_every_lost_operation_is_logged(self):
+        attempts = []
+
+        @execution_registry._fail_safe(default="lost")
+        def write(registry, execution_id):
+            attempts.append(execution_id)
+            raise OperationalError("database is locked")
+
+        with mock.patch.object(
+            execution_registry, "_RETRY_DELAYS", (0.0, 0.0)
+        ), self.assertLogs(execution_registry.__name__, "ERROR") as logs:
+            self.assertEqual(write(None, 7), "lost")
+            self.assertEqual(write(None, 8), "lost")
+        self.assertEqual(attempts, [7, 7, 7, 8, 8, 8])
+        self.assertEqual(len(logs.records), 2)
+        self.assertIn("for execution 8", logs.records[1].getMessage())
+
+    def test_writes_do_not_block_caller(self):
+        registry = execution_registry.ExecutionRegistry()
+        database_free = threading.Event()
+        writer_threads = []
+
+        def update(**fields):
+            database_free.wait()
+            writer_threads.append(threading.current_thread().name)
+
+        with mock.patch.object(registry, "_model") as model:
+            model.objects.filter.return_value.update.side_effect = update
+            registry.stopped(23, task_loop.Status.FINISHED, 0)
+            registry.stopped(24, task_loop.Status.FINISHED, 0)
+            self.assertEqual(writer_threads, [])
+            database_free.set()
+            registry.close()
+        self.assertEqual(writer_threads, ["Execution registry writer"] * 2)
+
+
+class ResourceUsageTests(TestCase):
+    baron = None
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.baron = User(username="baron", password="")
+        cls.baron.save()
+
+    def test_scenario_list_contains_recorded_resource_usage(self):
+        project = Project(user=self.baron, name="my_project", path="path")
+        project.save()
+        usage = {
+            "wall_time": 12.5,
+            "user_cpu_time": 10.0,
+            "system_cpu_time": 0.5,
+            "peak_memory": 2**31,
+            "read_bytes": 4096,
+            "write_bytes": 8192,
+        }
+        executions_view._save_scenarios(
+            project,
+            ["base"],
+            "log",
+            datetime(2024, 1, 2, 3, 4, tzinfo=timezone.utc),
+            0,
+            usage,
+        )
+        executions_view._save_scenarios(
+            project,
+            ["base"],
+            "log",
+            datetime(2024, 1, 2, 3, 5, tzinfo=timezone.utc),
+            0,
+            None,
+        )
+        content = json.loads(summary_view.get_scenario_list(project).content)
+        executions = content["scenarios"]["base"]
+        self.assertEqual(len(executions), 2)
+        self.assertNotIn("resource_usage", executions[0])
+        self.assertEqual(executions[1]["resource_usage"], usage)
+
+
+class SummaryInterfaceTests(TestCase):
+    baron = None
+    summary_url = reverse("flextool3:summary")
+
+    _SUMMARY = """"Diagnostic results from all solves. Output at (UTC): 2022-05-04T11:00:25Z"
+
+"Solve",y2020
+"Total cost obj. function (M CUR)",59546.4047356,"Minimized total system cost as given by the solver (includes all penalty costs)"
+"Total cost calculated full horizon (M CUR)",59546.4047356,"Annualized operational, penalty and investment costs"
+"Total cost calculated realized periods (M CUR)",29773.5447224
+"Time in use in years",0.00547945205479,"The amount of time the solve includes - calculated in years"
+
+Emissions
+"CO2 (Mt)",0.59568,"System-wide annualized CO2 emissions for all periods"
+"CO2 (Mt)",0.29784,"System-wide annualized CO2 emissions for realized periods"
+
+"Possible issues (creating or removing energy/matter, creating inertia, changing non-synchronous generation to synchronous)"
+Created, NodeA, p2020, 6259.3
+Created, NodeA, p2025, 6259.3
+Created, NodeB, p2020, 79.569
 Created, NodeB, p2025, 79.569
 NonSync, JustA, p2020, 3298.2
 NonSync, JustA, p2025, 3298.2
@@ -2571,6 +4227,110 @@ NonSync, JustA, p2025, 3298.2
                     },
                 )
 
+    def test_get_execution_history_pages_with_cursor(self):
+        with new_project(self.baron) as project:
+            scenarios = {}
+            for name in ("scenario_1", "scenario_2"):
+                scenarios[name] = Scenario(project=project, name=name)
+                scenarios[name].save()
+            for day, name in (
+                (1, "scenario_1"),
+                (2, "scenario_2"),
+                (3, "scenario_1"),
+                (4, "scenario_1"),
+            ):
+                ScenarioExecution(
+                    scenario=scenarios[name],
+                    execution_time=datetime(2022, 5, day, 12, tzinfo=timezone.utc),
+                    execution_time_offset=0,
+                    log="",
+                ).save()
+            with login_as_baron(self.client) as login_successful:
+                self.assertTrue(login_successful)
+                response = self.client.post(
+                    self.summary_url,
+                    {
+                        "type": "execution history?",
+                        "projectId": project.id,
+                        "scenario": "scenario_1",
+                        "limit": 2,
+                    },
+                    content_type="application/json",
+                )
+                self.assertEqual(response.status_code, 200)
+                content = json.loads(response.content)
+                self.assertEqual(
+                    [x["time_stamp"] for x in content["executions"]],
+                    ["2022-05-04T12:00:00+00:00", "2022-05-03T12:00:00+00:00"],
+                )
+                self.assertEqual(
+                    {x["scenario"] for x in content["executions"]}, {"scenario_1"}
+                )
+                self.assertIsNotNone(content["cursor"])
+                response = self.client.post(
+                    self.summary_url,
+                    {
+                        "type": "execution history?",
+                        "projectId": project.id,
+                        "scenario": "scenario_1",
+                        "limit": 2,
+                        "cursor": content["cursor"],
+                    },
+                    content_type="application/json",
+                )
+                content = json.loads(response.content)
+                self.assertEqual(
+                    [x["time_stamp"] for x in content["executions"]],
+                    ["2022-05-01T12:00:00+00:00"],
+                )
+                self.assertIsNone(content["cursor"])
+                response = self.client.post(
+                    self.summary_url,
+                    {
+                        "type": "execution history?",
+                        "projectId": project.id,
+                        "since": "2022-05-02T00:00:00",
+                        "until": "2022-05-04T00:00:00+00:00",
+                    },
+                    content_type="application/json",
+                )
+                content = json.loads(response.content)
+                self.assertEqual(
+                    [(x["scenario"], x["time_stamp"]) for x in content["executions"]],
+                    [
+                        ("scenario_1", "2022-05-03T12:00:00+00:00"),
+                        ("scenario_2", "2022-05-02T12:00:00+00:00"),
+                    ],
+                )
+                response = self.client.post(
+                    self.summary_url,
+                    {
+                        "type": "execution history?",
+                        "projectId": project.id,
+                        "cursor": "not a cursor",
+                    },
+                    content_type="application/json",
+                )
+                self.assertEqual(response.status_code, 400)
+
+    def test_execution_history_is_ordered_by_index(self):
+        project = Project(user=self.baron, name="my_project", path="path")
+        project.save()
+        scenario = Scenario(project=project, name="scenario_1")
+        scenario.save()
+        cursor_time = datetime(2022, 5, 1, 12, tzinfo=timezone.utc)
+        for conditions in (
+            Q(),
+            Q(execution_time__gte=cursor_time)
+            & (
+                Q(execution_time__lt=cursor_time)
+                | Q(execution_time=cursor_time, id__lt=3)
+            ),
+        ):
+            plan = summary_view._scenario_executions(scenario.id, conditions).explain()
+            self.assertIn("USING INDEX", plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+
     def test_get_summary(self):
         with new_project(self.baron) as project:
             scenario = Scenario(project=project, name="my_scenario")
@@ -2740,6 +4500,464 @@ NonSync, JustA, p2025, 3298.2
                 self.assertEqual(content, {"alternative_id": alternative_id})
 
 
+class SummaryStoreTests(unittest.TestCase):
+    _SUMMARY = (
+        '"Diagnostic results"\n'
+        "\n"
+        "Emissions\n"
+        '"CO2 (Mt)",0.59568,"all periods"\n'
+        '"CO2 (Mt)",0.29784,"realized periods"\n'
+        "Created, NodeA, p2020, 6259.3\n"
+    )
+
+    def setUp(self):
+        summary_store.clear_cache()
+
+    def tearDown(self):
+        summary_store.clear_cache()
+
+    def test_summary_is_parsed_once_and_stored_in_columns(self):
+        with TemporaryDirectory() as temp_dir:
+            summary_path = Path(temp_dir, SUMMARY_FILE_NAME)
+            summary_path.write_text(self._SUMMARY, encoding="utf-8")
+            expected = [
+                ["Diagnostic results"],
+                [],
+                ["Emissions"],
+                ["CO2 (Mt)", 0.59568, "all periods"],
+                ["CO2 (Mt)", 0.29784, "realized periods"],
+                ["Created", " NodeA", " p2020", 6259.3],
+            ]
+            self.assertEqual(summary_store.load_summary(summary_path), expected)
+            columns_path = Path(
+                temp_dir, SUMMARY_FILE_NAME + summary_store.COLUMNS_SUFFIX
+            )
+            self.assertTrue(columns_path.exists())
+            with mock.patch.object(summary_store, "_read_columns") as read_columns:
+                self.assertEqual(summary_store.load_summary(summary_path), expected)
+                read_columns.assert_not_called()
+            summary_store.clear_cache()
+            with mock.patch.object(summary_store, "_read_csv") as read_csv:
+                self.assertEqual(summary_store.load_summary(summary_path), expected)
+                read_csv.assert_not_called()
+
+    def test_changed_summary_is_parsed_again(self):
+        with TemporaryDirectory() as temp_dir:
+            summary_path = Path(temp_dir, SUMMARY_FILE_NAME)
+            summary_path.write_text('"Solve",y2020\n', encoding="utf-8")
+            self.assertEqual(
+                summary_store.load_summary(summary_path), [["Solve", "y2020"]]
+            )
+            summary_path.write_text('"Solve",y2020,2.5\n', encoding="utf-8")
+            self.assertEqual(
+                summary_store.load_summary(summary_path), [["Solve", "y2020", 2.5]]
+            )
+            summary_store.clear_cache()
+            self.assertEqual(
+                summary_store.load_summary(summary_path), [["Solve", "y2020", 2.5]]
+            )
+
+    def test_missing_summary_raises(self):
+        with TemporaryDirectory() as temp_dir:
+            summary_path = Path(temp_dir, SUMMARY_FILE_NAME)
+            with self.assertRaises(FlexToolException):
+                summary_store.load_summary(summary_path)
+
+    def test_compare_summaries_requires_integer_ids(self):
+        project = Project(id=23, name="my_project", path="path")
+        for ids in ([1, "2"], [1.0], [True], [[1]]):
+            response = summary_view.compare_summaries(
+                project, {"scenarioExecutionIds": ids}
+            )
+            self.assertEqual(response.status_code, 400)
+
+    def test_numeric_summary_rows_are_keyed_by_section_and_label(self):
+        rows = [
+            ["Emissions"],
+            ["CO2 (Mt)", 0.5, "all periods"],
+            ["CO2 (Mt)", 0.25, "realized periods"],
+            ["Created", " NodeA", " p2020", 6259.3],
+        ]
+        self.assertEqual(
+            summary_view._numeric_summary_rows(rows),
+            {
+                ("Emissions", ("CO2 (Mt)",), 0): [0.5],
+                ("Emissions", ("CO2 (Mt)",), 1): [0.25],
+                ("Emissions", ("Created", "NodeA", "p2020"), 0): [6259.3],
+            },
+        )
+
+
+class ValueColumnsTests(unittest.TestCase):
+    @staticmethod
+    def _record(objects, value):
+        blob, value_type = to_database(value)
+        return {
+            "class": "node",
+            "object_classes": ["node"],
+            "objects": objects,
+            "parameter": "price",
+            "scenario": "Base",
+            "time_stamp": "2022-06-01T11:14:00+00:00",
+            "type": value_type,
+            "value": str(blob, encoding="utf-8"),
+        }
+
+    def test_series_share_index_columns(self):
+        stamps = ["2022-01-01T00:00:00", "2022-01-01T01:00:00"]
+        records = [
+            self._record(
+                ["north"],
+                Map(
+                    ["s1"],
+                    [TimeSeriesVariableResolution(stamps, [1.0, 2.0], False, False)],
+                    index_name="solve",
+                ),
+            ),
+            self._record(
+                ["south"],
+                Map(
+                    ["s1"],
+                    [TimeSeriesVariableResolution(stamps, [3.0, 4.0], False, False)],
+                    index_name="solve",
+                ),
+            ),
+            self._record(["west"], 5.0),
+            self._record(["east"], "missing"),
+        ]
+        payload = value_columns.encode_values(records)
+        self.assertTrue(payload.startswith(value_columns.MAGIC))
+        metadata, data = value_columns.decode_values(payload)
+        self.assertEqual(list(data), [1.0, 2.0, 3.0, 4.0, 5.0])
+        self.assertEqual(metadata["index_columns"], [["s1", "s1"], stamps])
+        series = metadata["series"]
+        self.assertEqual(len(series), 4)
+        self.assertEqual(series[0]["objects"], ["north"])
+        self.assertEqual(series[0]["index_names"], ["solve", "t"])
+        self.assertEqual(series[0]["indexes"], [0, 1])
+        self.assertEqual((series[0]["offset"], series[0]["length"]), (0, 2))
+        self.assertEqual(series[1]["indexes"], [0, 1])
+        self.assertEqual((series[1]["offset"], series[1]["length"]), (2, 2))
+        self.assertEqual(series[2]["indexes"], [])
+        self.assertEqual((series[2]["offset"], series[2]["length"]), (4, 1))
+        self.assertEqual(series[3]["length"], 0)
+        self.assertEqual(series[3]["value"], '"missing"')
+        self.assertNotIn("type", series[0])
+        self.assertNotIn("value", series[0])
+
+    def test_data_is_aligned(self):
+        for objects in (["n"], ["node_with_longer_name"], ["x" * 13]):
+            payload = value_columns.encode_values([self._record(objects, 2.5)])
+            metadata_size = int.from_bytes(
+                payload[len(value_columns.MAGIC) : len(value_columns.MAGIC) + 4],
+                "little",
+            )
+            data_offset = len(value_columns.MAGIC) + 4 + metadata_size
+            self.assertEqual(data_offset % 8, 0)
+            self.assertEqual(len(payload) - data_offset, 8)
+
+
+class ValueAggregationTests(unittest.TestCase):
+    _STAMPS = [f"2022-01-03T{hour:02}:00:00" for hour in range(24)]
+
+    @staticmethod
+    def _record(objects, value):
+        blob, value_type = to_database(value)
+        return {
+            "class": "node",
+            "object_classes": ["node"],
+            "objects": objects,
+            "parameter": "price",
+            "scenario": "Base",
+            "time_stamp": "2022-06-01T11:14:00+00:00",
+            "type": value_type,
+            "value": str(blob, encoding="utf-8"),
+        }
+
+    def _time_series_record(self, objects, values):
+        return self._record(
+            objects,
+            Map(
+                ["s1"],
+                [
+                    TimeSeriesVariableResolution(
+                        self._STAMPS[: len(values)], values, False, False
+                    )
+                ],
+                index_name="solve",
+            ),
+        )
+
+    @staticmethod
+    def _value(record):
+        return from_database(record["value"].encode("utf-8"), record["type"])
+
+    def test_sum_over_entities(self):
+        records = [
+            self._time_series_record(["north"], [1.0, 2.0]),
+            self._time_series_record(["south"], [10.0, 20.0]),
+            self._record(["west"], "text"),
+        ]
+        aggregated = value_aggregation.aggregate_values(records, sum_over="entities")
+        self.assertEqual(len(aggregated), 2)
+        self.assertEqual(aggregated[0]["objects"], [])
+        value = self._value(aggregated[0])
+        self.assertEqual(list(value.indexes), ["s1"])
+        self.assertEqual(list(value.values[0].values), [11.0, 22.0])
+        self.assertEqual(aggregated[1], records[2])
+
+    def test_resample_to_days_with_envelope(self):
+        records = [self._time_series_record(["north"], [float(i) for i in range(24)])]
+        aggregated = value_aggregation.aggregate_values(
+            records, resample="day", envelope=True
+        )
+        statistics = {record["statistic"]: self._value(record) for record in aggregated}
+        self.assertEqual(set(statistics), {"min", "max", "mean"})
+        for statistic, expected in (("min", 0.0), ("max", 23.0), ("mean", 11.5)):
+            series = statistics[statistic].values[0]
+            self.assertEqual(
+                [str(stamp) for stamp in series.indexes], ["2022-01-03T00:00:00"]
+            )
+            self.assertEqual(list(series.values), [expected])
+
+    def test_downsample_keeps_peaks(self):
+        values = [0.0] * 24
+        values[5] = 9.0
+        values[17] = -9.0
+        records = [self._time_series_record(["north"], values)]
+        aggregated = value_aggregation.aggregate_values(records, downsample=6)
+        series = self._value(aggregated[0]).values[0]
+        self.assertEqual(len(series.values), 6)
+        self.assertIn(9.0, list(series.values))
+        self.assertIn(-9.0, list(series.values))
+        self.assertEqual(str(series.indexes[0]), self._STAMPS[0])
+        self.assertEqual(str(series.indexes[-1]), self._STAMPS[-1])
+
+    def test_invalid_options_raise(self):
+        with self.assertRaises(FlexToolException):
+            value_aggregation.aggregation_options({"resample": "year"})
+        with self.assertRaises(FlexToolException):
+            value_aggregation.aggregation_options({"envelope": True})
+        with self.assertRaises(FlexToolException):
+            value_aggregation.aggregation_options({"downsample": 2})
+        self.assertEqual(
+            value_aggregation.aggregation_options({"sum": "scenarios"}),
+            {
+                "resample": None,
+                "envelope": False,
+                "downsample": None,
+                "sum_over": "scenarios",
+                "time_axis": None,
+            },
+        )
+        with self.assertRaises(FlexToolException):
+            value_aggregation.aggregation_options({"start": "2022-01-03T00:00"})
+        with self.assertRaises(FlexToolException):
+            value_aggregation.aggregation_options(
+                {"start": "2022-01-03T00:00", "step": 0}
+            )
+        with self.assertRaises(FlexToolException):
+            value_aggregation.aggregation_options({"start": "t0001", "step": 3600})
+
+    def _flextool_time_record(self, values):
+        return self._record(
+            ["north"],
+            Map(
+                ["s1"],
+                [
+                    Map(
+                        [f"t{i + 1:04}" for i in range(len(values))],
+                        values,
+                        index_name="time",
+                    )
+                ],
+                index_name="solve",
+            ),
+        )
+
+    def test_resample_rejects_non_calendar_time(self):
+        records = [self._flextool_time_record([float(i) for i in range(48)])]
+        with self.assertRaisesRegex(FlexToolException, "not a calendar time"):
+            value_aggregation.aggregate_values(records, resample="day")
+
+    def test_resample_maps_non_calendar_time_to_time_axis(self):
+        records = [self._flextool_time_record([float(i) for i in range(48)])]
+        options = value_aggregation.aggregation_options(
+            {"resample": "day", "start": "2022-01-03T00:00:00", "step": 3600}
+        )
+        aggregated = value_aggregation.aggregate_values(records, **options)
+        series = self._value(aggregated[0]).values[0]
+        self.assertEqual(
+            [str(stamp) for stamp in series.indexes],
+            ["2022-01-03T00:00:00", "2022-01-04T00:00:00"],
+        )
+        self.assertEqual(list(series.values), [11.5, 35.5])
+
+
+class ResultsCacheTests(unittest.TestCase):
+    def setUp(self):
+        results_cache.clear_cache()
+
+    def tearDown(self):
+        results_cache.clear_cache()
+
+    @staticmethod
+    def _project(project_id, database_path):
+        project = mock.Mock()
+        project.id = project_id
+        project.results_database_path.return_value = database_path
+        return project
+
+    def test_response_is_reused_until_database_changes(self):
+        calls = []
+
+        @results_cache.cached_query
+        def get_classes(project, body):
+            calls.append(body)
+            return JsonResponse({"classes": body["classes"]})
+
+        with TemporaryDirectory() as temp_dir:
+            database_path = Path(temp_dir) / "Results.sqlite"
+            database_path.write_bytes(b"version 1")
+            project = self._project(1, database_path)
+            first = get_classes(project, {"classes": ["node"]})
+            second = get_classes(project, {"classes": ["node"]})
+            self.assertEqual(len(calls), 1)
+            self.assertEqual(second.content, first.content)
+            self.assertEqual(second["Content-Type"], "application/json")
+            get_classes(project, {"classes": ["unit"]})
+            self.assertEqual(len(calls), 2)
+            get_classes(self._project(2, database_path), {"classes": ["node"]})
+            self.assertEqual(len(calls), 3)
+            database_path.write_bytes(b"version 2 is longer")
+            get_classes(project, {"classes": ["node"]})
+            self.assertEqual(len(calls), 4)
+
+    def test_missing_database_bypasses_cache(self):
+        calls = []
+
+        @results_cache.cached_query
+        def get_classes(project):
+            calls.append(project)
+            return JsonResponse({"classes": []})
+
+        with TemporaryDirectory() as temp_dir:
+            project = self._project(1, Path(temp_dir) / "Results.sqlite")
+            get_classes(project)
+            get_classes(project)
+        self.assertEqual(len(calls), 2)
+
+    def test_least_recently_used_responses_are_evicted(self):
+        calls = []
+
+        @results_cache.cached_query
+        def get_classes(project, body):
+            calls.append(body)
+            return HttpResponse(b"x" * 40, content_type="text/plain")
+
+        with TemporaryDirectory() as temp_dir:
+            database_path = Path(temp_dir) / "Results.sqlite"
+            database_path.write_bytes(b"version 1")
+            project = self._project(1, database_path)
+            with override_settings(FLEXTOOL_RESULTS_CACHE_BYTES=100):
+                get_classes(project, {"page": 1})
+                get_classes(project, {"page": 2})
+                get_classes(project, {"page": 1})
+                get_classes(project, {"page": 3})
+                self.assertEqual(len(calls), 3)
+                get_classes(project, {"page": 1})
+                self.assertEqual(len(calls), 3)
+                get_classes(project, {"page": 2})
+                self.assertEqual(len(calls), 4)
+
+
+class ValueIndexCatalogueTests(unittest.TestCase):
+    def test_catalogue_entry_collects_distinct_indexes_per_dimension(self):
+        entry = value_index_catalogue.catalogue_entry(
+            "node",
+            "balance",
+            ["solve", "time"],
+            [("y1", "t2"), ("y1", "t1"), ("y2", "t1")],
+        )
+        self.assertEqual(
+            entry,
+            {
+                "class_name": "node",
+                "parameter_name": "balance",
+                "dimensions": [
+                    {"index_name": "solve", "depth": 0, "indexes": ["y1", "y2"]},
+                    {"index_name": "time", "depth": 1, "indexes": ["t1", "t2"]},
+                ],
+            },
+        )
+
+    def test_catalogue_is_written_per_alternative(self):
+        with TemporaryDirectory() as temp_dir:
+            database_path = Path(temp_dir, "Results.sqlite")
+            entries = [
+                value_index_catalogue.catalogue_entry(
+                    "node", "balance", ["time"], [("t1",)]
+                )
+            ]
+            name = "Base__Import_Flex3@2022-06-01T14:15:00"
+            self.assertIsNone(value_index_catalogue.read_catalogue(database_path, name))
+            value_index_catalogue.write_catalogue(database_path, name, entries)
+            self.assertEqual(
+                value_index_catalogue.read_catalogue(database_path, name), entries
+            )
+            self.assertIsNone(
+                value_index_catalogue.read_catalogue(database_path, "Other")
+            )
+            value_index_catalogue.remove_catalogue(database_path, name)
+            self.assertIsNone(value_index_catalogue.read_catalogue(database_path, name))
+
+    def test_merge_dimensions_merges_sorted_indexes(self):
+        catalogues = [
+            [
+                value_index_catalogue.catalogue_entry(
+                    "node", "balance", ["solve", "time"], [("y1", "t1"), ("y1", "t3")]
+                ),
+                value_index_catalogue.catalogue_entry(
+                    "unit", "flow", ["solve", "time"], [("y1", "t9")]
+                ),
+            ],
+            [
+                value_index_catalogue.catalogue_entry(
+                    "node", "balance", ["solve", "time"], [("y1", "t2"), ("y1", "t3")]
+                ),
+                value_index_catalogue.catalogue_entry(
+                    "node", "price", ["solve", "time"], [("y2", "t4")]
+                ),
+            ],
+        ]
+        dimensions = value_index_catalogue.merge_dimensions(
+            catalogues, ["node"], ["balance", "price"]
+        )
+        self.assertEqual(
+            dimensions,
+            [
+                {
+                    "index_name": "solve",
+                    "indexes": ["y1", "y2"],
+                    "depth": 0,
+                    "class_names": ["node", "node"],
+                    "parameter_names": ["balance", "price"],
+                },
+                {
+                    "index_name": "time",
+                    "indexes": ["t1", "t2", "t3", "t4"],
+                    "depth": 1,
+                    "class_names": ["node", "node"],
+                    "parameter_names": ["balance", "price"],
+                },
+            ],
+        )
+        all_parameters = value_index_catalogue.merge_dimensions(
+            catalogues, ["unit"], []
+        )
+        self.assertEqual(all_parameters[1]["indexes"], ["t9"])
+
+
 class AnalysisInterfaceTests(TestCase):
     baron = None
     analysis_url = reverse("flextool3:analysis")
@@ -2750,6 +4968,9 @@ class AnalysisInterfaceTests(TestCase):
         cls.baron.set_password("secretbaron")
         cls.baron.save()
 
+    def setUp(self):
+        results_cache.clear_cache()
+
     def test_get_object_values(self):
         with new_project(self.baron) as project:
             scenario = Scenario(project=project, name="Base")
@@ -2856,6 +5077,102 @@ class AnalysisInterfaceTests(TestCase):
                     },
                 )
 
+    def test_stream_object_values(self):
+        with new_project(self.baron) as project:
+            scenario = Scenario(project=project, name="Base")
+            scenario.save()
+            scenario_execution = ScenarioExecution(
+                scenario=scenario,
+                execution_time=datetime.fromisoformat("2022-06-01T14:14:00+03:00"),
+                execution_time_offset=3 * 3600,
+                log="",
+            )
+            scenario_execution.save()
+            url = "sqlite:///" + str(Path(project.path) / PATH_TO_RESULT_DATABASE)
+            with open_database(url, create=True) as db_map:
+                alternative = "Base__Import_Flex3@2022-06-01T14:15:00"
+                import_alternatives(db_map, (alternative,))
+                import_object_classes(db_map, ("my_class",))
+                import_object_parameters(db_map, (("my_class", "object_parameter"),))
+                import_objects(
+                    db_map, (("my_class", "my_object"), ("my_class", "other_object"))
+                )
+                _, errors = import_object_parameter_values(
+                    db_map,
+                    (
+                        (
+                            "my_class",
+                            "my_object",
+                            "object_parameter",
+                            99.0,
+                            alternative,
+                        ),
+                        (
+                            "my_class",
+                            "other_object",
+                            "object_parameter",
+                            98.0,
+                            alternative,
+                        ),
+                    ),
+                )
+                self.assertEqual(errors, [])
+                db_map.commit_session("Add test data.")
+            with login_as_baron(self.client) as login_successful:
+                self.assertTrue(login_successful)
+                response = self.client.post(
+                    self.analysis_url,
+                    {
+                        "type": "values?",
+                        "projectId": 1,
+                        "classes": ["my_class"],
+                        "parameters": ["object_parameter"],
+                        "scenarioExecutionIds": [scenario_execution.id],
+                        "stream": True,
+                    },
+                    content_type="application/json",
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.streaming)
+                self.assertEqual(response["Content-Type"], "application/x-ndjson")
+                with mock.patch.object(
+                    analysis_view, "_FETCH_BATCH_SIZE", 1
+                ), mock.patch.object(
+                    analysis_view, "database_map", wraps=analysis_view.database_map
+                ) as opened_database:
+                    content = b"".join(response.streaming_content).decode("utf-8")
+                self.assertEqual(opened_database.call_count, 4)
+                lines = content.splitlines()
+                self.assertEqual(len(lines), 2)
+                records = sorted(
+                    (json.loads(line) for line in lines), key=itemgetter("value")
+                )
+                self.assertEqual(
+                    records,
+                    [
+                        {
+                            "class": "my_class",
+                            "object_classes": ["my_class"],
+                            "objects": ["other_object"],
+                            "parameter": "object_parameter",
+                            "scenario": "Base",
+                            "time_stamp": "2022-06-01T11:14:00+00:00",
+                            "type": None,
+                            "value": "98.0",
+                        },
+                        {
+                            "class": "my_class",
+                            "object_classes": ["my_class"],
+                            "objects": ["my_object"],
+                            "parameter": "object_parameter",
+                            "scenario": "Base",
+                            "time_stamp": "2022-06-01T11:14:00+00:00",
+                            "type": None,
+                            "value": "99.0",
+                        },
+                    ],
+                )
+
     def test_get_multidimensional_relationship_values(self):
         with new_project(self.baron) as project:
             scenario = Scenario(project=project, name="Base")
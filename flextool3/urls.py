@@ -16,6 +16,11 @@ urlpatterns = [
     path("projects/", views.projects, name="projects"),
     path("model/", views.model, name="model"),
     path("executions/", views.executions, name="executions"),
+    path(
+        "executions/<int:project_id>/events/",
+        views.execution_events,
+        name="execution_events",
+    ),
     path("summary/", views.summary, name="summary"),
     path("analysis/", views.analysis, name="analysis"),
     path("examples/", views.examples, name="examples"),
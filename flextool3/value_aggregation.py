@@ -0,0 +1,540 @@
+"""Server-side aggregation and downsampling of parameter values.
+
+Values are decoded and flattened into rows of index labels and numbers
+(see value_columns.flatten_value()). The last index dimension is taken
+as the x axis of a plot and the other dimensions split a value into series.
+Aggregations are applied in the following order:
+
+1. values are summed over entities or scenarios,
+2. time series are resampled to days, weeks or months
+   optionally with min/max envelopes around the mean;
+   time labels that are not calendar times, e.g. FlexTool's t0001,
+   are placed on a time axis given by start time and step,
+3. series are downsampled to given number of points
+   with the Largest-Triangle-Three-Buckets algorithm.
+
+Results are records like those of 'values?' requests
+so they can be sent in any of the supported formats.
+"""
+import numpy as np
+from spinedb_api import (
+    from_database,
+    Map,
+    ParameterValueFormatError,
+    TimeSeriesVariableResolution,
+    to_database,
+)
+from spinedb_api.parameter_value import IndexedValue
+from .exception import FlexToolException
+from .utils import get_and_validate
+from .value_columns import flatten_value
+
+RESAMPLE_PERIODS = ("day", "week", "month")
+"""Periods time series can be resampled to."""
+SUM_TARGETS = ("entities", "scenarios")
+"""Record fields values can be summed over."""
+MIN_DOWNSAMPLE_POINTS = 3
+"""Smallest number of points series can be downsampled to."""
+
+
+class _Series:
+    """Flattened parameter value."""
+
+    def __init__(self, record, index_names, columns, numbers):
+        """
+        Args:
+            record (dict): record without 'type' and 'value'
+            index_names (list of str): index names
+            columns (list of ndarray): index labels per dimension
+            numbers (ndarray): values
+        """
+        self.record = record
+        self.index_names = index_names
+        self.columns = columns
+        self.numbers = numbers
+
+
+def aggregation_options(aggregation):
+    """Validates aggregation options from request body.
+
+    Args:
+        aggregation (dict): aggregation options
+
+    Returns:
+        dict: keyword arguments for aggregate_values()
+    """
+    resample = get_and_validate(aggregation, "resample", str, required=False)
+    if resample is not None and resample not in RESAMPLE_PERIODS:
+        raise FlexToolException(f"Unknown resample period '{resample}'.")
+    envelope = get_and_validate(aggregation, "envelope", bool, required=False)
+    if envelope and resample is None:
+        raise FlexToolException("Envelope requires a resample period.")
+    downsample = get_and_validate(aggregation, "downsample", int, required=False)
+    if downsample is not None and downsample < MIN_DOWNSAMPLE_POINTS:
+        raise FlexToolException(
+            f"Cannot downsample to fewer than {MIN_DOWNSAMPLE_POINTS} points."
+        )
+    sum_over = get_and_validate(aggregation, "sum", str, required=False)
+    if sum_over is not None and sum_over not in SUM_TARGETS:
+        raise FlexToolException(f"Cannot sum over '{sum_over}'.")
+    return {
+        "resample": resample,
+        "envelope": bool(envelope),
+        "downsample": downsample,
+        "sum_over": sum_over,
+        "time_axis": _time_axis_option(aggregation),
+    }
+
+
+def _time_axis_option(aggregation):
+    """Validates the time axis of non-calendar time labels.
+
+    Args:
+        aggregation (dict): aggregation options
+
+    Returns:
+        tuple: start time as datetime64 and step as timedelta64 or None
+    """
+    start = get_and_validate(aggregation, "start", str, required=False)
+    step = get_and_validate(aggregation, "step", int, required=False)
+    if start is None and step is None:
+        return None
+    if start is None or step is None:
+        raise FlexToolException("Time axis needs both 'start' and 'step'.")
+    if step <= 0:
+        raise FlexToolException("Time step must be positive.")
+    try:
+        start_time = np.datetime64(start, "s")
+    except ValueError as error:
+        raise FlexToolException(f"Invalid start time '{start}'.") from error
+    return start_time, np.timedelta64(step, "s")
+
+
+# pylint: disable=too-many-arguments
+def aggregate_values(
+    records,
+    resample=None,
+    envelope=False,
+    downsample=None,
+    sum_over=None,
+    time_axis=None,
+):
+    """Aggregates parameter value records.
+
+    Records of values that are not numeric are passed through as they are.
+    Summing over entities empties records' 'objects' field;
+    summing over scenarios sets 'scenario' and 'time_stamp' to None.
+    Envelopes add a 'statistic' field that is one of 'min', 'max' or 'mean'.
+
+    Args:
+        records (Iterable of dict): parameter value records
+        resample (str, optional): resample period
+        envelope (bool): if True, add min and max series to resampled values
+        downsample (int, optional): maximum number of points per series
+        sum_over (str, optional): 'entities' or 'scenarios'
+        time_axis (tuple, optional): start time as datetime64 and step
+            as timedelta64 for resampling labels that are not calendar times;
+            labels are placed on the axis in their sorted order
+
+    Returns:
+        list of dict: aggregated records
+
+    Raises:
+        FlexToolException: raised if resampled labels are not calendar times
+            and no time axis is given
+    """
+    passed_through = []
+    series = []
+    for record in records:
+        flattened = _flatten_record(record)
+        if flattened is None:
+            passed_through.append(record)
+        else:
+            series.append(flattened)
+    if sum_over is not None:
+        series = _sum_series(series, sum_over)
+    if resample is not None:
+        series = [
+            resampled
+            for single_series in series
+            for resampled in _resample(single_series, resample, envelope, time_axis)
+        ]
+    if downsample is not None:
+        series = [_downsample(single_series, downsample) for single_series in series]
+    return [_to_record(single_series) for single_series in series] + passed_through
+
+
+def lttb_indices(x, y, threshold):
+    """Selects points with the Largest-Triangle-Three-Buckets algorithm.
+
+    Args:
+        x (ndarray): x coordinates in ascending order
+        y (ndarray): y coordinates
+        threshold (int): number of points to select
+
+    Returns:
+        ndarray: indices of selected points
+    """
+    point_count = len(x)
+    if threshold >= point_count or threshold < MIN_DOWNSAMPLE_POINTS:
+        return np.arange(point_count)
+    bucket_count = threshold - 2
+    edges = np.linspace(1, point_count - 1, bucket_count + 1).astype(np.int64)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[1:-1], edges[:-1] - 1) / counts
+    mean_y = np.add.reduceat(y[1:-1], edges[:-1] - 1) / counts
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = point_count - 1
+    previous = 0
+    for bucket in range(bucket_count):
+        start = edges[bucket]
+        stop = edges[bucket + 1]
+        areas = np.abs(
+            (x[previous] - next_x[bucket]) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (next_y[bucket] - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def _flatten_record(record):
+    """Decodes and flattens record's value.
+
+    Args:
+        record (dict): parameter value record
+
+    Returns:
+        _Series: flattened value or None if value is not numeric
+    """
+    try:
+        value = from_database(record["value"].encode("utf-8"), record["type"])
+    except ParameterValueFormatError as error:
+        raise FlexToolException(f"Failed to parse value: {error}") from error
+    bare_record = {
+        key: field for key, field in record.items() if key not in ("type", "value")
+    }
+    if isinstance(value, IndexedValue):
+        index_names, columns, numbers = flatten_value(value)
+        return _Series(
+            bare_record,
+            index_names,
+            [np.array(column, dtype=object) for column in columns],
+            np.asarray(numbers, dtype=np.float64),
+        )
+    if isinstance(value, (float, int)) and not isinstance(value, bool):
+        return _Series(bare_record, [], [], np.array([value], dtype=np.float64))
+    return None
+
+
+def _sum_series(series, sum_over):
+    """Sums series over entities or scenarios.
+
+    Args:
+        series (list of _Series): series to sum
+        sum_over (str): 'entities' or 'scenarios'
+
+    Returns:
+        list of _Series: summed series
+    """
+    summed_fields = (
+        ("objects",) if sum_over == "entities" else ("scenario", "time_stamp")
+    )
+    groups = {}
+    for single_series in series:
+        key = tuple(
+            _hashable(field)
+            for name, field in single_series.record.items()
+            if name not in summed_fields
+        ) + (tuple(single_series.index_names),)
+        groups.setdefault(key, []).append(single_series)
+    summed = []
+    for members in groups.values():
+        record = dict(members[0].record)
+        if sum_over == "entities":
+            record["objects"] = []
+        else:
+            record["scenario"] = None
+            record["time_stamp"] = None
+        numbers = np.concatenate([member.numbers for member in members])
+        index_names = members[0].index_names
+        if not index_names:
+            summed.append(_Series(record, [], [], np.array([numbers.sum()])))
+            continue
+        columns = [
+            np.concatenate([member.columns[dimension] for member in members])
+            for dimension in range(len(index_names))
+        ]
+        keys, labels = _combine_codes(columns)
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        codes = np.unravel_index(unique_keys, [len(label) for label in labels])
+        summed.append(
+            _Series(
+                record,
+                index_names,
+                [label[code] for label, code in zip(labels, codes)],
+                np.bincount(inverse, weights=numbers, minlength=len(unique_keys)),
+            )
+        )
+    return summed
+
+
+def _resample(series, period, envelope, time_axis):
+    """Resamples time series to given period.
+
+    Args:
+        series (_Series): series to resample
+        period (str): 'day', 'week' or 'month'
+        envelope (bool): if True, include min and max series
+        time_axis (tuple, optional): start time and step for non-calendar labels
+
+    Returns:
+        list of _Series: mean series and optionally min and max series
+    """
+    if not series.columns:
+        return [series]
+    times = _as_times(series.columns[-1])
+    if times is None:
+        if time_axis is None:
+            raise FlexToolException(
+                f"Index '{series.index_names[-1]}' is not a calendar time;"
+                " give 'start' and 'step' to resample it."
+            )
+        start, step = time_axis
+        _, positions = np.unique(series.columns[-1], return_inverse=True)
+        times = start + positions.reshape(-1) * step
+    buckets = _bucket_starts(times, period)
+    bucket_times, bucket_codes = np.unique(buckets, return_inverse=True)
+    if len(series.columns) > 1:
+        prefix_keys, prefix_labels = _combine_codes(series.columns[:-1])
+    else:
+        prefix_keys = np.zeros(len(buckets), dtype=np.int64)
+        prefix_labels = []
+    keys = prefix_keys * len(bucket_times) + bucket_codes
+    unique_keys, first, inverse = np.unique(
+        keys, return_index=True, return_inverse=True
+    )
+    counts = np.bincount(inverse, minlength=len(unique_keys))
+    means = (
+        np.bincount(inverse, weights=series.numbers, minlength=len(unique_keys))
+        / counts
+    )
+    if prefix_labels:
+        prefix_codes = np.unravel_index(
+            prefix_keys[first], [len(label) for label in prefix_labels]
+        )
+        columns = [label[code] for label, code in zip(prefix_labels, prefix_codes)]
+    else:
+        columns = []
+    time_labels = np.datetime_as_string(
+        bucket_times.astype("datetime64[s]"), unit="s"
+    ).astype(object)
+    columns.append(time_labels[bucket_codes[first]])
+    if not envelope:
+        return [_Series(series.record, series.index_names, columns, means)]
+    minimums = np.full(len(unique_keys), np.inf)
+    np.minimum.at(minimums, inverse, series.numbers)
+    maximums = np.full(len(unique_keys), -np.inf)
+    np.maximum.at(maximums, inverse, series.numbers)
+    return [
+        _Series(
+            dict(series.record, statistic=statistic),
+            series.index_names,
+            columns,
+            numbers,
+        )
+        for statistic, numbers in (
+            ("min", minimums),
+            ("max", maximums),
+            ("mean", means),
+        )
+    ]
+
+
+def _downsample(series, threshold):
+    """Downsamples each series of a value separately.
+
+    Args:
+        series (_Series): series to downsample
+        threshold (int): maximum number of points per series
+
+    Returns:
+        _Series: downsampled series
+    """
+    if not series.columns or len(series.numbers) <= threshold:
+        return series
+    if len(series.columns) > 1:
+        prefix_keys, _ = _combine_codes(series.columns[:-1])
+    else:
+        prefix_keys = np.zeros(len(series.numbers), dtype=np.int64)
+    times = _as_times(series.columns[-1])
+    selected = []
+    for prefix_key in np.unique(prefix_keys):
+        rows = np.flatnonzero(prefix_keys == prefix_key)
+        if times is not None:
+            x = times[rows].astype(np.int64).astype(np.float64)
+        else:
+            x = np.arange(len(rows), dtype=np.float64)
+        selected.append(rows[lttb_indices(x, series.numbers[rows], threshold)])
+    selected = np.sort(np.concatenate(selected))
+    return _Series(
+        series.record,
+        series.index_names,
+        [column[selected] for column in series.columns],
+        series.numbers[selected],
+    )
+
+
+def _to_record(series):
+    """Encodes series into a parameter value record.
+
+    Args:
+        series (_Series): series
+
+    Returns:
+        dict: parameter value record
+    """
+    if series.columns:
+        value = _to_value(
+            series.index_names,
+            series.columns,
+            series.numbers,
+            _as_times(series.columns[-1]) is not None,
+        )
+    else:
+        value = float(series.numbers[0])
+    blob, value_type = to_database(value)
+    return dict(series.record, type=value_type, value=str(blob, encoding="utf-8"))
+
+
+def _to_value(index_names, columns, numbers, is_time_series):
+    """Builds a nested indexed value from flat columns.
+
+    Args:
+        index_names (list of str): index names
+        columns (list of ndarray): index labels per dimension
+        numbers (ndarray): values
+        is_time_series (bool): True if last dimension is time
+
+    Returns:
+        IndexedValue: value
+    """
+    if len(columns) == 1:
+        if is_time_series:
+            return TimeSeriesVariableResolution(
+                list(columns[0]), numbers, False, False, index_name=index_names[0]
+            )
+        return Map(
+            [_plain_label(label) for label in columns[0]],
+            [float(number) for number in numbers],
+            index_name=index_names[0],
+        )
+    groups = {}
+    for row, label in enumerate(columns[0]):
+        groups.setdefault(label, []).append(row)
+    return Map(
+        [_plain_label(label) for label in groups],
+        [
+            _to_value(
+                index_names[1:],
+                [column[rows] for column in columns[1:]],
+                numbers[rows],
+                is_time_series,
+            )
+            for rows in groups.values()
+        ],
+        index_name=index_names[0],
+    )
+
+
+def _combine_codes(columns):
+    """Encodes label columns into a single integer key per row.
+
+    Labels are numbered in order of first appearance
+    so sorting by key keeps the original order of labels.
+
+    Args:
+        columns (list of ndarray): index labels per dimension
+
+    Returns:
+        tuple: keys as ndarray and unique labels per dimension
+    """
+    codes = []
+    labels = []
+    for column in columns:
+        unique, first, inverse = np.unique(
+            column.astype(str), return_index=True, return_inverse=True
+        )
+        order = np.argsort(first)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        codes.append(rank[inverse])
+        labels.append(column[first[order]])
+    keys = np.ravel_multi_index(codes, [len(label) for label in labels])
+    return keys, labels
+
+
+def _bucket_starts(times, period):
+    """Truncates time stamps to the start of their period.
+
+    Args:
+        times (ndarray): time stamps as datetime64
+        period (str): 'day', 'week' or 'month'
+
+    Returns:
+        ndarray: period starts as datetime64
+    """
+    if period == "month":
+        return times.astype("datetime64[M]")
+    days = times.astype("datetime64[D]")
+    if period == "week":
+        day_numbers = days.astype(np.int64)
+        # 1970-01-01 was a Thursday; weeks start on Monday.
+        days = (day_numbers - (day_numbers + 3) % 7).astype("datetime64[D]")
+    return days
+
+
+def _as_times(column):
+    """Converts label column to time stamps.
+
+    Args:
+        column (ndarray): index labels
+
+    Returns:
+        ndarray: time stamps as datetime64 or None if labels are not time stamps
+    """
+    if not all(isinstance(label, str) and len(label) >= 10 for label in column):
+        return None
+    try:
+        return column.astype("datetime64[s]")
+    except ValueError:
+        return None
+
+
+def _plain_label(label):
+    """Converts numpy scalars to Python values accepted by Map.
+
+    Args:
+        label (Any): index label
+
+    Returns:
+        str or float: label
+    """
+    return label.item() if isinstance(label, np.generic) else label
+
+
+def _hashable(field):
+    """Converts record field to a hashable value.
+
+    Args:
+        field (Any): record field
+
+    Returns:
+        Any: hashable field
+    """
+    if isinstance(field, list):
+        return tuple(_hashable(item) for item in field)
+    return field
@@ -0,0 +1,185 @@
+"""Columnar wire format for parameter values.
+
+Values are decoded on the server and flattened into rows
+where each row has an index label per dimension and a float value.
+The response consists of
+
+    magic, uint32 metadata size, metadata JSON, padding, float64 data
+
+where the padding aligns data to eight bytes
+so clients can view it as a Float64Array without copying.
+The metadata JSON holds a list of index columns and a list of series.
+Each index column is a list of labels and is stored only once
+even if many series share it, e.g. the time axis of a solve.
+Each series carries the fields of a 'values?' record except 'type' and 'value',
+the names of its index dimensions, ids of its index columns
+and the offset and length of its data counted in float64 items.
+Values that are neither numbers nor indexed values are sent
+in the series' 'value' field as JSON text with zero length.
+"""
+from array import array
+import json
+import struct
+import sys
+from spinedb_api import from_database, ParameterValueFormatError
+from spinedb_api.parameter_value import IndexedValue
+from .exception import FlexToolException
+
+CONTENT_TYPE = "application/octet-stream"
+"""Content type of columnar responses."""
+MAGIC = b"FTVALUES1\n"
+"""Bytes that start a columnar response."""
+
+_METADATA_SIZE = struct.Struct("<I")
+_DATA_ALIGNMENT = 8
+
+
+def encode_values(records):
+    """Encodes parameter value records in columnar format.
+
+    Args:
+        records (Iterable of dict): records from analysis_view
+
+    Returns:
+        bytes: encoded values
+    """
+    index_columns = []
+    column_ids = {}
+    series = []
+    data = array("d")
+    for record in records:
+        entry = {
+            key: value for key, value in record.items() if key not in ("type", "value")
+        }
+        try:
+            value = from_database(record["value"].encode("utf-8"), record["type"])
+        except ParameterValueFormatError as error:
+            raise FlexToolException(f"Failed to parse value: {error}") from error
+        if isinstance(value, IndexedValue):
+            index_names, columns, numbers = flatten_value(value)
+            ids = []
+            for column in columns:
+                column = tuple(column)
+                column_id = column_ids.get(column)
+                if column_id is None:
+                    column_id = len(index_columns)
+                    column_ids[column] = column_id
+                    index_columns.append(column)
+                ids.append(column_id)
+            entry["index_names"] = index_names
+            entry["indexes"] = ids
+            entry["offset"] = len(data)
+            entry["length"] = len(numbers)
+            data.extend(numbers)
+        elif isinstance(value, (float, int)) and not isinstance(value, bool):
+            entry["index_names"] = []
+            entry["indexes"] = []
+            entry["offset"] = len(data)
+            entry["length"] = 1
+            data.append(value)
+        else:
+            entry["index_names"] = []
+            entry["indexes"] = []
+            entry["offset"] = len(data)
+            entry["length"] = 0
+            entry["value"] = record["value"]
+        series.append(entry)
+    metadata = json.dumps(
+        {"index_columns": [list(column) for column in index_columns], "series": series}
+    ).encode("utf-8")
+    head_size = len(MAGIC) + _METADATA_SIZE.size + len(metadata)
+    padding = b" " * (-head_size % _DATA_ALIGNMENT)
+    if sys.byteorder == "big":
+        data.byteswap()
+    return b"".join(
+        (
+            MAGIC,
+            _METADATA_SIZE.pack(len(metadata) + len(padding)),
+            metadata,
+            padding,
+            data.tobytes(),
+        )
+    )
+
+
+def decode_values(payload):
+    """Decodes columnar values.
+
+    Args:
+        payload (bytes): encoded values
+
+    Returns:
+        tuple: metadata dict and float64 data as array
+    """
+    if not payload.startswith(MAGIC):
+        raise FlexToolException("Not a columnar value payload.")
+    position = len(MAGIC)
+    (metadata_size,) = _METADATA_SIZE.unpack_from(payload, position)
+    position += _METADATA_SIZE.size
+    metadata = json.loads(payload[position : position + metadata_size])
+    data = array("d")
+    data.frombytes(payload[position + metadata_size :])
+    if sys.byteorder == "big":
+        data.byteswap()
+    return metadata, data
+
+
+def flatten_value(value):
+    """Flattens an indexed value into index columns and numbers.
+
+    Leaves that are not numbers or are not as deeply nested as
+    the deepest leaf are skipped.
+
+    Args:
+        value (IndexedValue): value to flatten
+
+    Returns:
+        tuple: index names, index label columns and numbers
+    """
+    index_names = []
+    rows = []
+    _collect_rows(value, (), 0, index_names, rows)
+    depth = len(index_names)
+    columns = [[] for _ in range(depth)]
+    numbers = array("d")
+    for labels, number in rows:
+        if len(labels) != depth:
+            continue
+        for column, label in zip(columns, labels):
+            column.append(label)
+        numbers.append(number)
+    return index_names, columns, numbers
+
+
+def _collect_rows(value, labels, depth, index_names, rows):
+    """Recursively collects leaf rows of an indexed value.
+
+    Args:
+        value (IndexedValue): value
+        labels (tuple): index labels of parent values
+        depth (int): nesting depth of value
+        index_names (list of str): index names per depth, updated in place
+        rows (list of tuple): collected labels and numbers, updated in place
+    """
+    if len(index_names) == depth:
+        index_names.append(value.index_name)
+    for index, element in zip(value.indexes, value.values):
+        row_labels = labels + (_index_label(index),)
+        if isinstance(element, IndexedValue):
+            _collect_rows(element, row_labels, depth + 1, index_names, rows)
+        elif isinstance(element, (float, int)) and not isinstance(element, bool):
+            rows.append((row_labels, float(element)))
+
+
+def _index_label(index):
+    """Converts index to JSON compatible label.
+
+    Args:
+        index (Any): index
+
+    Returns:
+        str or float: label
+    """
+    if isinstance(index, (str, float, int)) and not isinstance(index, bool):
+        return index
+    return str(index)
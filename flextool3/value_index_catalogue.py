@@ -0,0 +1,254 @@
+"""Catalogue of parameter value indexes in the results database.
+
+The catalogue lists index names, depths and distinct index values
+of each (entity class, parameter) pair of a results alternative.
+It is written when results are ingested (see results_ingest)
+so finding the indexes of values does not need to parse the values.
+Alternatives imported by other means are catalogued
+from the database the first time their indexes are needed.
+
+Each alternative has its own catalogue file in a directory
+next to the results database so concurrent solves never write the same file.
+"""
+import heapq
+import json
+from pathlib import Path
+import re
+from spinedb_api import SpineDBAPIError
+from .exception import FlexToolException
+
+CATALOGUE_DIRECTORY_NAME = "value_indexes"
+"""Name of catalogue directory next to the results database."""
+
+_UNSAFE_CHARACTERS = re.compile(r"[^\w@.-]")
+
+
+def catalogue_path(database_path, alternative_name):
+    """Returns path to alternative's catalogue file.
+
+    Args:
+        database_path (Path): path to results database
+        alternative_name (str): results alternative name
+
+    Returns:
+        Path: path to catalogue file
+    """
+    file_name = _UNSAFE_CHARACTERS.sub("_", alternative_name) + ".json"
+    return Path(database_path).parent / CATALOGUE_DIRECTORY_NAME / file_name
+
+
+def catalogue_entry(class_name, parameter_name, index_names, index_tuples):
+    """Creates a catalogue entry for a parameter.
+
+    Args:
+        class_name (str): entity class name
+        parameter_name (str): parameter name
+        index_names (list of str): index names from outermost to innermost
+        index_tuples (Iterable of tuple): index values of each leaf value
+
+    Returns:
+        dict: catalogue entry
+    """
+    indexes = [set() for _ in index_names]
+    for index_tuple in index_tuples:
+        for index_set, index in zip(indexes, index_tuple):
+            index_set.add(index)
+    return {
+        "class_name": class_name,
+        "parameter_name": parameter_name,
+        "dimensions": [
+            {"index_name": name, "depth": depth, "indexes": sorted(index_set)}
+            for depth, (name, index_set) in enumerate(zip(index_names, indexes))
+        ],
+    }
+
+
+def write_catalogue(database_path, alternative_name, entries):
+    """Writes alternative's catalogue.
+
+    Args:
+        database_path (Path): path to results database
+        alternative_name (str): results alternative name
+        entries (list of dict): catalogue entries
+    """
+    path = catalogue_path(database_path, alternative_name)
+    path.parent.mkdir(exist_ok=True)
+    temporary_path = path.with_name(path.name + ".tmp")
+    temporary_path.write_text(
+        json.dumps({"alternative": alternative_name, "entries": entries}),
+        encoding="utf-8",
+    )
+    temporary_path.replace(path)
+
+
+def read_catalogue(database_path, alternative_name):
+    """Reads alternative's catalogue.
+
+    Args:
+        database_path (Path): path to results database
+        alternative_name (str): results alternative name
+
+    Returns:
+        list of dict: catalogue entries or None if alternative has no catalogue
+    """
+    path = catalogue_path(database_path, alternative_name)
+    try:
+        catalogue = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if catalogue.get("alternative") != alternative_name:
+        return None
+    return catalogue["entries"]
+
+
+def remove_catalogue(database_path, alternative_name):
+    """Deletes alternative's catalogue if it exists.
+
+    Args:
+        database_path (Path): path to results database
+        alternative_name (str): results alternative name
+    """
+    catalogue_path(database_path, alternative_name).unlink(missing_ok=True)
+
+
+def build_catalogue(db_map, alternative_id):
+    """Catalogues the indexes of alternative's values in the database.
+
+    Args:
+        db_map (DatabaseMappingBase): results database
+        alternative_id (int): results alternative id
+
+    Returns:
+        list of dict: catalogue entries
+    """
+    try:
+        class_names = {row.id: row.name for row in db_map.query(db_map.entity_class_sq)}
+        parameter_names = {
+            row.id: row.name for row in db_map.query(db_map.parameter_definition_sq)
+        }
+        subquery = db_map.parameter_value_sq
+        dimensions = {}
+        for row in db_map.query(
+            subquery.c.entity_class_id,
+            subquery.c.parameter_definition_id,
+            subquery.c.value,
+        ).filter(subquery.c.alternative_id == alternative_id):
+            try:
+                value = json.loads(row.value)
+            except ValueError as error:
+                raise FlexToolException(f"Failed to parse value: {error}") from error
+            if not isinstance(value, dict) or "data" not in value:
+                continue
+            key = (
+                class_names[row.entity_class_id],
+                parameter_names[row.parameter_definition_id],
+            )
+            _collect_indexes(value, dimensions.setdefault(key, {}))
+    except SpineDBAPIError as error:
+        raise FlexToolException(f"Failed to read values: {error}") from error
+    return [
+        {
+            "class_name": class_name,
+            "parameter_name": parameter_name,
+            "dimensions": [
+                {"index_name": name, "depth": depth, "indexes": sorted(index_set)}
+                for depth, (name, index_set) in enumerate(indexes.items())
+            ],
+        }
+        for (class_name, parameter_name), indexes in dimensions.items()
+    ]
+
+
+def merge_dimensions(catalogues, classes, parameters):
+    """Merges dimensions of given classes and parameters across catalogues.
+
+    Index lists in catalogues are sorted
+    so they are merged in a single pass without re-sorting.
+
+    Args:
+        catalogues (Iterable of list): catalogue entries of each alternative
+        classes (list of str): entity class names
+        parameters (list of str): parameter names; empty list accepts all parameters
+
+    Returns:
+        list of dict: dimension records
+    """
+    classes = set(classes)
+    parameters = set(parameters)
+    dimensions = {}
+    for entries in catalogues:
+        for entry in entries:
+            class_name = entry["class_name"]
+            parameter_name = entry["parameter_name"]
+            if class_name not in classes:
+                continue
+            if parameters and parameter_name not in parameters:
+                continue
+            for dimension in entry["dimensions"]:
+                merged = dimensions.get(dimension["index_name"])
+                if merged is None:
+                    merged = {
+                        "index_name": dimension["index_name"],
+                        "index_lists": [],
+                        "depth": dimension["depth"],
+                        "class_names": [],
+                        "parameter_names": [],
+                        "pairs": set(),
+                    }
+                    dimensions[dimension["index_name"]] = merged
+                merged["index_lists"].append(dimension["indexes"])
+                if (class_name, parameter_name) not in merged["pairs"]:
+                    merged["pairs"].add((class_name, parameter_name))
+                    merged["class_names"].append(class_name)
+                    merged["parameter_names"].append(parameter_name)
+    return [
+        {
+            "index_name": merged["index_name"],
+            "indexes": _merge_sorted(merged["index_lists"]),
+            "depth": merged["depth"],
+            "class_names": merged["class_names"],
+            "parameter_names": merged["parameter_names"],
+        }
+        for merged in dimensions.values()
+    ]
+
+
+def _merge_sorted(index_lists):
+    """Merges sorted index lists dropping duplicates.
+
+    Args:
+        index_lists (list of list): sorted index lists
+
+    Returns:
+        list: sorted unique indexes
+    """
+    if len(index_lists) == 1:
+        return list(index_lists[0])
+    merged = []
+    for index in heapq.merge(*index_lists):
+        if not merged or merged[-1] != index:
+            merged.append(index)
+    return merged
+
+
+def _collect_indexes(value, indexes, depth=0):
+    """Recursively collects indexes and index names from parameter value.
+
+    Args:
+        value (dict): (unparsed) parameter value in database format
+        indexes (dict): mapping from index name to set of indexes
+        depth (int): nesting depth of value
+    """
+    index = indexes.setdefault(value.get("index_name", f"x_{depth}"), set())
+    if isinstance(value["data"], list):
+        for row in value["data"]:
+            if not isinstance(row, list):
+                continue
+            index.add(row[0])
+            if isinstance(row[1], dict):
+                _collect_indexes(row[1], indexes, depth + 1)
+    else:
+        for i, y in value["data"].items():
+            index.add(i)
+            if isinstance(y, dict):
+                _collect_indexes(y, indexes, depth + 1)
@@ -23,6 +23,26 @@ def resolve_project(request, body):
     return project
 
 
+async def aresolve_project(request, body):
+    """Asynchronous variant of resolve_project().
+
+    Args:
+        request (HttpRequest): request object
+        body (dict): request body
+
+    Returns:
+        Project: target project
+    """
+    project_id = get_and_validate(body, "projectId", int)
+    user = await request.auser()
+    try:
+        # pylint: disable=no-member
+        project = await Project.objects.aget(id=project_id, user=user.id)
+    except Project.DoesNotExist as error:  # pylint: disable=no-member
+        raise FlexToolException("Project does not exist.") from error
+    return project
+
+
 def resolve_scenario_execution(project, body_or_id):
     """Resolves scenario execution.
 
@@ -49,3 +69,33 @@ def resolve_scenario_execution(project, body_or_id):
             f"Scenario execution with id {scenario_execution_id} doesn't exist."
         )
     return scenario_execution
+
+
+def resolve_scenario_executions(project, scenario_execution_ids):
+    """Resolves multiple scenario executions with a single query.
+
+    Args:
+        project (Project): a project
+        scenario_execution_ids (list of int): scenario execution ids
+
+    Returns:
+        list of ScenarioExecution: scenario executions in the order of ids
+    """
+    for scenario_execution_id in scenario_execution_ids:
+        if not isinstance(scenario_execution_id, int) or isinstance(
+            scenario_execution_id, bool
+        ):
+            raise FlexToolException("Scenario execution ids must be integers.")
+    # pylint: disable=no-member
+    scenario_executions = {
+        execution.id: execution
+        for execution in ScenarioExecution.objects.filter(
+            id__in=scenario_execution_ids, scenario__project=project.id
+        ).select_related("scenario", "reused_from__scenario")
+    }
+    for scenario_execution_id in scenario_execution_ids:
+        if scenario_execution_id not in scenario_executions:
+            raise FlexToolException(
+                f"Scenario execution with id {scenario_execution_id} doesn't exist."
+            )
+    return [scenario_executions[id_] for id_ in scenario_execution_ids]
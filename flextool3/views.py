@@ -2,6 +2,7 @@
 import json
 from shutil import copyfile
 
+from asgiref.sync import sync_to_async
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.http import (
@@ -10,7 +11,8 @@ from django.http import (
     HttpResponseServerError,
     FileResponse,
 )
-from django.shortcuts import get_object_or_404, render
+from django.core.handlers.asgi import ASGIRequest
+from django.shortcuts import aget_object_or_404, get_object_or_404, render
 from django.views import generic
 from spinedb_api import DatabaseMapping, SpineDBVersionError, SpineDBAPIError
 from .model_view import (
@@ -37,12 +39,16 @@ from .executions_view import (
     abort_execution,
     import_excel_input,
     solve_model,
-    execution_briefing,
+    aexecution_briefing,
+    execution_log,
+    execution_stream,
     current_execution,
 )
 from .projects_view import project_list, create_project, destroy_project
 from . import analysis_view
 from .summary_view import (
+    compare_summaries,
+    get_execution_history,
     get_scenario_list,
     get_summary,
     get_result_alternative,
@@ -287,9 +293,12 @@ def model(request):
 
 
 @login_required
-def executions(request):
+async def executions(request):
     """Responds to execution requests.
 
+    Briefings are served without blocking a thread;
+    other requests are handled in a worker thread.
+
     Args:
         request (HTTPRequest): client's request
 
@@ -303,19 +312,50 @@ def executions(request):
         question = get_and_validate(body, "type", str)
     except FlexToolException as error:
         return HttpResponseBadRequest(str(error))
+    if question == "briefing?":
+        return await aexecution_briefing(request, body)
     if question == "current execution?":
-        return current_execution(request, body)
+        return await sync_to_async(current_execution)(request, body)
     if question == "solve model?":
-        return solve_model(request, body)
+        return await sync_to_async(solve_model)(request, body)
     if question == "import excel input?":
-        return import_excel_input(request, body)
+        return await sync_to_async(import_excel_input)(request, body)
     if question == "abort?":
-        return abort_execution(request, body)
-    if question == "briefing?":
-        return execution_briefing(request, body)
+        return await sync_to_async(abort_execution)(request, body)
+    if question == "log?":
+        return await sync_to_async(execution_log)(request, body)
     return HttpResponseBadRequest("Unknown 'type'.")
 
 
+@login_required
+async def execution_events(request, project_id):
+    """Streams execution's new log lines and status changes as Server-Sent Events.
+
+    The first log line to send is given by the 'since' query parameter
+    or by the Last-Event-ID header of a reconnecting client.
+    Under ASGI the stream is served without blocking a thread.
+
+    Args:
+        request (HttpRequest): client's request
+        project_id (int): project id
+
+    Returns:
+        HttpResponse: response
+    """
+    user = await request.auser()
+    project = await aget_object_or_404(Project, pk=project_id, user=user.id)
+    since = request.GET.get("since", request.headers.get("Last-Event-ID", "0"))
+    try:
+        since = int(since)
+    except ValueError:
+        return HttpResponseBadRequest("'since' should be an integer.")
+    if since < 0:
+        return HttpResponseBadRequest("'since' should not be negative.")
+    return execution_stream(
+        project, since, asynchronous=isinstance(request, ASGIRequest)
+    )
+
+
 @login_required
 def summary(request):
     """Serves execution summaries.
@@ -336,8 +376,12 @@ def summary(request):
         return HttpResponseBadRequest(str(error))
     if type_ == "scenario list?":
         return get_scenario_list(project)
+    if type_ == "execution history?":
+        return get_execution_history(project, body)
     if type_ == "summary?":
         return get_summary(project, body)
+    if type_ == "compare summaries?":
+        return compare_summaries(project, body)
     if type_ == "result alternative?":
         return get_result_alternative(project, body)
     if type_ == "destroy execution?":
@@ -5,9 +5,11 @@ let fetchingBriefing = false
 const executionStatus = {
   yetToStart: 'YS',
   finished: 'OK',
+  queued: 'QU',
   running: 'RU',
   aborted: 'AB',
-  error: 'ER'
+  error: 'ER',
+  limitExceeded: 'LE'
 }
 
 const executionType = {
@@ -27,12 +29,34 @@ function createLastLogEntry(status) {
       return 'Run aborted.'
     case executionStatus.error:
       return 'Run failed.'
+    case executionStatus.limitExceeded:
+      return 'Run stopped: resource limit exceeded.'
     default:
       return 'Unknown run status.'
   }
 }
 
-/** Fetches execution briefing from server at regular intervals.
+/** Checks if execution is queued or running.
+ * @param {string} status Execution status code.
+ * @returns {boolean} True if execution has not ended yet.
+ */
+function isActive(status) {
+  return status === executionStatus.queued || status === executionStatus.running
+}
+
+/** Returns log message for a queued execution.
+ * @param {number} queuePosition Execution's position in queue.
+ * @returns {string} Log message.
+ */
+function createQueuedLogEntry(queuePosition) {
+  return `Waiting for a free solver, position ${queuePosition} in queue.`
+}
+
+/** Follows execution's log and status.
+ *
+ * Log lines and status changes are received as Server-Sent Events.
+ * Briefings are polled instead if the browser does not support EventSource
+ * or the event stream cannot be opened.
  * @param {number} projectId Project id.
  * @param {string} executionsUrl Executions URL.
  * @param {Ref} logLines List of log lines.
@@ -41,6 +65,53 @@ function createLastLogEntry(status) {
  * @callback finished Called when execution is finished.
  */
 function followExecution(projectId, executionsUrl, logLines, status, message, finished) {
+  if (typeof window.EventSource === 'undefined') {
+    pollExecution(projectId, executionsUrl, logLines, status, message, finished)
+    return
+  }
+  const source = new window.EventSource(`${executionsUrl}${projectId}/events/`)
+  let receivedLines = []
+  let receivedEvents = false
+  source.addEventListener('log', function (event) {
+    receivedEvents = true
+    receivedLines = receivedLines.concat(JSON.parse(event.data).log)
+    if (status.value !== executionStatus.queued) {
+      logLines.value = receivedLines
+    }
+  })
+  source.addEventListener('status', function (event) {
+    receivedEvents = true
+    const data = JSON.parse(event.data)
+    status.value = data.status
+    if (data.status === executionStatus.queued) {
+      logLines.value = [createQueuedLogEntry(data.queue_position)]
+      return
+    }
+    logLines.value = receivedLines
+    if (!isActive(data.status)) {
+      source.close()
+      logLines.value = receivedLines.concat(createLastLogEntry(data.status))
+      finished()
+    }
+  })
+  source.addEventListener('error', function () {
+    if (source.readyState !== window.EventSource.CLOSED && receivedEvents) {
+      return
+    }
+    source.close()
+    pollExecution(projectId, executionsUrl, logLines, status, message, finished)
+  })
+}
+
+/** Fetches execution briefing from server at regular intervals.
+ * @param {number} projectId Project id.
+ * @param {string} executionsUrl Executions URL.
+ * @param {Ref} logLines List of log lines.
+ * @param {Ref} status Execution status.
+ * @param {object} message Interface to show messages.
+ * @callback finished Called when execution is finished.
+ */
+function pollExecution(projectId, executionsUrl, logLines, status, message, finished) {
   const timer = window.setInterval(function () {
     if (fetchingBriefing) {
       return
@@ -50,8 +121,11 @@ function followExecution(projectId, executionsUrl, logLines, status, message, fi
       .then(function (data) {
         const briefing = data.briefing
         status.value = briefing.status
-        logLines.value = briefing.log
-        if (briefing.status !== executionStatus.running) {
+        logLines.value =
+          briefing.status === executionStatus.queued
+            ? [createQueuedLogEntry(briefing.queue_position)]
+            : briefing.log
+        if (!isActive(briefing.status)) {
           logLines.value = logLines.value.concat(createLastLogEntry(briefing.status))
           window.clearInterval(timer)
           finished()
@@ -69,4 +143,4 @@ function followExecution(projectId, executionsUrl, logLines, status, message, fi
   }, 500)
 }
 
-export { executionStatus, executionType, followExecution }
+export { executionStatus, executionType, followExecution, isActive }
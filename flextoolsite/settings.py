@@ -79,9 +79,88 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Seconds to wait for a lock held by another process,
+        # e.g. the execution task loop writing its registry.
+        "OPTIONS": {"timeout": 20},
     }
 }
 
+# Maximum number of simultaneously running solver processes.
+# Further executions wait in a queue until a process slot becomes free.
+# None allows one process per CPU.
+FLEXTOOL_MAX_CONCURRENT_EXECUTIONS = None
+
+# If True, multi-scenario solves run each scenario in a separate process
+# unless the client requests otherwise.
+FLEXTOOL_PARALLEL_SCENARIO_SOLVES = False
+
+# If True, scenarios whose input data and solver files have not changed
+# since an earlier solve reuse that solve's results instead of solving again.
+FLEXTOOL_REUSE_SOLVE_RESULTS = True
+
+# If True, solves write FlexTool's output files straight into the results database
+# instead of running them through the Import_results importer.
+# Output files in an unknown layout are still imported by the importer.
+FLEXTOOL_DIRECT_RESULTS_INGEST = True
+
+# Maximum number of executions a client may request per execution history page.
+FLEXTOOL_MAX_HISTORY_PAGE_SIZE = 500
+
+# Number of parsed execution summaries kept in memory.
+FLEXTOOL_SUMMARY_CACHE_SIZE = 64
+
+# Size in bytes of analysis query responses kept in memory.
+# Responses are reused until the project's results database changes.
+FLEXTOOL_RESULTS_CACHE_BYTES = 64 * 1024 * 1024
+
+# Execution output is written to log files in this directory
+# while only the latest lines are kept in memory.
+# If None, system's temporary directory is used.
+FLEXTOOL_EXECUTION_LOG_DIRECTORY = None
+FLEXTOOL_EXECUTION_LOG_MEMORY_LINES = 1000
+# Number of latest log lines stored with each scenario execution.
+FLEXTOOL_STORED_LOG_LINES = 10000
+
+# If True, executions are stored in the database so that running solves
+# survive restarts of the web server and the execution task loop.
+# Only supported on POSIX systems; ignored on Windows.
+FLEXTOOL_PERSIST_EXECUTIONS = True
+
+# Resource limits of each execution process; None means unlimited.
+# timeout and cpu_time are in seconds, address_space and memory in bytes,
+# nice is an increment to process' niceness.
+# If cgroup is a path to a cgroup v2 directory, each execution is placed
+# in its own child cgroup; memory limit is enforced only there.
+FLEXTOOL_EXECUTION_LIMITS = {
+    "timeout": None,
+    "cpu_time": None,
+    "address_space": None,
+    "memory": None,
+    "nice": None,
+    "cgroup": None,
+}
+
+# Number of idle worker interpreters that have imported Spine Toolbox
+# in advance; solves and imports start in a process forked from a worker.
+# Workers are available on POSIX systems only.
+# Each worker keeps a full interpreter in memory, so they are off by default.
+FLEXTOOL_WARM_WORKERS = 0
+FLEXTOOL_WORKER_PRELOAD_MODULES = [
+    "spinetoolbox.main",
+    "spinetoolbox.headless",
+    "spine_engine",
+    "spine_items",
+    "spinedb_api",
+]
+
+# Address of an execution broker that dispatches executions to worker nodes,
+# either a Unix socket path or host:port. If None, executions run on this
+# machine. Start the broker and the worker nodes with
+# python -m flextool3.broker serve|worker <address>
+# with FLEXTOOL_BROKER_AUTHKEY environment variable set to the same key.
+FLEXTOOL_EXECUTION_BROKER = None
+FLEXTOOL_EXECUTION_BROKER_AUTHKEY = ""
+
 DJANGO_VITE_ASSETS_PATH = BASE_DIR / "flextool3" / "static" / "flextool3"
 DJANGO_VITE_DEV_MODE = False
 DJANGO_VITE_STATIC_URL_PREFIX = "flextool3/"